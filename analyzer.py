@@ -0,0 +1,393 @@
+# analyzer.py
+# Análisis completo de un fuente (gramática, tabla LL(1), lexer -> parser,
+# DOT del árbol y del AST) sin depender de Flask: lo usan app.py y batch.py.
+import os
+import sys
+import time
+from datetime import datetime
+
+import lexer
+import grammar
+import ll1
+import parser_ll1
+import tree  # tree.to_dot (iterativo, con límites)
+import metrics
+import parallel
+import profiling
+import semantic
+import srcmap
+from budget import Budget
+from resultcache import ResultCache, result_key
+
+# Límites del DOT del árbol: lo que pasa de aquí se colapsa en nodos resumen
+DOT_INLINE_MAX_NODES = 20000    # DOT incrustado en la página
+DOT_MAX_DEPTH = 400
+
+# semantic.py trabaja sobre el AST: con check_semantics se arma aunque el
+# modo pedido no lo incluya, y entonces cada clase se revisa y se descarta
+# al reducirse (semantic.ClassStream)
+_WITH_AST = {"none": "ast", "parse": "both"}
+
+# Resultados de analyze_cached(): LRU en memoria + nivel en disco (cache/results)
+RESULT_CACHE = ResultCache(disk_dir=os.path.join(ll1.CACHE_DIR, "results"))
+
+
+def _cache_metrics():
+    st = RESULT_CACHE.stats()
+    return [
+        ("result_cache_hits_total", "counter", "Aciertos de la caché de resultados.", st["hits"]),
+        ("result_cache_misses_total", "counter", "Fallos de la caché de resultados.", st["misses"]),
+        ("result_cache_evictions_total", "counter", "Expulsiones de la caché de resultados.", st["evictions"]),
+        ("result_cache_bytes", "gauge", "Bytes estimados en la caché de resultados.", st["bytes"]),
+        ("result_cache_entries", "gauge", "Entradas en la caché de resultados.", st["entries"]),
+    ]
+
+
+metrics.REGISTRY.add_collector(_cache_metrics)
+
+DEMO = """class Demo {
+  int x;
+  int y;
+
+  int suma(int a, int b) {
+    return a + b;
+  }
+
+  void main() {
+    x = 2 + 3 * (4 + 5);
+    y = suma(x, 10);
+    return;
+  }
+}"""
+
+
+def safe_str(x, fallback=""):
+    try:
+        return str(x) if x is not None else fallback
+    except Exception:
+        return fallback
+
+
+# ---------------- análisis ----------------
+def parse_source(source, tree_mode="both", errors=None, timings=None, G=None, table=None, tokens_out=None,
+                 spans=False, budget=None, actions=None):
+    """
+    Lexer -> parser en flujo midiendo las fases "lex" (solo el productor de
+    tokens) y "parse" (el resto). Con tokens_out (lista) se copian ahí los
+    tokens como dicts. source puede ser un str o un srcmap.MappedSource.
+    Con muchas clases (parallel.worth_it, según tree_mode) se parsea por
+    trozos en paralelo.
+    spans=True guarda la posición de los terminales del árbol (tree.SpanArena).
+    budget: budget.Budget que acota tokens, nodos, errores y tiempo.
+    actions: acciones del AST a reemplazar (parser_ll1.run_parser); en el
+    parseo en paralelo se ignoran y el AST llega completo.
+    Devuelve (ParseResult, TokenStream o parallel.Stats: count, lex_count).
+    """
+    timings = {} if timings is None else timings
+    starts = None
+    if tokens_out is None and table is None and G in (None, grammar.DEFAULT):
+        starts = parallel.worth_it(source, tree=tree_mode)
+    if starts:
+        return _parse_parallel(source, tree_mode, errors, timings, spans, budget, starts)
+    lex0 = timings.get("lex", 0.0)
+    # Tokens en flujo (un PTok efímero por token), no un tokbuf.TokenBuffer:
+    # el parser igual necesita un objeto por token (el AST guarda los de los
+    # nombres) y el buffer completo rompe la memoria O(lookahead) del flujo.
+    # Medido en 170 KB: flujo dfa 103 ms / 11 KiB de pico, buffer + TokView
+    # 121 ms / 1 MiB. El buffer queda para el acceso aleatorio (incremental.py).
+    # Con otra gramática los tokens van a sus terminales (incluidos sus %token)
+    tok_to_term = lexer.token_map(G) if isinstance(G, grammar.Grammar) and G is not grammar.DEFAULT else None
+    if isinstance(source, srcmap.MappedSource):
+        items = srcmap.iter_ptoks(source, tok_to_term)
+    else:
+        items = lexer.iter_ptoks(source, tok_to_term=tok_to_term)
+    if tokens_out is not None:
+        items = _tee_tokens(items, tokens_out)
+    items = metrics.timed_iter(items, "lex", timings)
+    t0 = time.perf_counter()
+    stream = lexer.TokenStream(items, errors, budget)
+    parsed = parser_ll1.run_parser(stream, G, table, tree=tree_mode, spans=spans, actions=actions)
+    items.close()
+    dt = time.perf_counter() - t0 - (timings["lex"] - lex0)
+    metrics.REGISTRY.observe("parse", dt)
+    timings["parse"] = timings.get("parse", 0.0) + dt
+    metrics.count("lex", "tokens", stream.count)
+    metrics.count("lex", "errors", stream.lex_count)
+    if parsed.tree is not None:
+        metrics.count("parse", "nodes", len(parsed.tree.arena))
+    if parsed.ast is not None:
+        metrics.count("parse", "ast_nodes", tree.count_nodes(parsed.ast, sys.maxsize))
+    return parsed, stream
+
+def _parse_parallel(source, tree_mode, errors, timings, spans=False, budget=None, starts=None):
+    # Muchas clases: lexer + parser por trozos en el pool de parallel.py (la
+    # fase "parse" incluye el lexeo, que ocurre en los workers)
+    with metrics.phase("parse", timings):
+        parsed, stats = parallel.parse(source, tree_mode, spans=spans, budget=budget, starts=starts)
+    if errors is not None:
+        errors.extend(parsed.errors)
+        parsed = parsed._replace(errors=errors)
+    metrics.count("lex", "tokens", stats.count)
+    metrics.count("lex", "errors", stats.lex_count)
+    metrics.count("parse", "chunks", stats.chunks)
+    if parsed.tree is not None:
+        metrics.count("parse", "nodes", len(parsed.tree.arena))
+    if parsed.ast is not None:
+        metrics.count("parse", "ast_nodes", tree.count_nodes(parsed.ast, sys.maxsize))
+    return parsed, stats
+
+def check_semantics(parsed, errors, timings=None, budget=None, classes=None):
+    """
+    Agrega a errors los errores semánticos del AST (semantic.check), o los
+    que ya juntó classes (semantic.ClassStream pasado al parseo), solo si no
+    hubo errores léxicos/sintácticos ni se truncó el análisis. Devuelve
+    cuántos, o None si se omitió.
+    """
+    if errors or (budget is not None and budget.truncated):
+        return None
+    if parsed.ast is None and classes is None:
+        return None
+    with metrics.phase("semantic", timings):
+        found = semantic.check(parsed.ast) if parsed.ast is not None else classes.errors()
+    if budget is not None and budget.max_errors is not None and len(found) > budget.max_errors:
+        del found[budget.max_errors:]
+        budget.exceed("errores")
+    errors.extend(found)
+    return len(found)
+
+def analyze(source: str, tree_mode: str = "both", semantics: bool = True, budget=None, profile=None):
+    """
+    Analiza el fuente. tree_mode elige qué árboles construir
+    (ver parser_ll1.TREE_MODES): "none" solo diagnósticos, "parse" el árbol
+    de derivación, "ast" el AST, "both" ambos. source es un str o un
+    srcmap.MappedSource (archivo grande mapeado en memoria, ver analyze_path).
+    semantics=False omite el análisis semántico (semantic.py).
+    budget: budget.Budget (por defecto los límites de budget.py); si se agota,
+    el resultado queda con lo analizado hasta ahí y "truncado" dice qué
+    límite se alcanzó (None si ninguno).
+    profile: profiling.Profile para perfilar cada fase; el resumen queda en
+    "perfil" y en la consola (no usar con analyze_cached).
+    """
+    result = {
+        "console": "",
+        "errores": [],
+        "conflictos": [],
+        "arbol_dot": "",
+        "ast_dot": "",
+        "tabla_transicion": [],
+        "parse_tree": None,
+        "ast": None,
+        "n_tokens": 0,
+        "n_lines": 0,
+        "truncado": None,
+        "perfil": None
+    }
+    budget = (budget or Budget()).start()
+
+    mapped = isinstance(source, srcmap.MappedSource)
+    if not mapped and not isinstance(source, str):
+        source = safe_str(source)
+
+    log = []
+    timings = {}
+    if profile is not None:
+        profile.start()
+    try:
+        # Gramática
+        G = grammar.DEFAULT
+        start = G.start
+        log.append(f"[{datetime.now().strftime('%H:%M:%S')}] Gramática cargada. Símbolo inicial: {start}")
+
+        # FIRST/FOLLOW + Tabla LL(1) (compiladas una vez, ver ll1.get_compiled)
+        with metrics.phase("grammar", timings), profiling.phase(profile, "grammar"):
+            compiled = ll1.get_compiled(G)
+        table, conflicts = compiled.table, compiled.conflicts
+        result["conflictos"] = conflicts or []
+        log.append("Tabla LL(1) sin conflictos." if not conflicts else f"⚠️ Conflictos LL(1): {len(conflicts)}")
+
+        # Tabla serializada
+        result["tabla_transicion"] = list(compiled.rows)
+
+        # Lexer -> Parser en flujo: el parser tira de los tokens uno a uno y
+        # los errores léxicos/sintácticos quedan intercalados en orden de fuente
+        parse_mode = _WITH_AST.get(tree_mode, tree_mode) if semantics else tree_mode
+        classes = semantic.ClassStream() if parse_mode != tree_mode else None
+        with profiling.phase(profile, "parse"):
+            parsed, stream = parse_source(source, parse_mode, result["errores"], timings, G, table,
+                                          budget=budget, actions=classes.actions() if classes else None)
+        parse_tree = parsed.tree
+        ast = parsed.ast if tree_mode in ("ast", "both") else None
+        result["n_tokens"] = stream.count
+        log.append(f"Tokens generados: {stream.count}")
+        if stream.lex_count:
+            log.append(f"Errores léxicos: {stream.lex_count}")
+        if semantics:
+            with profiling.phase(profile, "semantic"):
+                n_sem = check_semantics(parsed, result["errores"], timings, budget, classes)
+            log.append("Análisis semántico omitido (hay errores léxicos/sintácticos)." if n_sem is None
+                       else f"Errores semánticos: {n_sem}")
+
+        result["parse_tree"] = parse_tree
+        result["ast"] = ast
+
+        # Árbol DOT
+        with metrics.phase("dot", timings), profiling.phase(profile, "dot"):
+            try:
+                result["arbol_dot"] = (tree.to_dot(parse_tree, DOT_INLINE_MAX_NODES, DOT_MAX_DEPTH, budget)
+                                       if parse_tree else "digraph G { node [shape=box]; Empty; }")
+            except Exception as e:
+                result["arbol_dot"] = f"digraph G {{ node [shape=box]; Error[label=\"DOT error: {safe_str(e)}\"]; }}"
+
+            # AST DOT (construido durante el parseo por ast_actions)
+            if ast is not None:
+                try:
+                    result["ast_dot"] = tree.to_dot(ast, DOT_INLINE_MAX_NODES, DOT_MAX_DEPTH, budget)
+                except Exception as e:
+                    result["ast_dot"] = f"digraph AST {{ node [shape=box]; Error[label=\"DOT error: {safe_str(e)}\"]; }}"
+
+        n_lines = result["n_lines"] = source.n_lines if mapped else source.count("\n") + 1
+        log.append(f"Líneas procesadas: {n_lines}")
+        log.append(f"Tiempos: {metrics.summary(timings)}")
+
+        if conflicts:
+            for (A,a,p1,p2) in conflicts:
+                log.append(f"[Conflicto] ({A}, {a}) entre {p1} y {p2}")
+
+    except Exception as e:
+        result["errores"].append(f"Excepción interna: {type(e).__name__}: {e}")
+        result["arbol_dot"] = "digraph G { node [shape=box]; Error; }"
+    finally:
+        if profile is not None:
+            profile.stop()
+
+    if profile is not None:
+        result["perfil"] = profile.report()
+        log.extend(profile.summary_lines())
+    if budget.truncated:
+        result["truncado"] = budget.truncated
+        result["errores"].append(budget.message())
+        log.append(f"⚠️ {budget.message()}")
+    result["console"] = "\n".join(log)
+    return result
+
+
+def analyze_cached(source: str, tree_mode: str = "both", cache=None):
+    """
+    analyze() detrás de la caché de resultados (RESULT_CACHE por defecto).
+    El resultado no trae parse_tree/ast y se comparte entre llamadas: no
+    modificarlo.
+    """
+    cache = RESULT_CACHE if cache is None else cache
+    if not isinstance(source, (str, srcmap.MappedSource)):
+        source = safe_str(source)
+    key = result_key(source, tree_mode)
+    res = cache.get(key)
+    if res is not None:
+        return res
+    res = analyze(source, tree_mode)
+    if any(e.startswith("Excepción interna:") for e in res["errores"]):
+        return res  # fallo interno: no se cachea
+    if res["truncado"] == "tiempo":
+        return res  # depende de la carga de la máquina: no se cachea
+    return cache.put(key, res)
+
+
+def analyze_path(path, tree_mode="both", cached=True):
+    """
+    Analiza un archivo sin leerlo entero a un str: se mapea en memoria
+    (srcmap.open_mapped) y los tokens llevan offsets de byte. Sin caché el
+    AST vuelve con sus tokens ya leídos (srcmap.detach): el mapa se cierra.
+    """
+    with srcmap.open_mapped(path) as src:
+        if cached:
+            return analyze_cached(src, tree_mode)
+        res = analyze(src, tree_mode)
+        srcmap.detach(res["ast"])
+        return res
+
+
+# ---------------- análisis por partes (API JSON) ----------------
+API_PARTS = ("errors", "tokens", "tree", "ast", "table", "conflicts")
+
+
+def _tee_tokens(items, out):
+    """Deja pasar PTok/LexError hacia el parser copiando los tokens a out."""
+    for item in items:
+        if not isinstance(item, lexer.LexError) and item.kind != "$":
+            out.append({"kind": item.kind, "lex": item.lex, "line": item.line, "col": item.col})
+        yield item
+
+
+def analyze_parts(source: str, parts=("errors",), profile=None):
+    """
+    Calcula solo las partes pedidas (subconjunto de API_PARTS) y devuelve un
+    dict serializable a JSON con una clave por parte:
+      errors     errores léxicos y sintácticos en orden de fuente, y los
+                 semánticos si no hubo de los anteriores
+      tokens     [{kind, lex, line, col}] (terminales de la gramática)
+      tree/ast   DOT del árbol de derivación / del AST
+      table      filas de la tabla LL(1); conflicts: sus conflictos
+    y siempre truncated: el límite de budget.py que cortó el análisis, o None.
+    Con profile (profiling.Profile) se agrega profile: su report().
+    Lo no pedido no se construye: el árbol de derivación solo se arma para
+    "tree", el AST para "ast" o para el análisis semántico de "errors", y
+    sin errors/tree/ast no se parsea (tokens solo lexea).
+    """
+    unknown = [p for p in parts if not isinstance(p, str) or p not in API_PARTS]
+    if unknown:
+        raise ValueError(f"Partes desconocidas: {', '.join(map(str, unknown))} (opciones: {', '.join(API_PARTS)})")
+    parts = set(parts)
+    out = {}
+    budget = Budget().start()
+    if profile is not None:
+        profile.start()
+    try:
+        _compute_parts(source, parts, out, budget, profile)
+    finally:
+        if profile is not None:
+            profile.stop()
+    out["truncated"] = budget.truncated
+    if budget.truncated and "errors" in out:
+        out["errors"].append(budget.message())
+    if profile is not None:
+        out["profile"] = profile.report()
+    return out
+
+
+def _compute_parts(source, parts, out, budget, profile):
+    # Cuerpo de analyze_parts: llena out con las partes pedidas
+    if "table" in parts or "conflicts" in parts:
+        with profiling.phase(profile, "grammar"):
+            compiled = ll1.get_compiled()
+        if "table" in parts:
+            out["table"] = list(compiled.rows)
+        if "conflicts" in parts:
+            out["conflicts"] = [list(c) for c in compiled.conflicts]
+
+    build_tree, build_ast = "tree" in parts, "ast" in parts
+    if "errors" in parts or build_tree or build_ast:
+        tree_mode = ("both" if build_ast else "parse") if build_tree else ("ast" if build_ast else "none")
+        classes = None
+        if "errors" in parts and tree_mode in _WITH_AST:
+            tree_mode = _WITH_AST[tree_mode]
+            classes = semantic.ClassStream()
+        if "tokens" in parts:
+            out["tokens"] = []
+        errors = []
+        with profiling.phase(profile, "parse"):
+            parsed, _stream = parse_source(source, tree_mode, errors, tokens_out=out.get("tokens"),
+                                           budget=budget, actions=classes.actions() if classes else None)
+        if "errors" in parts:
+            with profiling.phase(profile, "semantic"):
+                check_semantics(parsed, errors, budget=budget, classes=classes)
+            out["errors"] = errors
+        with metrics.phase("dot"), profiling.phase(profile, "dot"):
+            if build_tree:
+                out["tree"] = tree.to_dot(parsed.tree, DOT_INLINE_MAX_NODES, DOT_MAX_DEPTH, budget)
+            if build_ast:
+                out["ast"] = (tree.to_dot(parsed.ast, DOT_INLINE_MAX_NODES, DOT_MAX_DEPTH, budget)
+                              if parsed.ast is not None else None)
+    elif "tokens" in parts:
+        out["tokens"] = []
+        with metrics.phase("lex"), profiling.phase(profile, "lex"):
+            lexer.TokenStream(_tee_tokens(lexer.iter_ptoks(source), out["tokens"]), budget=budget).drain()
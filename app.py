@@ -1,211 +1,269 @@
 # app.py
-from flask import Flask, render_template, request, send_file, abort
+from flask import Flask, Response, render_template, request, send_file, abort, jsonify
 import os
-from datetime import datetime
 
-import lexer
-import grammar
-import ll1
-import parser_ll1
-from tree import Node  # usamos parse_tree.to_dot()
+from analyzer import analyze, analyze_cached, analyze_parts, analyze_path, DEMO
+from artifacts import ArtifactStore, ARTIFACTS, BUNDLE_NAME, PROFILE_NAME
+from jobs import JobQueue, QueueFull
+from parser_ll1 import TREE_MODES
+import explorer
+import metrics
+import profiling
+import srcmap
 
 app = Flask(__name__)
 
-DEMO = """class Demo {
-  int x;
-  int y;
+# Perfilado de cada análisis (profiling.py) aunque la petición no lo pida:
+# LL1_PROFILE=1 o app.config["PROFILE"] = True
+app.config.setdefault("PROFILE", os.environ.get("LL1_PROFILE", "") not in ("", "0"))
 
-  int suma(int a, int b) {
-    return a + b;
-  }
+# Artefactos de descarga por fuente (out/store/<hash>/), generados al pedirlos
+STORE = ArtifactStore()
 
-  void main() {
-    x = 2 + 3 * (4 + 5);
-    y = suma(x, 10);
-    return;
-  }
-}"""
+# Análisis en segundo plano (pool de procesos acotado) para envíos grandes
+JOBS = JobQueue()
 
 # ---------------- utilidades ----------------
-def safe_str(x, fallback=""):
-    try:
-        return str(x) if x is not None else fallback
-    except Exception:
-        return fallback
-
-def ensure_out_dir():
-    os.makedirs("out", exist_ok=True)
-
-def write_text(path, content):
-    ensure_out_dir()
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-
-def write_lines(path, lines):
-    ensure_out_dir()
-    with open(path, "w", encoding="utf-8") as f:
-        for line in (lines or []):
-            f.write(safe_str(line) + "\n")
+PROGRAMA = "programa.txt"
+PREVIEW_BYTES = 64 * 1024   # extracto que se muestra de un programa.txt grande
+JOB_MIN_CHARS = 256 * 1024  # envíos del formulario desde aquí van a la cola (JOBS)
 
 def load_programa_txt(default_text):
     try:
-        with open("programa.txt", "r", encoding="utf-8") as f:
+        with open(PROGRAMA, "r", encoding="utf-8") as f:
             return f.read()
     except FileNotFoundError:
         return default_text
 
-# -------- wrapper de lexer: produce PTok(kind,lex,line,col) + errores --------
-class PTok:
-    __slots__ = ("kind","lex","line","col")
-    def __init__(self, kind, lex, line, col):
-        self.kind = kind
-        self.lex = lex
-        self.line = line
-        self.col = col
-
-def lex_tokenize(source_text):
-    from grammar import TOK_TO_TERM
-    L = lexer.Lexer(source_text)
-    raw = L.tokenize_all()     # lista de Token(typ, lexeme, line, col)
-    errs = list(L.errors)
-    out = []
-    for t in raw:
-        name = t.typ.name      # 'CLASS','ID','NUM','EOF','ERROR',...
-        if name == "EOF":
-            out.append(PTok("$", "", t.line, t.col))
-            break
-        if name == "ERROR":
-            # ya agregaste el mensaje en errs desde el lexer; seguimos
-            continue
-        term = TOK_TO_TERM.get(name)
-        if term is None:
-            errs.append(f"Token '{name}' no mapeado en la gramática (L{t.line}, C{t.col})")
-            continue
-        out.append(PTok(term, t.lexeme, t.line, t.col))
-    if not out or out[-1].kind != "$":
-        last = raw[-1] if raw else type("X", (), {"line":1,"col":1})()
-        out.append(PTok("$","", last.line, last.col))
-    return out, errs
-
-# ---------------- análisis ----------------
-def analyze(source: str):
-    result = {
-        "console": "",
-        "errores": [],
-        "conflictos": [],
-        "arbol_dot": "",
-        "ast_dot": "",
-        "tabla_transicion": []
-    }
-
-    if not isinstance(source, str):
-        source = safe_str(source)
-
-    log = []
+def large_programa_txt():
+    """Tamaño de programa.txt si pasa de srcmap.LARGE_FILE_BYTES (se analiza mapeado), si no None."""
     try:
-        # Gramática
-        start = grammar.START
-        G = grammar.G
-        log.append(f"[{datetime.now().strftime('%H:%M:%S')}] Gramática cargada. Símbolo inicial: {start}")
-
-        # Lexer (wrapper)
-        tokens, lex_errors = lex_tokenize(source)
-        log.append(f"Tokens generados: {len(tokens)}")
-        if lex_errors:
-            log.append(f"Errores léxicos: {len(lex_errors)}")
-
-        # FIRST/FOLLOW + Tabla LL(1)
-        FIRST, FOLLOW = ll1.build_first_follow()
-        table, conflicts = ll1.build_table(FIRST, FOLLOW)
-        result["conflictos"] = conflicts or []
-        log.append("Tabla LL(1) sin conflictos." if not conflicts else f"⚠️ Conflictos LL(1): {len(conflicts)}")
-
-        # Serializar tabla
-        rows = []
-        for A in table:
-            for a in table[A]:
-                prod = table[A][a]
-                rows.append(f"{A:12} | {a:10} -> {' '.join(prod) if prod else 'ε'}")
-        result["tabla_transicion"] = sorted(rows)
-
-        # Parser
-        parse_tree, syn_errors = parser_ll1.parse(tokens, G, table)
-
-        # Árbol DOT
-        try:
-            result["arbol_dot"] = parse_tree.to_dot() if parse_tree else "digraph G { node [shape=box]; Empty; }"
-        except Exception as e:
-            result["arbol_dot"] = f"digraph G {{ node [shape=box]; Error[label=\"DOT error: {safe_str(e)}\"]; }}"
-
-        # (AST opcional no implementado)
-        result["ast_dot"] = ""
-
-        # Errores
-        result["errores"].extend(lex_errors or [])
-        result["errores"].extend(syn_errors or [])
-
-        log.append(f"Líneas procesadas: {source.count('\\n')+1}")
-
-        if conflicts:
-            for (A,a,p1,p2) in conflicts:
-                log.append(f"[Conflicto] ({A}, {a}) entre {p1} y {p2}")
-
-    except Exception as e:
-        result["errores"].append(f"Excepción interna: {type(e).__name__}: {e}")
-        result["arbol_dot"] = "digraph G { node [shape=box]; Error; }"
-
-    result["console"] = "\n".join(log)
-    return result
-
-# ---------------- rutas ----------------
-@app.route("/", methods=["GET", "POST"])
-def index():
-    if request.method == "GET":
-        codigo = load_programa_txt(DEMO)
-        print("GET request - usando código demo")
-    else:
-        codigo = request.form.get("code", "")
-        print("POST request - código recibido:", codigo[:100], "...")  # Primeros 100 chars
-
-    # Debug de análisis
-    print("Iniciando análisis...")
-    res = analyze(codigo)
-    
-    # Debug del resultado
-    print("Tokens:", len(res.get("tokens", [])))
-    print("Errores:", len(res.get("errores", [])))
-    print("Árbol generado:", bool(res.get("arbol_dot")))
-    print("Tabla de transición:", len(res.get("tabla_transicion", [])))
-
-    if request.method == "POST":
-        write_lines("out/errores.txt", res.get("errores") or [])
-        write_lines("out/tabla_transicion.txt", res.get("tabla_transicion") or [])
-        write_text("out/arbol.dot", res.get("arbol_dot") or "")
-
+        size = os.path.getsize(PROGRAMA)
+    except OSError:
+        return None
+    return size if size >= srcmap.LARGE_FILE_BYTES else None
+
+def preview_programa_txt(size, path=PROGRAMA):
+    with open(path, "rb") as f:
+        head = f.read(PREVIEW_BYTES).decode("utf-8", "ignore")
+    return f"{head}\n/* ... vista previa de {PREVIEW_BYTES} de {size} bytes: el análisis es del archivo completo */\n"
+
+def stored_source(key):
+    """Fuente guardado en STORE para el editor (un extracto si es grande); "" si ya no está."""
+    try:
+        path = STORE.source_path(key)
+    except KeyError:
+        return ""
+    size = os.path.getsize(path)
+    if size >= srcmap.LARGE_FILE_BYTES:
+        return preview_programa_txt(size, path)
+    return STORE.source(key)
+
+def render_result(codigo, res, key, job=None):
     return render_template(
         "index.html",
         codigo=codigo,
         conflictos=res.get("conflictos") or [],
         errores=res.get("errores") or [],
         console=res.get("console") or "",
-        arbol=res.get("arbol_dot") or "",
         ast=res.get("ast_dot") or "",
-        tabla=res.get("tabla_transicion") or []
+        tabla=res.get("tabla_transicion") or [],
+        perfil=res.get("perfil"),
+        key=key,
+        job=job
     )
-@app.route("/download/errores")
-def download_errores():
-    path = "out/errores.txt"
-    return send_file(path, as_attachment=True, download_name="errores.txt") if os.path.exists(path) else abort(404)
-
-@app.route("/download/tabla")
-def download_tabla():
-    path = "out/tabla_transicion.txt"
-    return send_file(path, as_attachment=True, download_name="tabla_transicion.txt") if os.path.exists(path) else abort(404)
-
-@app.route("/download/arbol")
-def download_arbol():
-    path = "out/arbol.dot"
-    return send_file(path, as_attachment=True, download_name="arbol.dot") if os.path.exists(path) else abort(404)
+
+def request_data():
+    """Cuerpo JSON o, si no hay, el formulario; None si el JSON no es un objeto."""
+    data = request.get_json(silent=True)
+    if data is None:
+        return request.form
+    return data if isinstance(data, dict) else None
+
+def wants_profile(data):
+    """Perfilado pedido con profile=1 (formulario, JSON o query string) o activado en la config."""
+    value = data.get("profile", request.args.get("profile"))
+    if value is None:
+        return bool(app.config.get("PROFILE"))
+    return value is True or str(value).lower() in ("1", "true", "on", "yes")
+
+def submit_job(key, tree_mode):
+    """Encola el análisis del fuente guardado con esa clave (QueueFull si la cola está llena)."""
+    return JOBS.submit(STORE.source_path(key), key, tree_mode)
+
+# ---------------- rutas ----------------
+@app.route("/", methods=["GET", "POST"])
+def index():
+    job_id = request.args.get("job") if request.method == "GET" else None
+    if job_id:
+        return job_page(job_id)
+    large = large_programa_txt() if request.method == "GET" else None
+    if large:
+        # Archivo grande: mmap + offsets (srcmap), sin pasarlo entero a str;
+        # en el editor va solo un extracto
+        res = analyze_path(PROGRAMA, "ast")
+        key = STORE.put_file(PROGRAMA)
+        codigo = preview_programa_txt(large)
+    else:
+        if request.method == "GET":
+            codigo = load_programa_txt(DEMO)
+        else:
+            codigo = request.form.get("code", "")
+            if len(codigo) >= JOB_MIN_CHARS:
+                # Envío grande: no se analiza en el hilo de la petición; la
+                # página consulta el trabajo y vuelve con ?job=<id>
+                key = STORE.put(codigo)
+                try:
+                    job = submit_job(key, "ast")
+                except QueueFull as e:
+                    return render_result(codigo, {"errores": [f"{e}. Reintenta en unos segundos."]}, key), 429
+                return render_result(codigo, {}, key, job=job.id)
+        # Solo se guarda el fuente; los artefactos se generan al descargarlos
+        key = STORE.put(codigo)
+        # El árbol de derivación no se arma aquí: la página lo pide por
+        # nodos a /api/tree/<key> (explorer.py) a medida que se expande
+        if wants_profile(request.form):
+            # Perfilado: sin caché (se mide el análisis de verdad)
+            prof = profiling.Profile()
+            res = analyze(codigo, "ast", profile=prof)
+            STORE.put_profile(key, prof)
+        else:
+            res = analyze_cached(codigo, "ast")
+    app.logger.debug("%s: %d tokens, %d errores, %d caracteres",
+                     request.method, res.get("n_tokens", 0), len(res.get("errores") or []), large or len(codigo))
+
+    return render_result(codigo, res, key)
+
+def job_page(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        abort(404)
+    codigo = stored_source(job.key)
+    if job.status == "pending":
+        return render_result(codigo, {}, job.key, job=job.id)
+    res = job.result if job.status == "done" else {"errores": [f"Excepción interna: {job.error}"]}
+    return render_result(codigo, res, job.key)
+
+@app.route("/api/analyze", methods=["POST"])
+def api_analyze():
+    """
+    Análisis sin plantilla ni escrituras en out/. Acepta JSON
+    {"source": "...", "parts": ["errors", "tokens", ...]} o un formulario con
+    code y parts=errors,tokens (también ?parts=...). Por defecto: errors.
+    Con profile=1 la respuesta trae profile (profiling.Profile.report) y
+    profile_url, el .pstats para descargar.
+    """
+    data = request_data()
+    if data is None:
+        return jsonify({"error": "El cuerpo JSON debe ser un objeto."}), 400
+    source = data.get("source", data.get("code"))
+    if not isinstance(source, str):
+        return jsonify({"error": "Falta el fuente (campo 'source')."}), 400
+    parts = data.get("parts") or request.args.get("parts") or "errors"
+    if isinstance(parts, str):
+        parts = [p.strip() for p in parts.split(",") if p.strip()]
+    elif not isinstance(parts, list) or not all(isinstance(p, str) for p in parts):
+        return jsonify({"error": "El campo 'parts' debe ser un texto o una lista de textos."}), 400
+    prof = profiling.Profile() if wants_profile(data) else None
+    try:
+        res = analyze_parts(source, parts, prof)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if "errors" in res:
+        res["ok"] = not res["errors"]
+    if prof is not None:
+        key = STORE.put(source)
+        STORE.put_profile(key, prof)
+        res["profile_url"] = f"/download/{key}/{PROFILE_NAME}"
+    return jsonify(res)
+
+@app.route("/api/jobs", methods=["POST"])
+def api_jobs_submit():
+    """
+    Encola un análisis completo: JSON {"source": "...", "tree_mode": "ast"}
+    (o formulario con code). Responde 202 con el id del trabajo, o 429 con
+    Retry-After si la cola está llena.
+    """
+    data = request_data()
+    if data is None:
+        return jsonify({"error": "El cuerpo JSON debe ser un objeto."}), 400
+    source = data.get("source", data.get("code"))
+    if not isinstance(source, str):
+        return jsonify({"error": "Falta el fuente (campo 'source')."}), 400
+    tree_mode = data.get("tree_mode", "ast")
+    if tree_mode not in TREE_MODES:
+        return jsonify({"error": f"Modo de árbol desconocido: {tree_mode!r} (opciones: {', '.join(TREE_MODES)})"}), 400
+    key = STORE.put(source)
+    try:
+        job = submit_job(key, tree_mode)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 429, {"Retry-After": "5"}
+    return jsonify(job.info()), 202, {"Location": f"/api/jobs/{job.id}"}
+
+@app.route("/api/jobs/<job_id>")
+def api_job_status(job_id):
+    """Estado del trabajo: pending | done | failed."""
+    job = JOBS.get(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job.info())
+
+@app.route("/api/jobs/<job_id>/result")
+def api_job_result(job_id):
+    """Resultado de analyze() del trabajo (200), su estado si sigue pendiente (202) o el error (500)."""
+    job = JOBS.get(job_id)
+    if job is None:
+        abort(404)
+    if job.status == "pending":
+        return jsonify(job.info()), 202
+    if job.status == "failed":
+        return jsonify(job.info()), 500
+    return jsonify(dict(job.result, key=job.key, id=job.id))
+
+@app.route("/download/<key>/<name>")
+def download(key, name):
+    """Artefacto de un análisis (ver artifacts.ARTIFACTS), el zip con todos o el último perfil."""
+    try:
+        if name == PROFILE_NAME:
+            return send_file(STORE.profile_path(key), as_attachment=True, download_name=PROFILE_NAME)
+        if name == BUNDLE_NAME:
+            return send_file(STORE.bundle(key), as_attachment=True, download_name=BUNDLE_NAME)
+        return send_file(STORE.path(key, name), as_attachment=True, download_name=ARTIFACTS[name])
+    except KeyError:
+        abort(404)
+
+@app.route("/api/tree/<key>")
+def api_tree(key):
+    """
+    Nodo del árbol de derivación del fuente <key> con sus hijos, para el
+    explorador de la página: ?node=<id> (por defecto la raíz) y
+    ?depth=<niveles> (1..explorer.MAX_DEPTH). Cada nodo trae n_children,
+    size (nodos del subárbol) y span [línea, col, línea, col fin].
+    truncated/truncated_message: el límite de budget.py que cortó el
+    parseo y su mensaje (None si el árbol está completo).
+    """
+    try:
+        node = int(request.args.get("node", -1))
+        depth = min(max(int(request.args.get("depth", 1)), 0), explorer.MAX_DEPTH)
+    except ValueError:
+        return jsonify({"error": "node y depth deben ser enteros."}), 400
+    try:
+        tree = explorer.get(STORE, key)
+    except KeyError:
+        abort(404)
+    if node < 0:
+        node = tree.root
+    try:
+        data = tree.node(node, depth)
+    except IndexError:
+        return jsonify({"error": f"Nodo inexistente: {node}"}), 404
+    return jsonify({"key": key, "root": tree.root, "n_nodes": len(tree), "node": data,
+                    "truncated": tree.truncated, "truncated_message": tree.message})
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Histogramas por fase y contadores en formato de texto de Prometheus."""
+    return Response(metrics.REGISTRY.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -0,0 +1,333 @@
+# artifacts.py
+# Almacén de artefactos de descarga por análisis, direccionado por contenido.
+#
+#   store = ArtifactStore()
+#   key = store.put(fuente)            # barato: el fuente queda en memoria
+#   store.path(key, "arbol")           # genera arbol.dot la primera vez
+#   store.bundle(key)                  # zip con todos los artefactos
+#   store.put_profile(key, perfil)     # perfil.pstats de un análisis perfilado
+#
+# Cada fuente vive en <root>/<key>/ (key = hash del fuente y de la gramática),
+# así que usuarios concurrentes no se pisan y un mismo programa comparte sus
+# artefactos. Nada se genera hasta que alguien lo descarga, y el fuente de put()
+# se escribe recién cuando algo lo necesita en disco. La expulsión es por
+# antigüedad (último uso, cada EVICT_EVERY put) y por tamaño total: un total
+# de bytes en curso se revisa tras cada escritura.
+# (Reemplaza a reporters.py: sus escritores de errores/tabla/DOT están aquí.)
+
+import hashlib
+import os
+from collections import OrderedDict
+import re
+import shutil
+import threading
+import time
+import zipfile
+
+import analyzer
+import ll1
+import lexer
+import metrics
+import parser_ll1
+import semantic
+import srcmap
+import tree
+from budget import Budget
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "out", "store")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 24 * 3600   # segundos desde el último uso
+EVICT_EVERY = 32              # put() entre barridos por antigüedad
+PENDING_BYTES = 32 * 1024 * 1024  # fuentes de put() aún en memoria; lo más viejo pasa a disco
+DOT_MAX_NODES = 2000000       # DOT en archivo: se escribe en flujo
+DOT_MAX_DEPTH = 400
+
+SOURCE_NAME = "source.txt"
+BUNDLE_NAME = "bundle.zip"
+PROFILE_NAME = "perfil.pstats"   # último análisis perfilado del fuente (profiling.py)
+# nombre lógico -> archivo
+ARTIFACTS = {
+    "errores": "errores.txt",
+    "tabla": "tabla_transicion.txt",
+    "arbol": "arbol.dot",
+    "ast": "ast.dot",
+}
+
+# Entra en la clave: subirlo cuando cambia el contenido de un artefacto
+# (p. ej. 2: errores.txt trae también los semánticos)
+STORE_FORMAT = 2
+
+_KEY_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+# ---------------- escritores ----------------
+def write_errors(f, errors):
+    for e in errors:
+        f.write(f"{e}\n")
+
+
+def write_table(f, rows, conflicts):
+    for row in rows:
+        f.write(f"{row}\n")
+    if conflicts:
+        f.write("\n# Conflictos:\n")
+        for A, a, p1, p2 in conflicts:
+            f.write(f"Conflicto en ({A},{a}) entre {p1} y {p2}\n")
+
+
+def write_dot(f, root, empty="digraph G { node [shape=box]; Empty; }"):
+    if root is None:
+        f.write(empty + "\n")
+    else:
+        tree.write_dot(root, f, DOT_MAX_NODES, DOT_MAX_DEPTH)
+
+
+def _parse(source, mode):
+    errors = []
+    items = srcmap.iter_ptoks(source) if isinstance(source, srcmap.MappedSource) else lexer.iter_ptoks(source)
+    budget = Budget().start()
+    res = parser_ll1.run_parser(lexer.TokenStream(items, errors, budget), tree=mode)
+    if budget.truncated:
+        errors.append(budget.message())
+    return res, errors
+
+
+def _errors(source):
+    # Los mismos errores que analyze(): léxicos, sintácticos y, si no hubo, semánticos
+    errors = []
+    budget = Budget().start()
+    classes = semantic.ClassStream()
+    parsed, _stream = analyzer.parse_source(source, "ast", errors, budget=budget, actions=classes.actions())
+    analyzer.check_semantics(parsed, errors, budget=budget, classes=classes)
+    if budget.truncated:
+        errors.append(budget.message())
+    return errors
+
+
+def generate(name, source, f):
+    """Escribe en f el artefacto name (clave de ARTIFACTS) del fuente (str o srcmap.MappedSource)."""
+    if name == "tabla":
+        compiled = ll1.get_compiled()
+        write_table(f, compiled.rows, compiled.conflicts)
+    elif name == "errores":
+        write_errors(f, _errors(source))
+    elif name == "arbol":
+        write_dot(f, _parse(source, "parse")[0].tree)
+    elif name == "ast":
+        write_dot(f, _parse(source, "ast")[0].ast)
+    else:
+        raise KeyError(name)
+
+
+# ---------------- almacén ----------------
+class ArtifactStore:
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # clave -> fuente de put() aún no escrito
+        self._pending_bytes = 0
+        self._total = None  # bytes en disco (se cuentan en la primera escritura)
+
+    def key_for(self, source):
+        h = hashlib.sha256(f"{ll1.grammar_fingerprint()}/{STORE_FORMAT}".encode())
+        h.update(source.encode("utf-8", "surrogatepass") if isinstance(source, str) else source.buf)
+        return h.hexdigest()[:32]
+
+    def _dir(self, key):
+        if not _KEY_RE.match(key or ""):
+            raise KeyError(key)
+        return os.path.join(self.root, key)
+
+    @staticmethod
+    def _write_atomic(path, fill, mode="w"):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if mode == "w":
+                with open(tmp, "w", encoding="utf-8") as f:
+                    fill(f)
+            else:
+                fill(tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _write(self, key, path, fill, mode="w"):
+        """_write_atomic() que suma lo escrito al total y expulsa si se pasa de max_bytes."""
+        old = os.path.getsize(path) if os.path.exists(path) else 0
+        self._write_atomic(path, fill, mode)
+        grown = os.path.getsize(path) - old
+        with self._lock:
+            if self._total is None:
+                self._total = self.size()  # ya incluye lo recién escrito
+            else:
+                self._total += grown
+            over = self._total > self.max_bytes
+        if over:
+            self.evict(keep=key)
+
+    def _flush(self, key):
+        """Escribe el fuente de key si put() lo dejó en memoria."""
+        source = self._pending.get(key)
+        if source is None:
+            return
+        d = self._dir(key)
+        os.makedirs(d, exist_ok=True)
+        self._write(key, os.path.join(d, SOURCE_NAME), lambda f: f.write(source))
+        with self._lock:
+            if self._pending.pop(key, None) is not None:
+                self._pending_bytes -= len(source)
+
+    def put(self, source):
+        """
+        Registra el fuente y devuelve su clave (no genera artefactos). El
+        fuente queda en memoria hasta que un artefacto, un perfil o
+        source_path() lo necesitan en disco.
+        """
+        key = self.key_for(source)
+        d = self._dir(key)
+        if os.path.exists(os.path.join(d, SOURCE_NAME)):
+            os.utime(d)
+        else:
+            with self._lock:
+                if key in self._pending:
+                    self._pending.move_to_end(key)
+                else:
+                    self._pending[key] = source
+                    self._pending_bytes += len(source)
+                spill, extra = [], self._pending_bytes - PENDING_BYTES
+                for k, src in self._pending.items():
+                    if extra <= 0 or k == key:
+                        break
+                    spill.append(k)
+                    extra -= len(src)
+            for k in spill:
+                self._flush(k)
+        self._puts += 1
+        if self._puts % EVICT_EVERY == 1:
+            self.evict(keep=key)
+        return key
+
+    def put_file(self, path):
+        """Como put() para un archivo (grande): se hashea mapeado y se copia tal cual."""
+        with srcmap.open_mapped(path) as src:
+            key = self.key_for(src)
+        d = self._dir(key)
+        src_path = os.path.join(d, SOURCE_NAME)
+        if os.path.exists(src_path):
+            os.utime(d)
+        else:
+            os.makedirs(d, exist_ok=True)
+            self._write(key, src_path, lambda tmp: shutil.copyfile(path, tmp), mode="b")
+        self._puts += 1
+        if self._puts % EVICT_EVERY == 1:
+            self.evict(keep=key)
+        return key
+
+    def source_path(self, key):
+        """Ruta del fuente guardado (para mapearlo con srcmap); KeyError si no existe."""
+        self._flush(key)
+        path = os.path.join(self._dir(key), SOURCE_NAME)
+        if not os.path.exists(path):
+            raise KeyError(key)
+        return path
+
+    def source(self, key):
+        source = self._pending.get(key)
+        if source is not None:
+            return source
+        try:
+            with open(os.path.join(self._dir(key), SOURCE_NAME), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(key) from None
+
+    def put_profile(self, key, profile):
+        """Guarda profile (profiling.Profile) como perfil.pstats del fuente; KeyError si no existe."""
+        src_path = self.source_path(key)
+        path = os.path.join(os.path.dirname(src_path), PROFILE_NAME)
+        self._write(key, path, profile.dump, mode="b")
+        return path
+
+    def profile_path(self, key):
+        path = os.path.join(self._dir(key), PROFILE_NAME)
+        if not os.path.exists(path):
+            raise KeyError(key)
+        return path
+
+    def path(self, key, name):
+        """Ruta del artefacto, generándolo si aún no existe. KeyError si no hay tal clave/artefacto."""
+        if name not in ARTIFACTS:
+            raise KeyError(name)
+        d = self._dir(key)
+        path = os.path.join(d, ARTIFACTS[name])
+        if not os.path.exists(path):
+            self._flush(key)
+            try:
+                source = srcmap.open_mapped(os.path.join(d, SOURCE_NAME))
+            except FileNotFoundError:
+                raise KeyError(key) from None
+            with source, metrics.phase("artifact_write"):
+                self._write(key, path, lambda f: generate(name, source, f))
+            metrics.count("artifact_write", name)
+        os.utime(d)
+        return path
+
+    def bundle(self, key):
+        """Ruta de un zip (deflate) con todos los artefactos del fuente."""
+        d = self._dir(key)
+        path = os.path.join(d, BUNDLE_NAME)
+        if not os.path.exists(path):
+            files = [(self.path(key, name), fname) for name, fname in ARTIFACTS.items()]
+
+            def fill(tmp):
+                with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as z:
+                    for p, fname in files:
+                        z.write(p, fname)
+            with metrics.phase("artifact_write"):
+                self._write(key, path, fill, mode="b")
+            metrics.count("artifact_write", "bundle")
+        os.utime(d)
+        return path
+
+    # ---------------- expulsión ----------------
+    def _entries(self):
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        out = []
+        for name in names:
+            d = os.path.join(self.root, name)
+            if not _KEY_RE.match(name) or not os.path.isdir(d):
+                continue
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(d) if e.is_file())
+                out.append((os.stat(d).st_mtime, size, name))
+            except FileNotFoundError:
+                continue  # expulsado por otro proceso
+        return out
+
+    def size(self):
+        return sum(size for _t, size, _k in self._entries())
+
+    def evict(self, now=None, keep=None):
+        """Borra lo no usado en max_age y, de lo más viejo a lo más nuevo, hasta caber en max_bytes."""
+        now = time.time() if now is None else now
+        entries = sorted(self._entries())
+        total = sum(size for _t, size, _k in entries)
+        removed = 0
+        for mtime, size, key in entries:
+            if key == keep:
+                continue
+            if now - mtime <= self.max_age and total <= self.max_bytes:
+                break
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            total -= size
+            removed += 1
+        with self._lock:
+            self._total = total
+        return removed
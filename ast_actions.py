@@ -0,0 +1,134 @@
+# ast_actions.py
+# Acciones semánticas sobre las producciones de grammar.G para construir el
+# AST durante el parseo (parser_ll1.run_parser(..., tree="ast"|"both")).
+#
+# Cada acción recibe los valores de los símbolos del lado derecho (el token,
+# lexer.PTok, para terminales, valor sintetizado para no-terminales; None si
+# la recuperación de errores insertó/saltó el símbolo) y devuelve el valor del
+# lado izquierdo. Los nodos con nombre (clase, miembro, parámetro, variable,
+# uso, llamada) y Return guardan su token en Node.tok para que semantic.py
+# ubique sus errores. Las cadenas Expr/ExprP y Term/TermP se pliegan en nodos
+# BinOp asociativos a izquierda; ε no genera nodos.
+#
+# Las listas recursivas por la derecha (ClassList, MemberList, StmtList,
+# ParamRest, ArgRest) se construyen agregando al final (orden inverso) para
+# que cada reducción sea O(1); quien las consume las invierte.
+
+from tree import Node
+
+
+def _name(v):
+    return v.lex if v is not None and v.lex else "?"
+
+
+def _list(v):
+    return v if v is not None else []
+
+
+def _push(item, rest):
+    rest = _list(rest)
+    if item is not None:
+        rest.append(item)
+    return rest
+
+
+def _in_order(rev):
+    return list(reversed(_list(rev)))
+
+
+def _fold(first, tail):
+    acc = first if first is not None else Node("?")
+    for op, rhs in _in_order(tail):
+        acc = Node(f"BinOp {_name(op)}", [acc, rhs if rhs is not None else Node("?")])
+    return acc
+
+
+def _member(typ, name, rest):
+    if isinstance(rest, tuple):  # método: (params, block)
+        params, block = rest
+        kids = [Node("Params", params)] + ([block] if block is not None else [])
+        return Node(f"Method {_name(typ)} {_name(name)}", kids, name)
+    return Node(f"Field {_name(typ)} {_name(name)}", [], name)
+
+
+def _program(first, rest):
+    # Una sola clase: su nodo es la raíz (como antes de admitir varias)
+    classes = ([first] if first is not None else []) + _in_order(rest)
+    if len(classes) > 1:
+        return Node("Program", classes)
+    return classes[0] if classes else None
+
+
+def _stmt_id(name, rest):
+    kind, payload = rest if isinstance(rest, tuple) else (None, None)
+    if kind == "call":
+        return Node(f"Call {_name(name)}", payload, name)
+    return Node(f"Assign {_name(name)}", [payload] if payload is not None else [], name)
+
+
+def _factor_id(name, call):
+    if call is not None:
+        return Node(f"Call {_name(name)}", call[1], name)
+    return Node(f"Id {_name(name)}", [], name)
+
+
+ACTIONS = {
+    ('Prog',       ('ClassDecl', 'ClassList')):          lambda v: _program(v[0], v[1]),
+    ('ClassList',  ('ClassDecl', 'ClassList')):          lambda v: _push(v[0], v[1]),
+    ('ClassList',  ()):                                  lambda v: [],
+    ('ClassDecl',  ('class', 'id', '{', 'MemberList', '}')):
+        lambda v: Node(f"Class {_name(v[1])}", _in_order(v[3]), v[1]),
+    ('MemberList', ('Member', 'MemberList')):            lambda v: _push(v[0], v[1]),
+    ('MemberList', ()):                                  lambda v: [],
+    ('Member',     ('Type', 'id', 'MemberRest')):        lambda v: _member(v[0], v[1], v[2]),
+    ('MemberRest', (';',)):                              lambda v: None,
+    ('MemberRest', ('MethodDecl',)):                     lambda v: v[0] if v[0] is not None else ([], None),
+    ('VarDecl',    ('Type', 'id', ';')):                 lambda v: Node(f"VarDecl {_name(v[0])} {_name(v[1])}", [], v[1]),
+    ('MethodDecl', ('(', 'ParamList', ')', 'Block')):    lambda v: (_in_order(v[1]), v[3]),
+    ('ParamList',  ('Param', 'ParamRest')):              lambda v: _push(v[0], v[1]),
+    ('ParamList',  ()):                                  lambda v: [],
+    ('ParamRest',  (',', 'Param', 'ParamRest')):         lambda v: _push(v[1], v[2]),
+    ('ParamRest',  ()):                                  lambda v: [],
+    ('Param',      ('Type', 'id')):                      lambda v: Node(f"Param {_name(v[0])} {_name(v[1])}", [], v[1]),
+    ('Block',      ('{', 'StmtList', '}')):              lambda v: Node("Block", _in_order(v[1])),
+    ('StmtList',   ('Stmt', 'StmtList')):                lambda v: _push(v[0], v[1]),
+    ('StmtList',   ()):                                  lambda v: [],
+    ('Stmt',       ('VarDecl',)):                        lambda v: v[0],
+    ('Stmt',       ('id', 'StmtRest')):                  lambda v: _stmt_id(v[0], v[1]),
+    ('Stmt',       ('Return',)):                         lambda v: v[0],
+    ('StmtRest',   ('Assign',)):                         lambda v: v[0],
+    ('StmtRest',   ('Call', ';')):                       lambda v: v[0],
+    ('Assign',     ('=', 'Expr', ';')):                  lambda v: ("assign", v[1]),
+    ('Return',     ('return', 'RetExpr', ';')):          lambda v: Node("Return", [v[1]] if v[1] is not None else [], v[0]),
+    ('RetExpr',    ('Expr',)):                           lambda v: v[0],
+    ('RetExpr',    ()):                                  lambda v: None,
+    ('Call',       ('(', 'ArgList', ')')):               lambda v: ("call", _in_order(v[1])),
+    ('ArgList',    ('Expr', 'ArgRest')):                 lambda v: _push(v[0], v[1]),
+    ('ArgList',    ()):                                  lambda v: [],
+    ('ArgRest',    (',', 'Expr', 'ArgRest')):            lambda v: _push(v[1], v[2]),
+    ('ArgRest',    ()):                                  lambda v: [],
+    ('Expr',       ('Term', 'ExprP')):                   lambda v: _fold(v[0], v[1]),
+    ('ExprP',      ('+', 'Term', 'ExprP')):              lambda v: _push((v[0], v[1]), v[2]),
+    ('ExprP',      ('-', 'Term', 'ExprP')):              lambda v: _push((v[0], v[1]), v[2]),
+    ('ExprP',      ()):                                  lambda v: [],
+    ('Term',       ('Factor', 'TermP')):                 lambda v: _fold(v[0], v[1]),
+    ('TermP',      ('*', 'Factor', 'TermP')):            lambda v: _push((v[0], v[1]), v[2]),
+    ('TermP',      ('/', 'Factor', 'TermP')):            lambda v: _push((v[0], v[1]), v[2]),
+    ('TermP',      ()):                                  lambda v: [],
+    ('Factor',     ('id', 'CallOpt')):                   lambda v: _factor_id(v[0], v[1]),
+    ('Factor',     ('number',)):                         lambda v: Node(f"Num {_name(v[0])}"),
+    ('Factor',     ('(', 'Expr', ')')):                  lambda v: v[1],
+    ('CallOpt',    ('Call',)):                           lambda v: v[0],
+    ('CallOpt',    ()):                                  lambda v: None,
+    ('Type',       ('int',)):                            lambda v: v[0],
+    ('Type',       ('void',)):                           lambda v: v[0],
+}
+
+
+def default_action(values):
+    """Producción sin acción registrada: no aporta valor al AST."""
+    return None
+
+
+def action_for(lhs, rhs):
+    return ACTIONS.get((lhs, tuple(rhs)), default_action)
@@ -0,0 +1,158 @@
+# batch.py
+# Análisis por lotes desde la línea de comandos:
+#
+#   python batch.py corpus/ 'extra/**/*.txt' -j 8 -o resultados.jsonl
+#
+# Recorre directorios y globs, analiza cada archivo con analyzer.analyze() en
+# un pool de procesos (la gramática compilada se carga una vez por worker) y
+# emite una línea JSON por archivo a medida que terminan. Al final informa por
+# stderr archivos/s, tokens/s y los archivos más lentos.
+
+import argparse
+import glob
+import heapq
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import ll1
+import parser_ll1
+import srcmap
+from analyzer import analyze, analyze_path
+
+DEFAULT_GLOB = "**/*.txt"   # dentro de cada directorio pasado
+DEFAULT_TOP = 10
+CHUNKSIZE = 8
+
+
+def expand_inputs(inputs, pattern=DEFAULT_GLOB):
+    """Directorios (con pattern), globs y archivos -> rutas únicas en orden."""
+    seen = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            paths = sorted(glob.glob(os.path.join(item, pattern), recursive=True))
+        elif glob.has_magic(item):
+            paths = sorted(glob.glob(item, recursive=True))
+        else:
+            paths = [item]
+        for p in paths:
+            if p not in seen and not os.path.isdir(p):
+                seen.add(p)
+                yield p
+
+
+def _init_worker():
+    # Tabla LL(1) desde cache/ (o compilada) una sola vez por proceso
+    ll1.get_compiled()
+
+
+def analyze_file(job):
+    """Analiza un archivo; devuelve el dict que se emite como línea JSON."""
+    path, tree_mode, with_dot = job
+    t0 = time.perf_counter()
+    try:
+        if os.path.getsize(path) >= srcmap.LARGE_FILE_BYTES:
+            res = analyze_path(path, tree_mode, cached=False)  # mapeado, sin copiarlo a str
+        else:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                source = f.read()
+            res = analyze(source, tree_mode)
+    except OSError as e:
+        return {"file": path, "ok": False, "errores": [f"No se pudo leer: {e}"],
+                "tokens": 0, "lines": 0, "seconds": time.perf_counter() - t0}
+    out = {
+        "file": path,
+        "ok": not res["errores"],
+        "errores": res["errores"],
+        "tokens": res["n_tokens"],
+        "lines": res["n_lines"],
+        "seconds": round(time.perf_counter() - t0, 6),
+    }
+    if with_dot:
+        out["arbol_dot"] = res["arbol_dot"]
+        out["ast_dot"] = res["ast_dot"]
+    return out
+
+
+def run(paths, out, workers=None, tree_mode="none", with_dot=False, top=DEFAULT_TOP):
+    """Analiza paths escribiendo JSONL en out; devuelve el resumen."""
+    jobs = ((p, tree_mode, with_dot) for p in paths)
+    n_files = n_tokens = n_failed = 0
+    slowest = []  # heap de (segundos, archivo)
+    t0 = time.perf_counter()
+    if workers == 1:
+        _init_worker()
+        results = map(analyze_file, jobs)
+        pool = None
+    else:
+        pool = Pool(workers, initializer=_init_worker)
+        results = pool.imap_unordered(analyze_file, jobs, CHUNKSIZE)
+    try:
+        for r in results:
+            out.write(json.dumps(r, ensure_ascii=False) + "\n")
+            n_files += 1
+            n_tokens += r["tokens"]
+            n_failed += not r["ok"]
+            if top:
+                item = (r["seconds"], r["file"])
+                if len(slowest) < top:
+                    heapq.heappush(slowest, item)
+                else:
+                    heapq.heappushpop(slowest, item)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - t0
+    return {
+        "files": n_files,
+        "with_errors": n_failed,
+        "tokens": n_tokens,
+        "seconds": elapsed,
+        "files_per_sec": n_files / elapsed if elapsed else 0.0,
+        "tokens_per_sec": n_tokens / elapsed if elapsed else 0.0,
+        "slowest": sorted(slowest, reverse=True),
+    }
+
+
+def print_report(summary, err=None):
+    err = err or sys.stderr     # el de ahora, no el del momento de importar
+    s = summary
+    print(f"Archivos: {s['files']} ({s['with_errors']} con errores) en {s['seconds']:.2f}s", file=err)
+    print(f"Rendimiento: {s['files_per_sec']:.1f} archivos/s, {s['tokens_per_sec']:.0f} tokens/s", file=err)
+    if s["slowest"]:
+        print("Más lentos:", file=err)
+        for secs, path in s["slowest"]:
+            print(f"  {secs * 1000:9.1f} ms  {path}", file=err)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Análisis LL(1) por lotes con salida JSON Lines.")
+    ap.add_argument("inputs", nargs="+", help="archivos, directorios o globs")
+    ap.add_argument("--glob", default=DEFAULT_GLOB, help=f"patrón dentro de directorios (por defecto {DEFAULT_GLOB})")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="procesos (por defecto, uno por CPU; 1 = sin pool)")
+    ap.add_argument("-o", "--output", default="-", help="archivo JSONL de salida (por defecto stdout)")
+    ap.add_argument("--tree", choices=parser_ll1.TREE_MODES, default="none",
+                    help="árboles a construir (por defecto none: solo diagnósticos)")
+    ap.add_argument("--dot", action="store_true", help="incluir arbol_dot/ast_dot en cada línea")
+    ap.add_argument("--top", type=int, default=DEFAULT_TOP, help="cuántos archivos lentos listar")
+    args = ap.parse_args(argv)
+
+    paths = list(expand_inputs(args.inputs, args.glob))
+    if not paths:
+        print("No se encontraron archivos.", file=sys.stderr)
+        return 2
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = run(paths, out, args.jobs, args.tree, args.dot, args.top)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print_report(summary)
+    return 1 if summary["with_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Benchmarks del analizador (ejecutar desde la raíz: python -m bench.<módulo>)
@@ -0,0 +1,44 @@
+# bench/bench_scanner.py
+# Throughput de los dos motores del lexer (regex maestra vs tabla dfa) sobre
+# un fuente grande, en las tres salidas: Token, PTok (flujo) y TokenBuffer.
+#
+#   python -m bench.bench_scanner [n_miembros] [repeticiones]
+
+import sys
+import time
+
+import lexer
+from bench.bench_tokens import make_source
+
+PATHS = (
+    ("tokenize_all", lambda src, eng: lexer.Lexer(src, eng).tokenize_all()),
+    ("iter_ptoks", lambda src, eng: list(lexer.iter_ptoks(src, eng))),
+    ("tokenize_compact", lambda src, eng: lexer.Lexer(src, eng).tokenize_compact()),
+)
+
+
+def best_of(fn, reps):
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 5000
+    reps = int(argv[2]) if len(argv) > 2 else 3
+    src = make_source(n)
+    mb = len(src) / 1e6
+    print(f"Fuente: {mb:.2f} MB, mejor de {reps}")
+    print(f"{'salida':18} {'regex MB/s':>11} {'dfa MB/s':>9} {'speedup':>8}")
+    for name, fn in PATHS:
+        t_re, out_re = best_of(lambda: fn(src, "regex"), reps)
+        t_dfa, out_dfa = best_of(lambda: fn(src, "dfa"), reps)
+        assert len(out_re) == len(out_dfa)
+        print(f"{name:18} {mb/t_re:11.2f} {mb/t_dfa:9.2f} {t_re/t_dfa:7.2f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
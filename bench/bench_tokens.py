@@ -0,0 +1,64 @@
+# bench/bench_tokens.py
+# Compara la ruta clásica (Token/TokenType -> lista de PTok) con el buffer
+# compacto (tokbuf.TokenBuffer): tiempo de tokenización y memoria retenida.
+#
+#   python -m bench.bench_tokens [n_miembros]
+
+import sys
+import time
+import tracemalloc
+
+import lexer
+
+MEMBER = """  int f{i}(int a, int b) {{
+    x{i} = a + b * (a - {i});
+    return suma(x{i}, 10);
+  }}
+  int y{i};
+"""
+
+
+def make_source(n):
+    return "class Bench {\n" + "".join(MEMBER.format(i=i) for i in range(n)) + "}\n"
+
+
+def measure(fn, src):
+    # Tiempo sin tracemalloc (lo ralentiza), memoria en una segunda corrida
+    t0 = time.perf_counter()
+    result = fn(src)
+    dt = time.perf_counter() - t0
+    del result
+    tracemalloc.start()
+    result = fn(src)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, dt, retained, peak
+
+
+def ptok_path(src):
+    return lexer.tokenize(src)[0]
+
+
+def compact_path(src):
+    return lexer.Lexer(src).tokenize_compact()
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 5000
+    src = make_source(n)
+    print(f"Fuente: {len(src)/1e6:.2f} MB, {n} miembros")
+    rows = []
+    for name, fn in (("PTok (lista)", ptok_path), ("TokenBuffer", compact_path)):
+        toks, dt, retained, peak = measure(fn, src)
+        ntok = len(toks)
+        rows.append((name, ntok, dt, retained, peak))
+        del toks
+    print(f"{'ruta':14} {'tokens':>9} {'seg':>7} {'tok/s':>11} {'retenido MB':>12} {'pico MB':>9} {'B/token':>8}")
+    for name, ntok, dt, retained, peak in rows:
+        print(f"{name:14} {ntok:9d} {dt:7.3f} {ntok/dt:11.0f} {retained/1e6:12.2f} {peak/1e6:9.2f} {retained/ntok:8.1f}")
+    base, comp = rows
+    print(f"Memoria retenida: x{base[3]/comp[3]:.1f} menos; tiempo: x{base[2]/comp[2]:.2f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,187 @@
+# bench/gen.py
+# Generador de programas sintéticos para los benchmarks.
+#
+# derive() expande grammar.G al azar (con semilla) y, pasada una profundidad,
+# elige siempre la alternativa más corta para terminar. Las cargas con forma
+# (clases con N miembros, métodos con M sentencias, paréntesis anidados,
+# ArgList largos, entradas con muchos errores) se arman sobre ella o con
+# plantillas del mismo lenguaje.
+#
+#   python -m bench.gen members 100 > prog.txt
+
+import random
+import sys
+
+import grammar
+
+# Lexema de cada terminal (id y number se generan)
+LEXEME = {t: t for t in grammar.TERMS}
+NOISE = ("@", "#", "$", "int int", "( (", ";;", "= =", "return return", "}")
+EPS_P = 0.2  # probabilidad de elegir ε antes de max_depth (listas más largas)
+
+
+def _min_lengths(G=None):
+    """Largo mínimo (en terminales) derivable desde cada símbolo."""
+    G = G or grammar.G
+    INF = float("inf")
+    best = {A: INF for A in G}
+    changed = True
+    while changed:
+        changed = False
+        for A, alts in G.items():
+            for rhs in alts:
+                n = sum(best[s] if s in G else 1 for s in rhs)
+                if n < best[A]:
+                    best[A] = n
+                    changed = True
+    return best
+
+
+_MIN = _min_lengths()
+
+
+def _shortest(A, G, mins):
+    return min(G[A], key=lambda rhs: sum(mins[s] if s in G else 1 for s in rhs))
+
+
+def derive(rng, start=None, max_depth=12, G=None):
+    """Lista de lexemas de una derivación aleatoria (iterativa) desde start."""
+    G = G or grammar.G
+    mins = _MIN if G is grammar.G else _min_lengths(G)
+    out = []
+    stack = [(start or grammar.START, 0)]
+    while stack:
+        X, depth = stack.pop()
+        if X not in G:
+            if X == "id":
+                out.append(f"v{rng.randrange(1000)}")
+            elif X == "number":
+                out.append(str(rng.randrange(10000)))
+            else:
+                out.append(LEXEME[X])
+            continue
+        if depth >= max_depth:
+            rhs = _shortest(X, G, mins)
+        else:
+            alts = [rhs for rhs in G[X] if rhs]
+            rhs = rng.choice(alts) if alts and (len(alts) == len(G[X]) or rng.random() >= EPS_P) else []
+        for sym in reversed(rhs):
+            stack.append((sym, depth + 1))
+    return out
+
+
+def render(lexemes):
+    """Une lexemas cortando línea tras ';', '{' y '}'."""
+    lines, cur = [], []
+    for lex in lexemes:
+        cur.append(lex)
+        if lex in (";", "{", "}"):
+            lines.append(" ".join(cur))
+            cur = []
+    if cur:
+        lines.append(" ".join(cur))
+    return "\n".join(lines) + "\n"
+
+
+def random_program(seed=0, max_depth=12):
+    return render(derive(random.Random(seed), max_depth=max_depth))
+
+
+def random_members(n, seed=0, max_depth=8):
+    """Clase con n miembros derivados al azar desde 'Member'."""
+    rng = random.Random(seed)
+    lex = ["class", "Bench", "{"]
+    for _ in range(n):
+        lex.extend(derive(rng, "Member", max_depth))
+    lex.append("}")
+    return render(lex)
+
+
+# ---------------- cargas con forma ----------------
+def _expr(rng, depth=2):
+    return render(derive(rng, "Expr", depth)).strip()
+
+
+def members(n, stmts=3, seed=0):
+    """Clase con n miembros (mitad campos, mitad métodos con stmts sentencias)."""
+    rng = random.Random(seed)
+    out = ["class Bench {"]
+    for i in range(n):
+        if i % 2 == 0:
+            out.append(f"  int f{i};")
+        else:
+            out.append(f"  int m{i}(int a, int b) {{")
+            out.extend(_stmt(rng, j) for j in range(stmts))
+            out.append("    return a;")
+            out.append("  }")
+    out.append("}")
+    return "\n".join(out) + "\n"
+
+
+def _stmt(rng, j):
+    k = j % 3
+    if k == 0:
+        return f"    int t{j};"
+    if k == 1:
+        return f"    t{j - 1} = {_expr(rng)};"
+    return f"    f{j}(a, {_expr(rng)});"
+
+
+def statements(m, seed=0):
+    """Un método con m sentencias."""
+    rng = random.Random(seed)
+    body = "\n".join(_stmt(rng, j) for j in range(m))
+    return f"class Bench {{\n  void main() {{\n{body}\n  }}\n}}\n"
+
+
+def nested(depth):
+    """Factor con depth paréntesis anidados: x = ((((1 + 1) + 1) ...));"""
+    expr = "(" * depth + "1" + " + 1)" * depth
+    return f"class Bench {{\n  void main() {{\n    x = {expr};\n  }}\n}}\n"
+
+
+def long_args(n):
+    """Una llamada con n argumentos."""
+    args = ", ".join(f"a{i} * {i}" for i in range(n))
+    return f"class Bench {{\n  void main() {{\n    f({args});\n  }}\n}}\n"
+
+
+def classes(n, members_per_class=6, seed=0):
+    """n clases seguidas (unidad con varias clases, ver parallel.py)."""
+    out = []
+    for i in range(n):
+        out.append(members(members_per_class, seed=seed + i).replace("class Bench {", f"class C{i} {{", 1))
+    return "".join(out)
+
+
+def error_dense(n, density=0.2, seed=0):
+    """members(n) con ruido léxico/sintáctico insertado tras ~density de las líneas."""
+    rng = random.Random(seed)
+    lines = members(n, seed=seed).splitlines()
+    out = []
+    for line in lines:
+        out.append(line)
+        if rng.random() < density:
+            out.append("  " + rng.choice(NOISE))
+    return "\n".join(out) + "\n"
+
+
+WORKLOADS = {
+    "members": members,
+    "statements": statements,
+    "nested": nested,
+    "long_args": long_args,
+    "error_dense": error_dense,
+    "classes": classes,
+    "random": random_members,
+}
+
+
+def main(argv):
+    kind = argv[1] if len(argv) > 1 else "members"
+    n = int(argv[2]) if len(argv) > 2 else 100
+    sys.stdout.write(WORKLOADS[kind](n))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,157 @@
+# bench/suite.py
+# Suite de benchmarks sobre cargas sintéticas (bench/gen.py): lexer, parser,
+# serializadores del árbol y analyze() completo, en varios tamaños. Informa
+# tiempo (mejor de N), throughput en tokens/s y pico de memoria; compara con
+# una línea base guardada y falla (código 1) si algo empeora más del umbral.
+#
+#   python -m bench.suite --save bench/baseline.json      # fijar línea base
+#   python -m bench.suite --compare bench/baseline.json   # CI: falla si regresa
+#   python -m bench.suite --quick --cases lexer,parse
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import analyzer
+import lexer
+import parser_ll1
+from bench import gen
+
+SIZES = (100, 1000)
+QUICK_SIZES = (20, 100)
+DEFAULT_REPS = 3
+DEFAULT_THRESHOLD = 0.25       # +25 % de tiempo
+DEFAULT_MEM_THRESHOLD = 0.25   # +25 % de pico de memoria
+NOISE_SECONDS = 0.002          # diferencias menores son ruido de medición
+
+
+# Cada caso: setup(src) -> estado (fuera de la medición), run(estado) -> resultado
+def _tokens(src):
+    return lexer.tokenize(src)[0]
+
+
+def _tree(src):
+    return parser_ll1.parse(_tokens(src))[0]
+
+
+CASES = {
+    "lexer": (lambda src: src, lambda src: lexer.Lexer(src).tokenize_all()),
+    "parse": (_tokens, lambda toks: parser_ll1.parse(toks)),
+    "to_dot": (_tree, lambda root: root.to_dot()),
+    "to_mermaid": (_tree, lambda root: root.to_mermaid()),
+    "analyze": (lambda src: src, lambda src: analyzer.analyze(src)),
+}
+
+
+def best_of(fn, arg, reps):
+    fn(arg)  # calentamiento (cachés de la gramática, asignador)
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        out = fn(arg)
+        best = min(best, time.perf_counter() - t0)
+        del out
+    return best
+
+
+def peak_memory(fn, arg):
+    tracemalloc.start()
+    try:
+        out = fn(arg)
+        _cur, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del out
+    return peak
+
+
+def run(workloads, sizes, cases, reps=DEFAULT_REPS, out=sys.stdout):
+    """Mide todo; devuelve {"carga/n/caso": {seconds, peak, tokens, tok_per_sec}}."""
+    results = {}
+    print(f"{'carga':12} {'n':>6} {'caso':11} {'tokens':>8} {'ms':>9} {'tok/s':>11} {'pico MB':>8}", file=out)
+    for wname in workloads:
+        make = gen.WORKLOADS[wname]
+        for n in sizes:
+            src = make(n)
+            ntok = len(_tokens(src))
+            for cname in cases:
+                setup, fn = CASES[cname]
+                state = setup(src)
+                secs = best_of(fn, state, reps)
+                peak = peak_memory(fn, state)
+                del state
+                key = f"{wname}/{n}/{cname}"
+                results[key] = {"seconds": secs, "peak": peak, "tokens": ntok,
+                                "tok_per_sec": ntok / secs if secs else 0.0}
+                print(f"{wname:12} {n:6d} {cname:11} {ntok:8d} {secs * 1000:9.2f} "
+                      f"{ntok / secs if secs else 0.0:11.0f} {peak / 1e6:8.2f}", file=out)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, mem_threshold=DEFAULT_MEM_THRESHOLD):
+    """Lista de regresiones [(clave, métrica, base, actual)] frente a baseline."""
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if (cur["seconds"] > base["seconds"] * (1 + threshold)
+                and cur["seconds"] - base["seconds"] > NOISE_SECONDS):
+            regressions.append((key, "seconds", base["seconds"], cur["seconds"]))
+        if cur["peak"] > base["peak"] * (1 + mem_threshold):
+            regressions.append((key, "peak", base["peak"], cur["peak"]))
+    return regressions
+
+
+def _split(value, allowed, what):
+    items = [v.strip() for v in value.split(",") if v.strip()]
+    bad = [v for v in items if v not in allowed]
+    if bad:
+        raise SystemExit(f"{what} desconocido(s): {', '.join(bad)} (opciones: {', '.join(allowed)})")
+    return items
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks del analizador LL(1) sobre cargas sintéticas.")
+    ap.add_argument("--workloads", default=",".join(gen.WORKLOADS), help="cargas de bench/gen.py")
+    ap.add_argument("--cases", default=",".join(CASES), help="casos a medir")
+    ap.add_argument("--sizes", default=None, help=f"tamaños separados por comas (por defecto {SIZES})")
+    ap.add_argument("--quick", action="store_true", help=f"tamaños chicos {QUICK_SIZES}")
+    ap.add_argument("--reps", type=int, default=DEFAULT_REPS, help="repeticiones (se toma la mejor)")
+    ap.add_argument("--save", metavar="JSON", help="guardar resultados como línea base")
+    ap.add_argument("--compare", metavar="JSON", help="comparar con una línea base")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="regresión de tiempo tolerada (0.25 = +25%%)")
+    ap.add_argument("--mem-threshold", type=float, default=DEFAULT_MEM_THRESHOLD, help="regresión de memoria tolerada")
+    args = ap.parse_args(argv)
+
+    workloads = _split(args.workloads, list(gen.WORKLOADS), "Carga")
+    cases = _split(args.cases, list(CASES), "Caso")
+    if args.sizes:
+        sizes = tuple(int(s) for s in args.sizes.split(","))
+    else:
+        sizes = QUICK_SIZES if args.quick else SIZES
+
+    results = run(workloads, sizes, cases, args.reps)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"Línea base guardada en {args.save}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.mem_threshold)
+        if regressions:
+            print(f"Regresiones ({len(regressions)}):")
+            for key, metric, base, cur in regressions:
+                ratio = f"x{cur / base:.2f}" if base else "antes 0"
+                print(f"  {key:32} {metric:8} {base:.6g} -> {cur:.6g} ({ratio})")
+            return 1
+        print("Sin regresiones frente a la línea base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
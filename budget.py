@@ -0,0 +1,88 @@
+# budget.py
+# Presupuesto de recursos de un análisis: tokens, nodos del árbol, errores
+# reportados y tiempo de reloj.
+#
+#   b = Budget(max_tokens=10**6, max_seconds=5).start()
+#   ts = lexer.TokenStream(lexer.iter_ptoks(src), errors, b)
+#   res = parser_ll1.run_parser(ts)
+#   if b.truncated: ...                  # "tokens" | "nodos" | "errores" | "tiempo"
+#
+# Se consulta en los puntos por donde pasa todo el trabajo: el flujo de
+# tokens (lexer.TokenStream, que corta con '$' al agotarse), la recuperación
+# de errores (recovery.Recovery, que deja de reportar) y los serializadores
+# del árbol (tree.iter_dot...). El reloj y el tamaño de la arena se miran
+# cada CHECK_EVERY tokens/nodos. Al superar un límite el análisis termina
+# con lo que haya y truncated dice cuál fue (el primero que se superó).
+#
+# max_nodes acota la arena del árbol de derivación (modos "parse" y "both").
+# En "none" no se arma árbol y en "ast" el AST (como mucho un nodo por
+# reducción, menos que el árbol de derivación) queda acotado por max_tokens.
+
+import time
+
+DEFAULT_MAX_TOKENS = 20_000_000
+DEFAULT_MAX_NODES = 50_000_000       # la arena ocupa ~16 bytes por nodo
+DEFAULT_MAX_ERRORS = 500
+DEFAULT_MAX_SECONDS = 60.0
+CHECK_EVERY = 1024
+
+LIMIT_NAMES = {"tokens": "tokens", "nodos": "nodos del árbol", "errores": "errores reportados", "tiempo": "tiempo"}
+
+
+class Budget:
+    """Límites de un análisis (None: sin límite) y el motivo del corte, si lo hubo."""
+    __slots__ = ("max_tokens", "max_nodes", "max_errors", "max_seconds", "deadline", "arena", "truncated")
+
+    def __init__(self, max_tokens=DEFAULT_MAX_TOKENS, max_nodes=DEFAULT_MAX_NODES,
+                 max_errors=DEFAULT_MAX_ERRORS, max_seconds=DEFAULT_MAX_SECONDS):
+        self.max_tokens = max_tokens
+        self.max_nodes = max_nodes
+        self.max_errors = max_errors
+        self.max_seconds = max_seconds
+        self.deadline = None
+        self.arena = None       # tree.Arena en construcción (la fija parser_ll1.run_parser)
+        self.truncated = None
+
+    def start(self):
+        """Arranca el reloj (max_seconds desde ahora) y devuelve el propio presupuesto."""
+        if self.max_seconds is not None:
+            self.deadline = time.monotonic() + self.max_seconds
+        return self
+
+    def copy(self):
+        """Mismos límites y mismo plazo, sin estado (p. ej. para cada trozo de parallel.py)."""
+        b = Budget(self.max_tokens, self.max_nodes, self.max_errors, self.max_seconds)
+        b.deadline = self.deadline
+        return b
+
+    def exceed(self, what):
+        if self.truncated is None:
+            self.truncated = what
+        return False
+
+    def check(self):
+        """False si se pasó el tiempo o el tamaño de la arena."""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            return self.exceed("tiempo")
+        if self.max_nodes is not None and self.arena is not None and len(self.arena) > self.max_nodes:
+            return self.exceed("nodos")
+        return True
+
+    def token(self, n):
+        """Cuenta el token n-ésimo; False si ya no se puede seguir."""
+        if self.max_tokens is not None and n > self.max_tokens:
+            return self.exceed("tokens")
+        return self.check() if n % CHECK_EVERY == 0 else True
+
+    def room(self, n_errors):
+        """True si todavía se puede reportar un error más (hay n_errors)."""
+        if self.max_errors is not None and n_errors >= self.max_errors:
+            return self.exceed("errores")
+        return True
+
+    def message(self):
+        if self.truncated is None:
+            return None
+        limit = {"tokens": self.max_tokens, "nodos": self.max_nodes,
+                 "errores": self.max_errors, "tiempo": f"{self.max_seconds:g} s"}[self.truncated]
+        return f"Análisis truncado: se alcanzó el límite de {LIMIT_NAMES[self.truncated]} ({limit})."
@@ -0,0 +1,135 @@
+# explorer.py
+# Explorador del árbol de derivación bajo demanda (GET /api/tree/<clave>).
+#
+#   t = explorer.get(STORE, clave)     # parseo cacheado del fuente guardado
+#   t.node(t.root, depth=2)            # nodo + hijos (+ nietos) como JSON
+#
+# En lugar de mandar el DOT completo a la página, el árbol se parsea una vez
+# por fuente (con la posición de cada terminal, tree.SpanArena) y se guarda
+# en una LRU acotada por bytes; la página pide los nodos a medida que el
+# usuario los expande. Los ids de nodo son índices de la Arena.
+
+import array
+
+import lexer
+import metrics
+import parser_ll1
+import srcmap
+from budget import Budget
+from resultcache import ResultCache
+from tree import NONE, EPS
+
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+MAX_DEPTH = 6          # niveles por petición
+MAX_NODES = 2000       # nodos por respuesta (el resto se pide después)
+
+
+class TreeIndex:
+    """
+    Árbol de una fuente con, por nodo: tamaño del subárbol y span
+    (línea/columna de inicio y de fin, exclusiva) del texto que cubre.
+    Nodos sin texto (ε, terminales insertados) tienen span None.
+    truncated: límite de budget.py que cortó el parseo (None si ninguno) y
+    message su mensaje: el árbol cubre solo lo analizado hasta ahí.
+    """
+    __slots__ = ("arena", "root", "size", "line0", "col0", "line1", "col1", "truncated", "message")
+
+    def __init__(self, arena, root=0, truncated=None, message=None):
+        self.arena = arena
+        self.root = root
+        self.truncated = truncated
+        self.message = message
+        n = len(arena)
+        first, nxt, tok = arena.first, arena.next, arena.tok
+        lex_line, lex_col, lexemes = arena.lex_line, arena.lex_col, arena.lexemes
+        size = array.array('i', [1]) * n
+        l0 = array.array('i', [-1]) * n
+        c0 = array.array('i', [-1]) * n
+        l1 = array.array('i', [-1]) * n
+        c1 = array.array('i', [-1]) * n
+        # Los hijos siempre tienen índice mayor que el padre: basta un recorrido hacia atrás
+        for i in range(n - 1, -1, -1):
+            t = tok[i]
+            if t >= 0:
+                l0[i] = l1[i] = lex_line[t]
+                c0[i] = lex_col[t]
+                c1[i] = lex_col[t] + len(lexemes[t])
+                continue
+            j = first[i]
+            s = 1
+            while j != NONE:
+                s += size[j]
+                if l0[j] >= 0:
+                    if l0[i] < 0:
+                        l0[i], c0[i] = l0[j], c0[j]
+                    l1[i], c1[i] = l1[j], c1[j]
+                j = nxt[j]
+            size[i] = s
+        self.size, self.line0, self.col0, self.line1, self.col1 = size, l0, c0, l1, c1
+
+    def __len__(self):
+        return len(self.arena)
+
+    def nbytes(self):
+        a = self.arena
+        lex = sum(len(x) for x in a.lexemes) + 56 * len(a.lexemes)
+        cols = (self.size, self.line0, self.col0, self.line1, self.col1, a.lex_line, a.lex_col)
+        return a.nbytes() + lex + sum(c.itemsize * len(c) for c in cols)
+
+    def span(self, i):
+        if self.line0[i] < 0:
+            return None
+        return [self.line0[i], self.col0[i], self.line1[i], self.col1[i]]
+
+    def node(self, i, depth=1, budget=MAX_NODES):
+        """
+        Dict JSON del nodo i: id, label, n_children, size, span, y según el
+        caso lex (terminal emparejado), epsilon o children (hasta depth
+        niveles y budget nodos; los demás traen solo n_children).
+        """
+        if not 0 <= i < len(self.arena):
+            raise IndexError(i)
+        a = self.arena
+        out = {}
+        stack = [(i, depth, out)]
+        left = budget
+        while stack:
+            j, d, dst = stack.pop()
+            kids = list(a.children_of(j))
+            dst.update(id=j, label=a.labels[a.label[j]], n_children=len(kids),
+                       size=self.size[j], span=self.span(j))
+            t = a.tok[j]
+            if t >= 0:
+                dst["lex"] = a.lexemes[t]
+            elif t == EPS:
+                dst["epsilon"] = True
+            if kids and d > 0 and left >= len(kids):
+                left -= len(kids)
+                dst["children"] = [{} for _ in kids]
+                for k, child in reversed(list(zip(kids, dst["children"]))):
+                    stack.append((k, d - 1, child))
+        return out
+
+
+def build(source, budget=None):
+    """Parsea source (str o srcmap.MappedSource) y devuelve su TreeIndex (budget: límites de budget.py)."""
+    items = srcmap.iter_ptoks(source) if isinstance(source, srcmap.MappedSource) else lexer.iter_ptoks(source)
+    budget = (budget or Budget()).start()
+    with metrics.phase("explorer_build"):
+        res = parser_ll1.run_parser(lexer.TokenStream(items, budget=budget), tree="parse", spans=True)
+        t = TreeIndex(res.tree.arena, res.tree.i, budget.truncated, budget.message())
+    metrics.count("explorer_build", "nodes", len(t))
+    return t
+
+
+TREES = ResultCache(DEFAULT_MAX_BYTES, sizeof=TreeIndex.nbytes)
+
+
+def get(store, key):
+    """TreeIndex del fuente guardado en store (artifacts.ArtifactStore) con esa clave; KeyError si no existe."""
+    t = TREES.get(key)
+    if t is None:
+        with srcmap.open_mapped(store.source_path(key)) as src:
+            t = build(src)
+        TREES.put(key, t)
+    return t
@@ -1,9 +1,14 @@
 # Gramática LL(1) factorizada (símbolos como strings)
 # No-terminales en MAYÚSCULAS con camel (por conveniencia)
+import hashlib
+import json
+import re
+
 NONTERMS = [
-    'Prog','ClassDecl','MemberList','Member','VarDecl','MethodDecl',
-    'ParamList','ParamRest','Param','Block','StmtList','Stmt','Assign',
-    'Return','Call','ArgList','ArgRest','Expr','ExprP','Term','TermP','Factor','Type'
+    'Prog','ClassList','ClassDecl','MemberList','Member','MemberRest','VarDecl','MethodDecl',
+    'ParamList','ParamRest','Param','Block','StmtList','Stmt','StmtRest','Assign',
+    'Return','RetExpr','Call','ArgList','ArgRest','Expr','ExprP','Term','TermP',
+    'Factor','CallOpt','Type'
 ]
 
 TERMS = [
@@ -15,28 +20,33 @@ START = 'Prog'
 
 # Producciones (lado izquierdo -> lista de alternativas; ε como [])
 G = {
-    'Prog'      : [['ClassDecl']],
+    'Prog'      : [['ClassDecl','ClassList']],
+    'ClassList' : [['ClassDecl','ClassList'], []],
     'ClassDecl' : [['class','id','{','MemberList','}']],
     'MemberList': [['Member','MemberList'], []],
-    'Member'    : [['MethodDecl'], ['VarDecl']],
+    'Member'    : [['Type','id','MemberRest']],
+    'MemberRest': [[';'], ['MethodDecl']],
     'VarDecl'   : [['Type','id',';']],
-    'MethodDecl': [['Type','id','(','ParamList',')','Block']],
+    'MethodDecl': [['(','ParamList',')','Block']],
     'ParamList' : [['Param','ParamRest'], []],
     'ParamRest' : [[',','Param','ParamRest'], []],
     'Param'     : [['Type','id']],
     'Block'     : [['{','StmtList','}']],
     'StmtList'  : [['Stmt','StmtList'], []],
-    'Stmt'      : [['VarDecl'], ['Assign'], ['Return'], ['Call',';']],
-    'Assign'    : [['id','=','Expr',';']],
-    'Return'    : [['return','Expr',';']],
-    'Call'      : [['id','(','ArgList',')']],
+    'Stmt'      : [['VarDecl'], ['id','StmtRest'], ['Return']],
+    'StmtRest'  : [['Assign'], ['Call',';']],
+    'Assign'    : [['=','Expr',';']],
+    'Return'    : [['return','RetExpr',';']],              # 'return;' en métodos void
+    'RetExpr'   : [['Expr'], []],
+    'Call'      : [['(','ArgList',')']],
     'ArgList'   : [['Expr','ArgRest'], []],
     'ArgRest'   : [[',','Expr','ArgRest'], []],
     'Expr'      : [['Term','ExprP']],
     'ExprP'     : [['+','Term','ExprP'], ['-','Term','ExprP'], []],
     'Term'      : [['Factor','TermP']],
     'TermP'     : [['*','Factor','TermP'], ['/','Factor','TermP'], []],
-    'Factor'    : [['id'], ['number'], ['(','Expr',')']],
+    'Factor'    : [['id','CallOpt'], ['number'], ['(','Expr',')']],  # llamadas dentro de expresiones
+    'CallOpt'   : [['Call'], []],
     'Type'      : [['int'], ['void']],
 }
 
@@ -46,3 +56,168 @@ TOK_TO_TERM = {
     'COMMA':',','SEMI':';','ASSIGN':'=','RETURN':'return','PLUS':'+','MINUS':'-','MUL':'*',
     'DIV':'/','INT':'int','VOID':'void','LT':'<','GT':'>','EQEQ':'=='
 }
+
+
+# --------------------------------------------
+# Gramáticas como objetos (y cargadas desde archivos BNF)
+# --------------------------------------------
+class GrammarError(ValueError):
+    pass
+
+
+class Grammar:
+    """
+    Gramática independiente de los globales del módulo:
+      prods        {no-terminal: [[símbolos...], ...]} (ε como [])
+      start        símbolo inicial
+      terms        terminales en orden (fija sus ids, ver ll1.densify)
+      nonterms     no-terminales en orden
+      tok_to_term  nombre de token del lexer -> terminal (opcional)
+    No se modifica después de construida (la huella se calcula una vez).
+    """
+    __slots__ = ("prods", "start", "terms", "nonterms", "tok_to_term", "_fp")
+
+    def __init__(self, prods, start=None, terms=None, nonterms=None, tok_to_term=None):
+        self.prods = prods
+        self.nonterms = list(nonterms) if nonterms is not None else list(prods)
+        self.start = start or self.nonterms[0]
+        if terms is None:
+            seen = {}
+            for alts in prods.values():
+                for rhs in alts:
+                    for s in rhs:
+                        if s not in prods:
+                            seen.setdefault(s, None)
+            terms = list(seen)
+        self.terms = list(terms)
+        self.tok_to_term = dict(tok_to_term or {})
+        self._fp = None
+
+    # compatibilidad con el dict G de siempre
+    def __getitem__(self, A):
+        return self.prods[A]
+
+    def __contains__(self, A):
+        return A in self.prods
+
+    def __iter__(self):
+        return iter(self.prods)
+
+    def items(self):
+        return self.prods.items()
+
+    def fingerprint(self):
+        """Hash estable de producciones/terminales/no-terminales/inicio."""
+        if self._fp is None:
+            blob = json.dumps([self.prods, self.terms, self.nonterms, self.start], sort_keys=True, ensure_ascii=False)
+            self._fp = hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+        return self._fp
+
+    def n_productions(self):
+        return sum(len(alts) for alts in self.prods.values())
+
+    def to_bnf(self):
+        """Texto en el formato de parse_bnf() (ida y vuelta)."""
+        q = lambda s: f"'{s}'" if s in ("|", "->", "ε") or s.startswith(("%", "#", "'")) else s
+        lines = [f"%start {self.start}", "%terms " + " ".join(q(t) for t in self.terms)]
+        width = max(map(len, self.nonterms), default=0)
+        for A in self.nonterms:
+            alts = " | ".join(" ".join(q(s) for s in rhs) if rhs else "ε" for rhs in self.prods.get(A, []))
+            lines.append(f"{A:{width}} -> {alts}")
+        for tok, term in self.tok_to_term.items():
+            lines.append(f"%token {tok} {q(term)}")
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self):
+        return f"Grammar({self.start!r}, {len(self.nonterms)} no-terminales, {self.n_productions()} producciones)"
+
+
+_BNF_SYM = re.compile(r"'([^']*)'|(\S+)")
+
+
+def parse_bnf(text, name="<bnf>"):
+    """
+    Gramática desde texto BNF:
+        # comentario
+        %start Prog                  (opcional: si no, el primer no-terminal)
+        %terms class id number ...   (opcional: fija el orden de terminales)
+        %token CLASS class           (opcional: token del lexer -> terminal)
+        Prog       -> ClassDecl
+        MemberList -> Member MemberList | ε
+                    | otra alternativa      (continuación con '|')
+    Los símbolos se separan con espacios; entre comillas simples se
+    escriben terminales como '|' o '->'. Son no-terminales los que aparecen
+    a la izquierda de '->'; el resto, terminales.
+    """
+    prods, start, terms, tok_to_term = {}, None, None, {}
+    order = []
+    current = None
+    for n, raw in enumerate(text.splitlines(), 1):
+        toks = []  # (símbolo, entre_comillas)
+        for m in _BNF_SYM.finditer(raw):
+            if m.group(1) is not None:
+                toks.append((m.group(1), True))
+            elif m.group(2).startswith("#"):
+                break  # comentario hasta fin de línea
+            else:
+                toks.append((m.group(2), False))
+        if not toks:
+            continue
+        line = raw.strip()
+        head, quoted = toks[0]
+        if head.startswith("%") and not quoted:
+            args = [t for t, _q in toks[1:]]
+            if head == "%start" and len(args) == 1:
+                start = args[0]
+            elif head == "%terms":
+                terms = args
+            elif head == "%token" and len(args) == 2:
+                tok_to_term[args[0]] = args[1]
+            else:
+                raise GrammarError(f"{name} L{n}: directiva inválida '{line}'")
+            continue
+        if len(toks) >= 2 and toks[1] == ("->", False):
+            current = head
+            if current not in prods:
+                prods[current] = []
+                order.append(current)
+            body = toks[2:]
+        elif head == "|" and not quoted and current is not None:
+            body = toks[1:]
+        else:
+            raise GrammarError(f"{name} L{n}: se esperaba 'A -> ...' o '| ...' y llegó '{line}'")
+        alt = []
+        for sym, q in body + [("|", False)]:
+            if sym == "|" and not q:
+                prods[current].append(alt)
+                alt = []
+            elif sym == "ε" and not q:
+                continue
+            elif sym == "->" and not q:
+                raise GrammarError(f"{name} L{n}: '->' repetido (usa '->' entre comillas para el terminal)")
+            else:
+                alt.append(sym)
+    if not prods:
+        raise GrammarError(f"{name}: la gramática no tiene producciones")
+    if start is not None and start not in prods:
+        raise GrammarError(f"{name}: el símbolo inicial '{start}' no tiene producciones")
+    if terms is not None:
+        missing = sorted({s for alts in prods.values() for rhs in alts for s in rhs
+                          if s not in prods and s not in terms})
+        if missing:
+            raise GrammarError(f"{name}: símbolos sin producciones ni declarados en %terms: {', '.join(missing)}")
+    return Grammar(prods, start, terms, order, tok_to_term)
+
+
+def load_grammar(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_bnf(f.read(), path)
+
+
+# La gramática de arriba como objeto (la que usan por defecto ll1/parser_ll1)
+DEFAULT = Grammar(G, START, TERMS, NONTERMS, TOK_TO_TERM)
+
+
+if __name__ == "__main__":
+    # python grammar.py > gramatica.bnf   (punto de partida para variantes)
+    print(DEFAULT.to_bnf(), end="")
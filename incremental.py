@@ -0,0 +1,314 @@
+# incremental.py
+# Análisis incremental para el editor web.
+#
+#   s = Session(fuente)
+#   s.apply_edit(offset, borrados, insertado)   # re-lexea/re-parsea solo lo dañado
+#   s.tree, s.errors, s.tokens
+#
+# Los tokens viven en un tokbuf.TokenBuffer. Tras una edición se re-lexea
+# desde el token anterior a la edición hasta que el lexer vuelve a caer en el
+# inicio de un token viejo (desplazado): desde ahí el resto es idéntico.
+#
+# El parseo va por tramos sobre una sola tree.Arena. Tras 'class id {' la pila
+# del parseo completo es MemberList } ClassList $; cada vez que vuelve a quedar
+# así al terminar un miembro, sin errores recientes (la regla de los 3 tokens
+# de recovery ya no alcanza lo que sigue), el resto del parseo no depende de
+# lo anterior y ahí se corta un tramo: normalmente un miembro, o los que la
+# recuperación de un error haya unido. Tras una edición se re-parsean solo los
+# tramos que tocan la zona re-lexeada, hasta volver a cortar donde empezaba un
+# tramo viejo; el resto conserva subárbol y errores (desplazados). Árbol y
+# errores son siempre los del parseo completo; si entre todos los tramos se
+# llega al presupuesto de errores de recovery, salen de parsear todo.
+
+import re
+from array import array
+from bisect import bisect_left
+
+import ll1
+import parser_ll1
+from lexer import TokenStream
+from recovery import Recovery, DEFAULT_MAX_ERRORS
+from scanner import scan, error_message, ERROR
+from tokbuf import TokenBuffer, TERM_ID
+from tree import Arena
+
+K_CLASS, K_ID, K_LBRACE = (TERM_ID[t] for t in ("class", "id", "{"))
+K_DIV = TERM_ID["/"]
+FIRST_MEMBER = 3  # class id { ...
+TAIL = ["$", "ClassList", "}", "MemberList"]  # pila del parseo completo en un corte
+SLACK = 4096  # nodos muertos tolerados en la Arena (además de los vivos) antes de rehacerla
+
+_POS_RE = re.compile(r"L(\d+)(,? )C(\d+)")
+
+
+def shift_positions(msg, line0, dline, dcol):
+    """Desplaza las posiciones 'L<n> C<m>' / '(L<n>, C<m>)' de un mensaje."""
+    def sub(m):
+        line, col = int(m.group(1)), int(m.group(3))
+        if line == line0:
+            col += dcol
+        return f"L{line + dline}{m.group(2)}C{col}"
+    return _POS_RE.sub(sub, msg)
+
+
+class Span:
+    """
+    Tramo de miembros: tokens [lo, hi) (hi None en el último, que llega hasta
+    '$'), su nodo MemberList (root), el MemberList pendiente al cortar (open),
+    errores en orden, cuántos cuentan para el presupuesto (count) y nodos de
+    Arena que ocupa (size). El último guarda los nodos '}' y ClassList (tail).
+    """
+    __slots__ = ("lo", "hi", "root", "open", "tail", "errors", "count", "size")
+
+    def __init__(self, lo, root, errors, count):
+        self.lo = lo
+        self.hi = None
+        self.root = root
+        self.open = None
+        self.tail = None
+        self.errors = errors
+        self.count = count
+        self.size = 0
+
+
+def is_open(code, src, s):
+    """
+    '"' sin cerrar o '/*' sin cerrar: el lexer miró hasta el final del fuente
+    para decidirlo, así que cualquier edición posterior puede cambiarlos.
+    """
+    return (code == ERROR and src[s] == '"') or (code == K_DIV and src[s + 1:s + 2] == "*")
+
+
+class Session:
+    """Sesión de análisis de un fuente que se va editando."""
+
+    def __init__(self, source):
+        self.source = source
+        self.tokens = buf = TokenBuffer(source)
+        self.open = []  # offsets de '"' / '/*' sin cerrar (ver is_open)
+        for code, s, e, ln, cl in scan(source):
+            if code >= 0:
+                buf.append(code, s, e - s, ln, cl)
+            else:
+                buf.error(error_message(code, source[s:e], ln, cl))
+            if code in (ERROR, K_DIV) and is_open(code, source, s):
+                self.open.append(s)
+        self.spans = None
+        self.arena = None
+        self.prefix = None  # nodos Prog, ClassDecl y '{'
+        self.tree = None
+        self.errors = []
+        self.last_edit = None
+        self._parse_all()
+
+    # ---------------- parseo ----------------
+    def _parse_all(self):
+        """Parsea todo de nuevo; devuelve cuántos tramos parseó (1 sin tramos)."""
+        buf = self.tokens
+        kinds = buf.kind
+        self.spans = None
+        if len(kinds) <= FIRST_MEMBER or kinds[0] != K_CLASS or kinds[1] != K_ID or kinds[2] != K_LBRACE:
+            # Forma no reconocida: parseo completo sin reutilización
+            self._parse_whole()
+            return 1
+        self.arena = arena = Arena(ll1.get_compiled().dense.names)
+        prog, decl = arena.add("Prog"), arena.add("ClassDecl")
+        arena.first[prog] = decl
+        kids = arena.expand(decl, ["class", "id", "{"])
+        for i, j in enumerate(kids):
+            arena.leaf(j, buf.lexeme(i))
+        self.prefix = (prog, decl, kids[-1])
+        spans, _ = self._parse_spans(FIRST_MEMBER)
+        if spans is None:
+            self._parse_whole()
+            return 1
+        self.spans = spans
+        self._assemble()
+        return len(spans)
+
+    def _parse_spans(self, lo, stop=None):
+        """
+        Parsea tramos desde el token lo (donde empieza un tramo) hasta '$' o
+        hasta un corte en la posición p con stop(p) verdadero. Devuelve
+        (tramos, p), p None si llegó al final; (None, None) si un tramo agotó
+        el presupuesto de errores.
+        """
+        arena = self.arena
+        compiled = ll1.get_compiled()
+        ts = TokenStream(self.tokens.stream(lo))
+        ts.pos = lo
+        mark = len(arena)
+        syms = list(TAIL)
+        nodes = [-1, arena.add("ClassList"), arena.add("}"), arena.add("MemberList")]
+        tail = (nodes[2], nodes[1])
+        spans = []
+        while True:
+            if spans:
+                # Raíz propia: el MemberList pendiente del tramo anterior toma
+                # sus hijos al ensamblar (ver _assemble)
+                nodes[-1] = arena.add("MemberList")
+            start, root = ts.pos, nodes[-1]
+            errors = ts.errors = []
+            rec = Recovery(compiled, errors)
+            # Corte: MemberList de esta clase (no de una clase siguiente, que
+            # deja la misma pila con otros nodos) y sin errores recientes
+            cut = parser_ll1.parse_until(
+                ts, syms, nodes, arena, rec, "MemberList",
+                lambda pos, depth: depth == 3 and nodes[2] == tail[0] and pos > start and rec.quiet_until <= pos)
+            if rec.stopped:
+                return None, None
+            span = Span(start, root, errors, rec.count)
+            spans.append(span)
+            if not cut:
+                ts.drain()
+                span.tail = tail
+                span.size = len(arena) - mark
+                return spans, None
+            span.hi, span.open = ts.pos, nodes[-1]
+            span.size = len(arena) - mark
+            mark = len(arena)
+            if stop is not None and stop(ts.pos):
+                return spans, ts.pos
+
+    def _parse_whole(self):
+        errors = []
+        self.tree, _ = parser_ll1.parse(TokenStream(self.tokens.stream(), errors))
+        self.errors = errors
+
+    def _assemble(self):
+        """
+        Enlaza los tramos en un árbol (el MemberList pendiente de cada uno toma
+        los hijos del MemberList del siguiente) y junta los errores. Devuelve
+        False si hubo que parsear todo (presupuesto de errores alcanzado).
+        """
+        spans = self.spans
+        if sum(s.count for s in spans) >= DEFAULT_MAX_ERRORS:
+            # El parseo completo se detiene en medio: árbol y errores salen de
+            # él; los tramos se conservan para la próxima edición
+            self._parse_whole()
+            return False
+        arena = self.arena
+        first, nxt, tok = arena.first, arena.next, arena.tok
+        # De atrás hacia adelante: si un tramo cortó sin expandir su raíz
+        # (open es root), esta ya tiene los hijos del siguiente al copiarla
+        for j in range(len(spans) - 2, -1, -1):
+            s, t = spans[j], spans[j + 1]
+            first[s.open] = first[t.root]
+            tok[s.open] = tok[t.root]
+        prog, decl, lbrace = self.prefix
+        rbrace, classes = spans[-1].tail
+        nxt[lbrace] = spans[0].root
+        nxt[spans[0].root] = rbrace
+        nxt[decl] = classes
+        self.tree = arena.view(prog)
+        # Errores léxicos de 'class id {' y luego los de cada tramo
+        self.errors = [msg for i, msg in self.tokens.errors if i <= FIRST_MEMBER]
+        for s in spans:
+            self.errors += s.errors
+        return True
+
+    # ---------------- edición ----------------
+    def apply_edit(self, offset, deleted, inserted):
+        """
+        Aplica una edición (offset, largo borrado, texto insertado) y actualiza
+        tokens, árbol y errores. Devuelve estadísticas del trabajo hecho.
+        """
+        src, old = self.source, self.tokens
+        if not (0 <= offset <= len(src)) or deleted < 0 or offset + deleted > len(src):
+            raise ValueError(f"Edición fuera de rango: offset={offset}, borrados={deleted}")
+        new_src = src[:offset] + inserted + src[offset + deleted:]
+        delta = len(inserted) - deleted
+        starts = old.start
+
+        # 1) Re-lexear desde el token anterior a la edición (o a un '"'/'/*'
+        #    abierto anterior, que miró hasta el final) hasta resincronizar
+        first = offset
+        if self.open and self.open[0] < offset:
+            first = self.open[0]
+        r = max(bisect_left(starts, first) - 1, 0)
+        pos, line, col = (0, 1, 1) if r == 0 else (starts[r], old.line[r], old.col[r])
+        edit_end = offset + len(inserted)
+        k = bisect_left(starts, offset + deleted)
+        new_toks, new_errs, new_open = [], [], []
+        for code, s, e, ln, cl in scan(new_src, pos, line, col):
+            if code >= 0 and s >= edit_end:
+                while starts[k] + delta < s:
+                    k += 1
+                if starts[k] + delta == s:
+                    sync = (ln, cl)
+                    break
+            if code in (ERROR, K_DIV) and is_open(code, new_src, s):
+                new_open.append(s)
+            if code < 0:
+                new_errs.append((len(new_toks), error_message(code, new_src[s:e], ln, cl)))
+                continue
+            new_toks.append((code, s, e - s, ln, cl))
+
+        # 2) Empalmar el buffer: viejo[:r] + nuevos + viejo[k:] desplazado
+        shift = r + len(new_toks) - k
+        dline, dcol = sync[0] - old.line[k], sync[1] - old.col[k]
+        line_k = old.line[k]
+        buf = TokenBuffer(new_src)
+        buf.kind = old.kind[:r] + array("i", (t[0] for t in new_toks)) + old.kind[k:]
+        buf.start = old.start[:r] + array("i", (t[1] for t in new_toks)) + (
+            array("i", (x + delta for x in old.start[k:])) if delta else old.start[k:])
+        buf.length = old.length[:r] + array("i", (t[2] for t in new_toks)) + old.length[k:]
+        buf.line = old.line[:r] + array("i", (t[3] for t in new_toks)) + (
+            array("i", (x + dline for x in old.line[k:])) if dline else old.line[k:])
+        cols = old.col[k:]
+        if dcol:
+            t = 0
+            while t < len(cols) and old.line[k + t] == line_k:  # solo la línea del punto de sync
+                cols[t] += dcol
+                t += 1
+        buf.col = old.col[:r] + array("i", (t[4] for t in new_toks)) + cols
+        # Errores que preceden al token r (antes de pos) se conservan; los de
+        # (r, k] estaban en la zona re-lexeada; los posteriores se desplazan
+        buf.errors = [e for e in old.errors if r > 0 and e[0] <= r]
+        buf.errors += [(r + i, msg) for i, msg in new_errs]
+        moved = lambda msg: shift_positions(msg, line_k, dline, dcol) if (dline or dcol) else msg
+        buf.errors += [(i + shift, moved(msg)) for i, msg in old.errors if i > k]
+        sync_old = starts[k]
+        self.open = ([p for p in self.open if p < pos] + new_open +
+                     [p + delta for p in self.open if p >= sync_old])
+        self.source, self.tokens = new_src, buf
+
+        stats = {"relexed": len(new_toks), "reparsed": 0, "reused": 0, "full": False}
+        self.last_edit = stats
+
+        # 3) Re-parsear solo los tramos dañados
+        spans = self.spans
+        if spans is None or r < FIRST_MEMBER:
+            return self._reparse_all(stats)
+        a = 0
+        while spans[a].hi is not None and spans[a].hi < r:  # el token hi también se miró
+            a += 1
+        # Tramos viejos más allá de la zona re-lexeada, por token de inicio
+        old_starts = {s.lo: b for b, s in enumerate(spans) if s.lo >= k}
+        fresh, at = self._parse_spans(spans[a].lo, stop=lambda p: (p - shift) in old_starts)
+        if fresh is None:
+            return self._reparse_all(stats)
+        tail = spans[old_starts[at - shift]:] if at is not None else []
+        for s in tail:
+            s.lo += shift
+            if s.hi is not None:
+                s.hi += shift
+            if dline or dcol:
+                s.errors = [moved(msg) for msg in s.errors]
+        self.spans = spans = spans[:a] + fresh + tail
+        stats["reparsed"] = len(fresh)
+        stats["reused"] = a + len(tail)
+        if len(self.arena) > 2 * sum(s.size for s in spans) + SLACK:
+            # Demasiados nodos de tramos descartados: rehacer la Arena
+            return self._reparse_all(stats)
+        if not self._assemble():
+            stats["full"] = True
+            stats["reparsed"] += stats["reused"]
+            stats["reused"] = 0
+        return stats
+
+    def _reparse_all(self, stats):
+        stats["full"] = True
+        stats["reparsed"] = self._parse_all()
+        stats["reused"] = 0
+        return stats
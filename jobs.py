@@ -0,0 +1,137 @@
+# jobs.py
+# Cola de análisis en segundo plano (app.py: /api/jobs y los envíos grandes
+# del formulario).
+#
+#   job = JOBS.submit(STORE.source_path(key), key, "ast")   # QueueFull si está llena
+#   JOBS.get(job.id).status                                  # "pending" | "done" | "failed"
+#
+# Los análisis corren en un pool de procesos acotado (el hilo de Flask solo
+# encola y responde con el id del trabajo). El worker recibe la ruta del
+# fuente ya guardado en el ArtifactStore y lo analiza mapeado
+# (analyzer.analyze_path), así que el fuente no viaja por pickle; el
+# resultado (sin árboles) queda también en la caché de resultados en disco.
+# Con max_pending trabajos sin terminar, submit() rechaza (backpressure: la
+# app responde 429). Las métricas de fase de los workers no llegan a
+# /metrics; la cola publica las suyas (pendientes, rechazos, duración).
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import analyzer
+import metrics
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_MAX_PENDING = 16      # trabajos en cola o en curso
+KEEP_FINISHED = 256           # terminados que se conservan para consultarlos
+TASKS_PER_CHILD = 64          # reciclar workers (fuentes patológicos)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    """Un análisis encolado: status, y al terminar result (dict de analyze) o error."""
+    __slots__ = ("id", "key", "tree_mode", "status", "result", "error", "submitted", "finished")
+
+    def __init__(self, key, tree_mode):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.tree_mode = tree_mode
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+
+    def info(self):
+        """Estado serializable a JSON (sin el resultado)."""
+        out = {"id": self.id, "key": self.key, "status": self.status, "tree_mode": self.tree_mode,
+               "elapsed": round((self.finished or time.time()) - self.submitted, 3)}
+        if self.error is not None:
+            out["error"] = self.error
+        return out
+
+
+def _run(path, tree_mode):
+    return analyzer.analyze_path(path, tree_mode)
+
+
+class JobQueue:
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=DEFAULT_MAX_PENDING, keep=KEEP_FINISHED):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep = keep
+        self._jobs = OrderedDict()   # id -> Job (terminados en orden de fin)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self.rejected = 0
+        self.failed = 0
+        metrics.REGISTRY.add_collector(self._metrics)
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.workers, maxtasksperchild=TASKS_PER_CHILD)
+            atexit.register(self._pool.terminate)
+        return self._pool
+
+    def submit(self, path, key, tree_mode="both"):
+        """Encola el análisis del fuente en path; QueueFull si ya hay max_pending sin terminar."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"Cola de análisis llena ({self._pending} trabajos pendientes)")
+            job = Job(key, tree_mode)
+            self._jobs[job.id] = job
+            self._pending += 1
+            pool = self._get_pool()
+        pool.apply_async(_run, (path, tree_mode),
+                         callback=lambda res: self._finish(job, res, None),
+                         error_callback=lambda exc: self._finish(job, None, exc))
+        return job
+
+    def _finish(self, job, result, exc):
+        # Hilo de resultados del pool
+        with self._lock:
+            job.finished = time.time()
+            if exc is None:
+                job.result, job.status = result, "done"
+            else:
+                job.error, job.status = f"{type(exc).__name__}: {exc}", "failed"
+                self.failed += 1
+            self._pending -= 1
+            self._jobs.move_to_end(job.id)
+            done = len(self._jobs) - self._pending
+            for jid in list(self._jobs):
+                if done <= self.keep:
+                    break
+                if self._jobs[jid].status != "pending":
+                    del self._jobs[jid]
+                    done -= 1
+        metrics.REGISTRY.observe("job", job.finished - job.submitted)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def _metrics(self):
+        return [
+            ("jobs_pending", "gauge", "Análisis en cola o en curso.", self._pending),
+            ("jobs_rejected_total", "counter", "Envíos rechazados por cola llena (429).", self.rejected),
+            ("jobs_failed_total", "counter", "Análisis en segundo plano que fallaron.", self.failed),
+        ]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
@@ -2,8 +2,12 @@
 # Módulo compatible con app.py
 # Expone: class Lexer(text) con .tokenize_all() y .errors[]
 
+import os
 import re
 from collections import namedtuple
+from itertools import chain
+
+from budget import CHECK_EVERY
 
 Token = namedtuple("Token", ["typ", "lexeme", "line", "col"])
 
@@ -12,52 +16,132 @@ class TokenType:
         self.name = name
 
 
+# Una sola instancia de TokenType por nombre (no una por token)
+_TOKEN_TYPES = {}
+
+def token_type(name):
+    tt = _TOKEN_TYPES.get(name)
+    if tt is None:
+        tt = _TOKEN_TYPES[name] = TokenType(name)
+    return tt
+
+
+# Lexemas de SYMBOL/OP -> nombres esperados por grammar.TOK_TO_TERM
+SYMBOL_NAMES = {
+    "{": "LBRACE",
+    "}": "RBRACE",
+    "(": "LPAR",
+    ")": "RPAR",
+    ",": "COMMA",
+    ";": "SEMI",
+}
+
+OP_NAMES = {
+    "=": "ASSIGN",
+    "+": "PLUS",
+    "-": "MINUS",
+    "*": "MUL",
+    "/": "DIV",
+    "<": "LT",
+    ">": "GT",
+    "==": "EQEQ",
+}
+
+
+# Palabras reservadas típicas de Java
+RESERVED = {
+    "class": "CLASS",
+    "int": "INT",
+    "float": "FLOAT",
+    "char": "CHAR",
+    "void": "VOID",
+    "return": "RETURN",
+    "if": "IF",
+    "else": "ELSE",
+    "while": "WHILE",
+    "for": "FOR",
+    "true": "TRUE",
+    "false": "FALSE",
+    "System": "SYSTEM",
+    "out": "OUT",
+    "println": "PRINTLN",
+}
+
+# Expresiones regulares para tokens
+TOKEN_EXPRS = [
+    ("WS",        r"[ \t]+"),                        # espacios
+    ("NEWLINE",   r"\n"),                            # salto de línea
+    ("COMMENT1",  r"//[^\n]*"),                      # comentario //
+    ("COMMENT2",  r"/\*[\s\S]*?\*/"),                # comentario /* ... */
+    ("STRING",    r"\"(\\.|[^\"\\])*\""),            # literal de cadena
+    ("NUM",       r"[0-9]+"),                        # números (solo ASCII, igual en bytes)
+    ("ID",        r"[A-Za-z_][A-Za-z_0-9]*"),        # identificadores
+    ("OP",        r"==|!=|<=|>=|\+\+|--|&&|\|\||[+\-*/=<>&|!]"),  # operadores
+    ("SYMBOL",    r"[(){};,\.]"),                    # símbolos (incluye punto)
+    # Cualquier otro: una corrida de caracteres que no pueden iniciar ningún
+    # token es un solo error (un '"' sin cerrar va aparte)
+    ("ERROR",     r"[^ \t\n0-9A-Za-z_/\"*+\-=<>&|!(){};,.]+|."),
+]
+
+# Expresión regular maestra (compilada una sola vez por proceso)
+MASTER = re.compile(
+    "|".join(f"(?P<{name}>{expr})" for name, expr in TOKEN_EXPRS),
+    re.MULTILINE | re.DOTALL
+)
+
+# La misma expresión sobre bytes (srcmap.py, archivos mapeados en memoria);
+# ERROR toma secuencias UTF-8 completas para reportar caracteres enteros
+MASTER_BYTES = re.compile(
+    b"|".join(f"(?P<{name}>{expr})".encode() for name, expr in TOKEN_EXPRS if name != "ERROR")
+    + rb'|(?P<ERROR>(?:[\xc0-\xff][\x80-\xbf]*|[^ \t\n0-9A-Za-z_/"*+\-=<>&|!(){};,.\xc0-\xff])+|.)',
+    re.MULTILINE | re.DOTALL
+)
+
+MAX_ERROR_LEX = 20  # caracteres de una corrida errónea que se citan en el mensaje
+
+
+def error_text(lex, line, col):
+    """Mensaje de un error léxico ERROR; una corrida de varios caracteres va en uno solo."""
+    if len(lex) == 1:
+        return f"Símbolo no reconocido '{lex}' (L{line}, C{col})"
+    shown = lex if len(lex) <= MAX_ERROR_LEX else lex[:MAX_ERROR_LEX] + "…"
+    return f"Símbolos no reconocidos '{shown}' (L{line}, C{col}; {len(lex)} caracteres)"
+
+ENGINES = ("regex", "dfa")
+# Motor por defecto: el scanner de tabla (mismos tokens y errores, 1.1-1.9x
+# más rápido); LL1_LEXER=regex vuelve a la expresión maestra
+DEFAULT_ENGINE = os.environ.get("LL1_LEXER", "dfa")
+
+
+def _after(lex, line, col):
+    """Posición tras un lexema que puede abarcar líneas (comentario /* */, cadena)."""
+    nl = lex.count("\n")
+    if not nl:
+        return line, col + len(lex)
+    return line + nl, len(lex) - lex.rfind("\n")
+
+
 # --------------------------------------------
 # Clase principal Lexer
 # --------------------------------------------
 class Lexer:
-    def __init__(self, source_text):
+    """
+    engine="dfa":   scanner.py, tabla de clases de carácter que emite
+                    directamente los terminales de la gramática (por defecto,
+                    ver DEFAULT_ENGINE).
+    engine="regex": expresión regular maestra.
+    """
+
+    def __init__(self, source_text, engine=None):
+        engine = engine or DEFAULT_ENGINE
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de lexer desconocido: {engine!r} (opciones: {', '.join(ENGINES)})")
         self.source = source_text
         self.errors = []
-
-        # Palabras reservadas típicas de Java
-        self.reserved = {
-            "class": "CLASS",
-            "int": "INT",
-            "float": "FLOAT",
-            "char": "CHAR",
-            "void": "VOID",
-            "return": "RETURN",
-            "if": "IF",
-            "else": "ELSE",
-            "while": "WHILE",
-            "for": "FOR",
-            "true": "TRUE",
-            "false": "FALSE",
-            "System": "SYSTEM",
-            "out": "OUT",
-            "println": "PRINTLN",
-        }
-
-        # Expresiones regulares para tokens
-        self.token_exprs = [
-            ("WS",        r"[ \t]+"),                        # espacios
-            ("NEWLINE",   r"\n"),                            # salto de línea
-            ("COMMENT1",  r"//[^\n]*"),                      # comentario //
-            ("COMMENT2",  r"/\*[\s\S]*?\*/"),                # comentario /* ... */
-            ("STRING",    r"\"(\\.|[^\"\\])*\""),            # literal de cadena
-            ("NUM",       r"\d+"),                           # números
-            ("ID",        r"[A-Za-z_][A-Za-z_0-9]*"),        # identificadores
-            ("OP",        r"==|!=|<=|>=|\+\+|--|&&|\|\||[+\-*/=<>&|!]"),  # operadores
-            ("SYMBOL",    r"[(){};,\.]"),                    # símbolos (incluye punto)
-            ("ERROR",     r"."),                             # cualquier otro (error)
-        ]
-
-        # Expresión regular maestra con flags para evitar falsos espacios
-        self.master = re.compile(
-            "|".join(f"(?P<{name}>{expr})" for name, expr in self.token_exprs),
-            re.MULTILINE | re.DOTALL
-        )
+        self.engine = engine
+        self.reserved = RESERVED
+        self.token_exprs = TOKEN_EXPRS
+        self.master = MASTER
 
     # ----------------------------------------
     # Mapeo de tipos de tokens a los nombres esperados por grammar.py
@@ -65,44 +149,35 @@ class Lexer:
     def map_token_name(self, kind, lex):
         """Convierte los tipos del lexer a los usados en grammar.TOK_TO_TERM."""
         if kind == "SYMBOL":
-            return {
-                "{": "LBRACE", 
-                "}": "RBRACE", 
-                "(": "LPAR", 
-                ")": "RPAR",
-                ",": "COMMA", 
-                ";": "SEMI"
-            }.get(lex, "SYMBOL")
+            return SYMBOL_NAMES.get(lex, "SYMBOL")
 
         if kind == "OP":
-            return {
-                "=": "ASSIGN", 
-                "+": "PLUS", 
-                "-": "MINUS", 
-                "*": "MUL", 
-                "/": "DIV",
-                "<": "LT", 
-                ">": "GT", 
-                "==": "EQEQ"
-            }.get(lex, "OP")
+            return OP_NAMES.get(lex, "OP")
 
         return kind
 
     # ----------------------------------------
-    # Tokenización completa
+    # Tokenización perezosa (generador) y completa
     # ----------------------------------------
-    def tokenize_all(self):
-        tokens = []
+    def iter_tokens(self):
+        """Genera los Token uno a uno; los errores se agregan a self.errors al vuelo."""
+        if self.engine == "dfa":
+            yield from self._iter_tokens_dfa()
+            return
         line, col = 1, 1
         for match in self.master.finditer(self.source):
             kind = match.lastgroup
             lex = match.group()
 
             # Ignorar espacios y comentarios
-            if kind in ("WS", "COMMENT1", "COMMENT2"):
+            if kind in ("WS", "COMMENT1"):
                 col += len(lex)
                 continue
 
+            if kind == "COMMENT2":
+                line, col = _after(lex, line, col)
+                continue
+
             if kind == "NEWLINE":
                 line += 1
                 col = 1
@@ -112,16 +187,97 @@ class Lexer:
                 kind = self.reserved.get(lex, "ID")
 
             if kind == "ERROR":
-                self.errors.append(f"Símbolo no reconocido '{lex}' (L{line}, C{col})")
+                self.errors.append(error_text(lex, line, col))
 
             # Mapear nombres a los que espera grammar.py
             mapped_kind = self.map_token_name(kind, lex)
-            tokens.append(Token(TokenType(mapped_kind), lex, line, col))
-            col += len(lex)
+            yield Token(token_type(mapped_kind), lex, line, col)
+            if kind == "STRING":
+                line, col = _after(lex, line, col)
+            else:
+                col += len(lex)
 
         # Token EOF final
-        tokens.append(Token(TokenType("EOF"), "", line, col))
-        return tokens
+        yield Token(token_type("EOF"), "", line, col)
+
+    def _iter_tokens_dfa(self):
+        from scanner import scan, CODE_NAME, ERROR
+        src = self.source
+        for code, start, end, line, col in scan(src):
+            lex = src[start:end]
+            if code == ERROR:
+                self.errors.append(error_text(lex, line, col))
+            yield Token(token_type(CODE_NAME[code]), lex, line, col)
+
+    def tokenize_all(self):
+        return list(self.iter_tokens())
+
+    def tokenize_compact(self):
+        """
+        Tokeniza directo a un tokbuf.TokenBuffer (columnas array('i'), lexemas
+        perezosos): sin Token/TokenType/PTok por token. Los errores quedan en
+        buf.errors (con el índice del token al que preceden) y en self.errors.
+        """
+        from tokbuf import TokenBuffer, TERM_ID, END_ID
+        from grammar import TOK_TO_TERM
+        buf = TokenBuffer(self.source)
+        append = buf.append
+        if self.engine == "dfa":
+            self._fill_dfa(buf)
+            self.errors.extend(msg for _i, msg in buf.errors)
+            return buf
+        kind_ids = {k: TERM_ID[t] for k, t in TOK_TO_TERM.items()}
+        reserved = self.reserved
+        line, col = 1, 1
+        for match in self.master.finditer(self.source):
+            kind = match.lastgroup
+            start, end = match.span()
+
+            if kind in ("WS", "COMMENT1"):
+                col += end - start
+                continue
+
+            if kind == "COMMENT2":
+                line, col = _after(match.group(), line, col)
+                continue
+
+            if kind == "NEWLINE":
+                line += 1
+                col = 1
+                continue
+
+            if kind == "ID":
+                kind = reserved.get(match.group(), "ID")
+            elif kind == "SYMBOL":
+                kind = SYMBOL_NAMES.get(match.group(), "SYMBOL")
+            elif kind == "OP":
+                kind = OP_NAMES.get(match.group(), "OP")
+
+            term = kind_ids.get(kind)
+            if term is not None:
+                append(term, start, end - start, line, col)
+            elif kind == "ERROR":
+                buf.error(error_text(match.group(), line, col))
+            else:
+                buf.error(f"Token '{kind}' no mapeado en la gramática (L{line}, C{col})")
+            if kind == "STRING":
+                line, col = _after(match.group(), line, col)
+            else:
+                col += end - start
+
+        append(END_ID, len(self.source), 0, line, col)
+        self.errors.extend(msg for _i, msg in buf.errors)
+        return buf
+
+    def _fill_dfa(self, buf):
+        from scanner import scan, error_message
+        src = self.source
+        append = buf.append
+        for code, start, end, line, col in scan(src):
+            if code >= 0:
+                append(code, start, end - start, line, col)
+            else:
+                buf.error(error_message(code, src[start:end], line, col))
 
 
 # --------------------------------------------
@@ -137,28 +293,215 @@ class PTok:
         self.col = col
 
 
-def tokenize(source_text):
-    """Función auxiliar para compatibilidad con app.py"""
-    from grammar import TOK_TO_TERM  # mapeo EnumName -> terminal (string)
-    L = Lexer(source_text)
-    raw = L.tokenize_all()
-    out = []
-    errs = list(L.errors)
+LexError = namedtuple("LexError", ["msg", "line", "col"])
 
-    for t in raw:
+
+def token_map(g=None):
+    """
+    Nombre de token del lexer -> terminal de la gramática g (grammar.Grammar):
+    los de grammar.TOK_TO_TERM cuyo terminal está en g, las palabras reservadas
+    que g usa tal cual como terminal (p. ej. 'while') y los %token de
+    g.tok_to_term. Sin g (o con grammar.DEFAULT) es grammar.TOK_TO_TERM.
+    """
+    import grammar
+    if g is None or g is grammar.DEFAULT:
+        return grammar.TOK_TO_TERM
+    terms = set(g.terms)
+    out = {name: term for name, term in grammar.TOK_TO_TERM.items() if term in terms}
+    for word, name in RESERVED.items():
+        if word in terms and name not in out:
+            out[name] = word
+    out.update(g.tok_to_term)
+    return out
+
+
+def iter_ptoks(source_text, engine=None, tok_to_term=None):
+    """
+    Flujo perezoso para el parser: genera PTok (terminal de la gramática) y
+    LexError en orden de fuente. Termina siempre con PTok('$').
+    tok_to_term: nombre de token -> terminal (token_map() de otra gramática);
+    los tokens sin terminal son errores léxicos 'no mapeado'.
+    """
+    if (engine or DEFAULT_ENGINE) == "dfa":
+        yield from _iter_ptoks_dfa(source_text, tok_to_term=tok_to_term)
+        return
+    from grammar import TOK_TO_TERM  # mapeo EnumName -> terminal (string)
+    if tok_to_term is not None:
+        TOK_TO_TERM = tok_to_term
+    L = Lexer(source_text, engine)
+    for t in L.iter_tokens():
+        if L.errors:  # error léxico del token recién leído
+            for msg in L.errors:
+                yield LexError(msg, t.line, t.col)
+            L.errors.clear()
         name = t.typ.name
         if name == "EOF":
-            out.append(PTok("$", "", t.line, t.col))
-            break
+            yield PTok("$", "", t.line, t.col)
+            return
         if name == "ERROR":
             continue
         term = TOK_TO_TERM.get(name)
         if term is None:
-            errs.append(f"Token '{name}' no mapeado en la gramática (L{t.line}, C{t.col})")
+            yield LexError(f"Token '{name}' no mapeado en la gramática (L{t.line}, C{t.col})", t.line, t.col)
             continue
-        out.append(PTok(term, t.lexeme, t.line, t.col))
+        yield PTok(term, t.lexeme, t.line, t.col)
+
+
+def iter_ptoks_at(source_text, line=1, col=1):
+    """iter_ptoks() de un fragmento que empieza en (line, col) del fuente original."""
+    return _iter_ptoks_dfa(source_text, line, col)
+
+
+def _iter_ptoks_dfa(src, line=1, col=1, tok_to_term=None):
+    # El motor dfa ya emite ids de terminal: no hay mapeo intermedio de nombres
+    from scanner import scan, error_message, CODE_NAME, ERROR
+    from tokbuf import TERM_NAMES, END_ID
+    if tok_to_term is not None:
+        # Otra gramática: del código se vuelve al nombre de token y se remapea
+        for code, start, end, line, col in scan(src, 0, line, col):
+            term = "$" if code == END_ID else tok_to_term.get(CODE_NAME[code]) if code != ERROR else None
+            if term is not None:
+                yield PTok(term, src[start:end], line, col)
+            else:
+                yield LexError(error_message(code, src[start:end], line, col), line, col)
+        return
+    for code, start, end, line, col in scan(src, 0, line, col):
+        if code >= 0:
+            yield PTok(TERM_NAMES[code], src[start:end], line, col)
+        else:
+            yield LexError(error_message(code, src[start:end], line, col), line, col)
+
+
+class TokenStream:
+    """
+    Vista con lookahead sobre un iterable de PTok/LexError.
+    Los LexError se vuelcan en errors cuando el parser alcanza el token que
+    los sigue, de modo que errores léxicos y sintácticos quedan intercalados
+    en orden de fuente. Memoria O(lookahead).
+    Con un budget.Budget el flujo termina con '$' al agotarse (tokens,
+    tiempo, nodos) o al pasar max_errors; los errores léxicos también
+    cuentan para el reloj.
+    terms: terminales válidos (los de la gramática, con '$'); un token de
+    otro tipo se reporta como error léxico 'no mapeado' y se salta.
+    """
+
+    def __init__(self, items, errors=None, budget=None, terms=None):
+        self._it = iter(items)
+        self.terms = terms
+        self.errors = errors if errors is not None else []
+        self.budget = budget
+        self.count = 0        # tokens entregados (incluye '$')
+        self.lex_count = 0    # errores léxicos vistos
+        self._lex_seen = 0    # errores léxicos leídos (para budget)
+        self.pos = -1
+        self._ahead = None
+        self._end = None
+        self.cur = None
+        self.advance()
+
+    def _pull(self):
+        msgs = []
+        if self._end is not None:
+            return self._end, msgs
+        for item in self._it:
+            if isinstance(item, LexError) or (self.terms is not None and item.kind not in self.terms):
+                msgs.append(item.msg if isinstance(item, LexError) else _unmapped(item))
+                if self.budget is not None and not self._lex_room(len(msgs)):
+                    # Límite de errores o de tiempo en una racha de errores léxicos
+                    self._it = iter(())
+                    self._end = PTok("$", "", item.line, item.col)
+                    self.count += 1
+                    return self._end, msgs
+                continue
+            self.count += 1
+            if item.kind == "$":
+                self._end = item
+            elif self.budget is not None and not self.budget.token(self.count):
+                # Presupuesto agotado: el flujo termina aquí
+                self._it = iter(())
+                self._end = item = PTok("$", "", item.line, item.col)
+            return item, msgs
+        # Iterable sin '$' final: sintetizarlo
+        last = self.cur
+        self._end = PTok("$", "", last.line if last else 1, last.col if last else 1)
+        self.count += 1
+        return self._end, msgs
+
+    def _lex_room(self, pending):
+        # pending: errores léxicos leídos aún no volcados en errors
+        b = self.budget
+        self._lex_seen += 1
+        if self._lex_seen % CHECK_EVERY == 0 and not b.check():
+            return False
+        if b.max_errors is not None and len(self.errors) + pending > b.max_errors:
+            return b.exceed("errores")
+        return True
+
+    def restrict(self, terms):
+        """
+        Fija terms (ver la clase) en un flujo ya abierto: el token actual y el
+        adelantado por peek() se vuelven a leer con el filtro.
+        """
+        self.terms = terms
+        if self.cur.kind in terms and (self._ahead is None or self._ahead[0].kind in terms):
+            return
+        back = [self.cur]
+        if self._ahead is not None:
+            tok, msgs = self._ahead
+            back += [LexError(m, tok.line, tok.col) for m in msgs] + [tok]
+            self._ahead = None
+            self.count -= 1
+        self._it = chain(back, self._it) if self._end is None else iter(back)
+        self._end = None
+        self.cur = None
+        self.pos -= 1
+        self.count -= 1
+        self.advance()
+
+    def advance(self):
+        """Avanza al siguiente token; no se mueve más allá de '$'."""
+        if self.cur is not None and self.cur.kind == "$":
+            return self.cur
+        if self._ahead is not None:
+            tok, msgs = self._ahead
+            self._ahead = None
+        else:
+            tok, msgs = self._pull()
+        self.lex_count += len(msgs)
+        if msgs and self.budget is not None and self.budget.max_errors is not None:
+            room = self.budget.max_errors - len(self.errors)
+            if len(msgs) > room:
+                msgs = msgs[:max(room, 0)]
+                self.budget.exceed("errores")
+        self.errors.extend(msgs)
+        self.cur = tok
+        self.pos += 1
+        return tok
+
+    def peek(self):
+        """Token siguiente al actual (None si el actual es '$')."""
+        if self.cur.kind == "$":
+            return None
+        if self._ahead is None:
+            self._ahead = self._pull()
+        return self._ahead[0]
+
+    def drain(self):
+        """Consume el resto del flujo (sin guardarlo) para volcar errores léxicos pendientes."""
+        while self.cur.kind != "$":
+            self.advance()
+
+
+def _unmapped(tok):
+    return f"Token '{tok.kind}' no mapeado en la gramática (L{tok.line}, C{tok.col})"
 
-    if not out or out[-1].kind != "$":
-        out.append(PTok("$", "", raw[-1].line if raw else 1, raw[-1].col if raw else 1))
 
+def tokenize(source_text, engine=None):
+    """Función auxiliar: lista completa de PTok + errores léxicos."""
+    out, errs = [], []
+    for item in iter_ptoks(source_text, engine):
+        if isinstance(item, LexError):
+            errs.append(item.msg)
+        else:
+            out.append(item)
     return out, errs
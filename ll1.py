@@ -1,5 +1,11 @@
-from grammar import G, NONTERMS, TERMS, START
-from collections import defaultdict
+from grammar import G, TERMS
+import grammar
+from array import array
+from collections import defaultdict, namedtuple
+import os
+import pickle
+
+import metrics
 
 EPS = 'ε'
 END = '$'
@@ -16,51 +22,155 @@ def first_of_seq(seq, FIRST):
         s.add(EPS)
     return s
 
-def build_first_follow():
-    FIRST = {A:set() for A in (NONTERMS+TERMS+[EPS])}
-    FOLLOW = {A:set() for A in NONTERMS}
-    # FIRST terminal = t
-    for t in TERMS: FIRST[t].add(t)
-    FIRST[EPS].add(EPS)
-    changed = True
-    while changed:
-        changed = False
-        for A, prods in G.items():
-            for alpha in prods:
-                if not alpha:
-                    if EPS not in FIRST[A]:
-                        FIRST[A].add(EPS); changed=True
-                    continue
-                f = first_of_seq(alpha, FIRST)
-                n = len(FIRST[A])
-                FIRST[A] |= f
-                if len(FIRST[A]) != n: changed = True
-    FOLLOW[START].add(END)
-    changed = True
-    while changed:
-        changed=False
-        for A, prods in G.items():
-            for alpha in prods:
-                trailer = set(FOLLOW[A])
-                for X in reversed(alpha):
-                    if X in NONTERMS:
-                        n = len(FOLLOW[X])
-                        FOLLOW[X] |= trailer
-                        if 'ε' in FIRST[X]:  # no se usa, pero mantener por simetría
-                            pass
-                        if EPS in FIRST[X]:
-                            trailer |= (FIRST[X]-{EPS})
-                        else:
-                            trailer = (FIRST[X]-{EPS})
-                        if len(FOLLOW[X])!=n: changed=True
+# --------------------------------------------
+# FIRST/FOLLOW por grafo de dependencias
+# --------------------------------------------
+# En vez de barrer todas las producciones hasta que nada cambie, cada conjunto
+# se plantea como F(X) = init(X) ∪ ⋃ F(Y) para las aristas X -> Y, y se
+# resuelve con una pasada de Tarjan: las componentes fuertemente conexas
+# comparten el mismo conjunto y se cierran en orden topológico inverso
+# (algoritmo "digraph" de DeRemer y Pennello). Coste lineal en aristas.
+
+def _rhs(alpha):
+    return [s for s in alpha if s != EPS]
+
+def sccs(nodes, edges):
+    """
+    Componentes fuertemente conexas (Tarjan iterativo), cada una emitida
+    después de todas las que alcanza. edges: {nodo: iterable de sucesores}.
+    """
+    index, low, on_stack, stack, out = {}, {}, set(), [], []
+    counter = 0
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(edges.get(root, ())))]
+        index[root] = low[root] = counter; counter += 1
+        stack.append(root); on_stack.add(root)
+        while work:
+            v, it = work[-1]
+            for w in it:
+                if w not in index:
+                    index[w] = low[w] = counter; counter += 1
+                    stack.append(w); on_stack.add(w)
+                    work.append((w, iter(edges.get(w, ()))))
+                    break
+                if w in on_stack and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+                if low[v] == index[v]:
+                    comp = []
+                    while True:
+                        w = stack.pop(); on_stack.discard(w)
+                        comp.append(w)
+                        if w == v:
+                            break
+                    out.append(comp)
+    return out
+
+def _close(nodes, edges, init):
+    """F(X) = init[X] ∪ F(Y) para cada X -> Y, resuelto por componentes."""
+    F = {}
+    for comp in sccs(nodes, edges):
+        s = set()
+        for X in comp:
+            s |= init[X]
+            for Y in edges.get(X, ()):
+                if Y in F:
+                    s |= F[Y]
+        for X in comp:
+            F[X] = s if len(comp) == 1 else set(s)
+    return F
+
+def nullable_set(g):
+    """No-terminales que derivan ε (lista de trabajo: cada producción cuenta sus símbolos aún no anulables)."""
+    pending, uses, work = [], defaultdict(list), []
+    nullable = set()
+    for A, alts in g.prods.items():
+        for alpha in alts:
+            alpha = _rhs(alpha)
+            i = len(pending)
+            pending.append(len(alpha))
+            for X in alpha:
+                uses[X].append((i, A))
+            if not alpha and A not in nullable:
+                nullable.add(A); work.append(A)
+    while work:
+        X = work.pop()
+        for i, A in uses.get(X, ()):
+            pending[i] -= 1
+            if pending[i] == 0 and A not in nullable:
+                nullable.add(A); work.append(A)
+    return nullable
+
+def left_corners(g, nullable):
+    """A -> B si B puede ser el primer símbolo de algo derivado de A (saltando anulables)."""
+    edges, direct = {}, {}
+    for A, alts in g.prods.items():
+        out, terms = edges.setdefault(A, set()), direct.setdefault(A, set())
+        for alpha in alts:
+            for X in _rhs(alpha):
+                if X in g.prods:
+                    out.add(X)
+                    if X not in nullable:
+                        break
+                else:
+                    terms.add(X)
+                    break
+    return edges, direct
+
+def build_first_follow(g=None):
+    g = g or grammar.DEFAULT
+    prods = g.prods
+    nullable = nullable_set(g)
+    # FIRST: arista A -> B por cada esquina izquierda
+    edges, direct = left_corners(g, nullable)
+    F = _close(list(prods), edges, direct)
+    FIRST = {t: {t} for t in g.terms}
+    for alts in prods.values():
+        for alpha in alts:
+            for X in _rhs(alpha):
+                if X not in prods and X not in FIRST:
+                    FIRST[X] = {X}  # símbolo sin declarar: se comporta como terminal
+    for A in g.nonterms:
+        FIRST[A] = F.get(A, set())
+        if A in nullable:
+            FIRST[A].add(EPS)
+    FIRST[EPS] = {EPS}
+    # FOLLOW: en A -> α B β, FIRST(β) ⊆ FOLLOW(B) y, si β ⇒* ε, arista B -> A
+    init = {A: set() for A in prods}
+    edges = {A: set() for A in prods}
+    init[g.start].add(END)
+    for A, alts in prods.items():
+        for alpha in alts:
+            trailer, tail_nullable = set(), True
+            for X in reversed(_rhs(alpha)):
+                if X in prods:
+                    init[X] |= trailer
+                    if tail_nullable and X != A:
+                        edges[X].add(A)
+                    if X in nullable:
+                        trailer |= FIRST[X] - {EPS}
                     else:
-                        trailer = (FIRST[X]-{EPS})
+                        trailer = FIRST[X] - {EPS}
+                        tail_nullable = False
+                else:
+                    trailer = {X}
+                    tail_nullable = False
+    FL = _close(list(prods), edges, init)
+    FOLLOW = {A: FL.get(A, set()) for A in g.nonterms}
     return FIRST, FOLLOW
 
-def build_table(FIRST, FOLLOW):
+def build_table(FIRST, FOLLOW, g=None):
+    g = g or grammar.DEFAULT
     M = defaultdict(dict)
     conflicts = []
-    for A, prods in G.items():
+    for A, prods in g.prods.items():
         for i, alpha in enumerate(prods):
             f = first_of_seq(alpha, FIRST)
             for a in (f - {EPS}):
@@ -73,3 +183,239 @@ def build_table(FIRST, FOLLOW):
                         conflicts.append((A, b, M[A][b], alpha))
                     M[A][b] = alpha
     return M, conflicts
+
+
+# --------------------------------------------
+# Gramática compilada (FIRST/FOLLOW + tabla), una sola vez por huella
+# --------------------------------------------
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+# Versión del formato de Compiled/Dense en disco: subirla al cambiar sus campos
+# o su contenido (la huella solo cubre la gramática)
+CACHE_VERSION = 2
+
+Compiled = namedtuple("Compiled", ["fingerprint", "FIRST", "FOLLOW", "table", "conflicts", "rows", "sync", "dense"])
+
+# Tabla densa para el driver de parser_ll1: símbolos internados a enteros
+#   names  id -> nombre: terminales en el orden de TERMS (= tokbuf.TERM_ID),
+#          '$' = width - 1, y luego los no-terminales (id >= width)
+#   cells  array('i') de (id_no_terminal - width) * width + id_terminal
+#          -> índice de producción, o -1 si no hay entrada
+#   prods  por producción, los ids del lado derecho invertidos (listos para apilar)
+#   rhs    por producción, el lado derecho con nombres (árbol/acciones)
+#   lhs    por producción, el nombre del lado izquierdo
+Dense = namedtuple("Dense", ["names", "ids", "width", "cells", "prods", "rhs", "lhs"])
+
+_compiled = {}  # huella -> Compiled (una por gramática usada en el proceso)
+
+def grammar_fingerprint(g=None):
+    """Hash estable de producciones/terminales/no-terminales/inicio: cambia solo si cambia la gramática."""
+    return (g or grammar.DEFAULT).fingerprint()
+
+def table_rows(table):
+    """Filas de texto de la tabla (formato de tabla_transicion.txt), ordenadas."""
+    rows = []
+    for A in table:
+        for a, prod in table[A].items():
+            rows.append(f"{A:12} | {a:10} -> {' '.join(prod) if prod else 'ε'}")
+    return sorted(rows)
+
+def densify(table, G=G, terms=TERMS):
+    """Internado de símbolos + tabla densa (ver Dense) a partir de una tabla de dicts."""
+    if isinstance(G, grammar.Grammar):
+        G, terms = G.prods, G.terms
+    names = list(terms) + [END] + list(G)
+    ids = {name: i for i, name in enumerate(names)}
+    width = len(terms) + 1
+    prods, rhs_names, lhs_names, index = [], [], [], {}
+    for A, alts in G.items():
+        for alpha in alts:
+            alpha = [] if alpha == [EPS] else list(alpha)
+            index[(A, tuple(alpha))] = len(prods)
+            prods.append(tuple(ids[s] for s in reversed(alpha)))
+            rhs_names.append(alpha)
+            lhs_names.append(A)
+    cells = array('i', [-1]) * ((len(names) - width) * width)
+    for A, row in table.items():
+        base = (ids[A] - width) * width
+        for a, alpha in row.items():
+            if a in ids and ids[a] < width:
+                alpha = [] if alpha == [EPS] else list(alpha)
+                cells[base + ids[a]] = index[(A, tuple(alpha))]
+    return Dense(names, ids, width, cells, tuple(prods), rhs_names, lhs_names)
+
+def compile_grammar(g=None):
+    from recovery import build_sync_sets
+    g = g or grammar.DEFAULT
+    with metrics.phase("first_follow"):
+        FIRST, FOLLOW = build_first_follow(g)
+    with metrics.phase("table"):
+        table, conflicts = build_table(FIRST, FOLLOW, g)
+        table = {A: dict(row) for A, row in table.items()}
+    return Compiled(g.fingerprint(), FIRST, FOLLOW, table, conflicts,
+                    table_rows(table), build_sync_sets(FOLLOW), densify(table, g))
+
+def _cache_path(fp):
+    return os.path.join(CACHE_DIR, f"ll1-{fp}-v{CACHE_VERSION}.pickle")
+
+def _load(fp):
+    try:
+        with open(_cache_path(fp), "rb") as f:
+            data = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(data, tuple) or len(data) != len(Compiled._fields) or data[0] != fp:
+        return None
+    return Compiled(*data)
+
+def _store(c):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{_cache_path(c.fingerprint)}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(tuple(c), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, _cache_path(c.fingerprint))  # atómico entre procesos
+    except OSError:
+        pass  # sin disco: seguimos con la copia en memoria
+
+def get_compiled(g=None):
+    """
+    Devuelve la gramática compilada (por defecto grammar.DEFAULT). Se construye
+    una vez por proceso y gramática; si existe en disco
+    (cache/ll1-<huella>-v<CACHE_VERSION>.pickle) se carga de ahí para
+    arrancar en caliente.
+    """
+    fp = (g or grammar.DEFAULT).fingerprint()
+    c = _compiled.get(fp)
+    if c is not None:
+        return c
+    with metrics.phase("grammar_load"):
+        c = _load(fp)
+    if c is None:
+        c = compile_grammar(g)
+        _store(c)
+    _compiled[fp] = c
+    return c
+
+
+_foreign = (None, None, None)  # (tabla, gramática, Compiled) de la última tabla ajena
+
+def compile_table(table, G, start=None):
+    """
+    Compiled para una tabla de dicts que no es la compilada de G (parser_ll1
+    con table=...): la tabla dada, su versión densa y FOLLOW/SYNC de G, para
+    que la recuperación de errores use los conjuntos de esa gramática. G es
+    un grammar.Grammar o un dict de producciones (con los terminales de
+    grammar.TERMS).
+    """
+    global _foreign
+    if _foreign[0] is table and _foreign[1] is G:
+        return _foreign[2]
+    from recovery import build_sync_sets
+    g = G if isinstance(G, grammar.Grammar) else grammar.Grammar(
+        G, start or (grammar.START if grammar.START in G else None), TERMS)
+    FIRST, FOLLOW = build_first_follow(g)
+    c = Compiled(g.fingerprint(), FIRST, FOLLOW, table, [], table_rows(table),
+                 build_sync_sets(FOLLOW), densify(table, g))
+    _foreign = (table, G, c)
+    return c
+
+
+# --------------------------------------------
+# Diagnósticos de la gramática
+# --------------------------------------------
+Diagnostics = namedtuple("Diagnostics", ["undefined", "unreachable", "unproductive", "nullable",
+                                         "left_recursion", "conflicts"])
+
+def productive_set(g):
+    """No-terminales que derivan alguna cadena de terminales (misma lista de trabajo que nullable_set)."""
+    pending, uses, work, productive = [], defaultdict(list), [], set()
+    for A, alts in g.prods.items():
+        for alpha in alts:
+            nts = [X for X in _rhs(alpha) if X in g.prods]
+            i = len(pending)
+            pending.append(len(nts))
+            for X in nts:
+                uses[X].append((i, A))
+            if not nts and A not in productive:
+                productive.add(A); work.append(A)
+    while work:
+        X = work.pop()
+        for i, A in uses.get(X, ()):
+            pending[i] -= 1
+            if pending[i] == 0 and A not in productive:
+                productive.add(A); work.append(A)
+    return productive
+
+def classify_conflict(conflict, FIRST):
+    """'FIRST/FIRST' si ambas alternativas empiezan por el terminal; si no, 'FIRST/FOLLOW'."""
+    A, a, alpha, beta = conflict
+    both = a in first_of_seq(alpha, FIRST) and a in first_of_seq(beta, FIRST)
+    return "FIRST/FIRST" if both else "FIRST/FOLLOW"
+
+def diagnose(g=None, compiled=None):
+    """
+    Problemas de la gramática para LL(1): símbolos sin definir, inalcanzables
+    o improductivos, no-terminales anulables, ciclos de recursión por la
+    izquierda (directa o indirecta, vía componentes del grafo de esquinas
+    izquierdas) y conflictos de la tabla con su tipo.
+    """
+    g = g or grammar.DEFAULT
+    compiled = compiled or get_compiled(g)
+    prods, terms = g.prods, set(g.terms)
+    undefined = sorted({X for alts in prods.values() for alpha in alts for X in _rhs(alpha)
+                        if X not in prods and X not in terms})
+    seen, work = {g.start}, [g.start]
+    while work:
+        for alpha in prods.get(work.pop(), ()):
+            for X in _rhs(alpha):
+                if X in prods and X not in seen:
+                    seen.add(X); work.append(X)
+    nullable = nullable_set(g)
+    productive = productive_set(g)
+    edges, _direct = left_corners(g, nullable)
+    cycles = [sorted(comp) for comp in sccs(list(prods), edges)
+              if len(comp) > 1 or comp[0] in edges.get(comp[0], ())]
+    conflicts = [(A, a, alpha, beta, classify_conflict((A, a, alpha, beta), compiled.FIRST))
+                 for A, a, alpha, beta in compiled.conflicts]
+    return Diagnostics(undefined, [A for A in g.nonterms if A not in seen],
+                       [A for A in g.nonterms if A not in productive],
+                       [A for A in g.nonterms if A in nullable], cycles, conflicts)
+
+def report(g=None, compiled=None):
+    """Texto del diagnóstico (para la consola)."""
+    g = g or grammar.DEFAULT
+    d = diagnose(g, compiled)
+    alt = lambda alpha: " ".join(_rhs(alpha)) or EPS
+    lines = [f"Gramática {g.fingerprint()}: {len(g.nonterms)} no-terminales, {len(g.terms)} terminales, "
+             f"{g.n_productions()} producciones; inicio {g.start}"]
+    if d.undefined:
+        lines.append("Símbolos sin definir: " + ", ".join(d.undefined))
+    if d.unreachable:
+        lines.append("Inalcanzables desde el inicio: " + ", ".join(d.unreachable))
+    if d.unproductive:
+        lines.append("Improductivos (no derivan terminales): " + ", ".join(d.unproductive))
+    lines.append("Anulables: " + (", ".join(d.nullable) or "ninguno"))
+    for comp in d.left_recursion:
+        if len(comp) == 1:
+            lines.append(f"Recursión por la izquierda directa: {comp[0]}")
+        else:
+            lines.append(f"Recursión por la izquierda indirecta entre: {', '.join(comp)}")
+    if d.conflicts:
+        lines.append(f"Conflictos LL(1): {len(d.conflicts)}")
+        for A, a, alpha, beta, kind in d.conflicts:
+            lines.append(f"  {kind:12} M[{A}, {a}]: {A} -> {alt(alpha)}  |  {A} -> {alt(beta)}")
+    else:
+        lines.append("Tabla LL(1) sin conflictos.")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python ll1.py [gramatica.bnf]  -> diagnóstico y tiempos de compilación
+    import sys
+    import time
+    g = grammar.load_grammar(sys.argv[1]) if len(sys.argv) > 1 else grammar.DEFAULT
+    t0 = time.perf_counter()
+    c = compile_grammar(g)
+    dt = time.perf_counter() - t0
+    print(report(g, c))
+    print(f"FIRST/FOLLOW + tabla en {dt * 1000:.2f} ms")
@@ -0,0 +1,354 @@
+# ll1gen.py
+# Generador de un parser especializado a partir de grammar.G y la tabla LL(1)
+# compilada (ll1.get_compiled().dense).
+#
+# Emite un módulo de descenso recursivo: una función por no-terminal que
+# elige la producción con una sola consulta a la tabla densa y empareja los
+# terminales en línea. Las producciones recursivas por la cola (MemberList,
+# StmtList, ParamRest, ArgRest, ExprP, TermP...) se vuelven bucles. La
+# recuperación de errores llama a la misma recovery.Recovery y en el mismo
+# orden que el intérprete de parser_ll1, así que árbol, AST y errores son
+# idénticos. Pasada una profundidad de anidamiento (paréntesis, llamadas) el
+# subárbol se delega al intérprete de tabla (deep) para no agotar la pila.
+#
+# El módulo se escribe en cache/ll1gen-<huella>-v<versión>.py y se regenera
+# solo cuando cambia la huella de la gramática (o este generador).
+#
+#   python ll1gen.py            # genera y muestra la ruta
+#   python ll1gen.py --bench    # compara con el intérprete de tabla
+
+import importlib.util
+import os
+import sys
+import types
+
+import ll1
+
+GEN_VERSION = 2
+MAX_DEPTH = 200  # llamadas anidadas en ciclos de la gramática antes de delegar
+
+_loaded = {}  # huella -> módulo
+
+
+# ---------------- análisis de la gramática ----------------
+def _tail_prods(D):
+    """Producciones A -> ... A (recursión por la cola: se emiten como bucle)."""
+    return {p for p, (lhs, rhs) in enumerate(zip(D.lhs, D.rhs)) if rhs and rhs[-1] == lhs}
+
+
+def _cyclic_sites(D, tails):
+    """
+    Pares (A, B) tales que A llama a B y B vuelve a alcanzar A: esas llamadas
+    cuentan profundidad (el resto no puede anidarse sin límite).
+    """
+    W = D.width
+    calls = {}
+    for p, (lhs, rhs) in enumerate(zip(D.lhs, D.rhs)):
+        syms = rhs[:-1] if p in tails else rhs
+        calls.setdefault(lhs, set()).update(s for s in syms if D.ids[s] >= W)
+    reach = {}
+    for A in calls:
+        seen, stack = set(), list(calls[A])
+        while stack:
+            B = stack.pop()
+            if B not in seen:
+                seen.add(B)
+                stack.extend(calls.get(B, ()))
+        reach[A] = seen
+    return {(A, B) for A, Bs in calls.items() for B in Bs if A in reach.get(B, ())}
+
+
+def _fname(name, i):
+    return f"p_{name}" if name.isidentifier() else f"p{i}"
+
+
+# ---------------- emisión ----------------
+class _Out:
+    def __init__(self):
+        self.lines = []
+        self.level = 0
+
+    def __call__(self, text=""):
+        self.lines.append("    " * self.level + text if text else "")
+
+    def indent(self, n=1):
+        self.level += n
+
+    def dedent(self, n=1):
+        self.level -= n
+
+
+def _emit_symbols(o, D, A, syms, cyclic, BT, BA):
+    """Cuerpo de una producción: un bloque por símbolo del lado derecho."""
+    W = D.width
+    for i, s in enumerate(syms):
+        k = D.ids[s]
+        child = f"c + {i}" if BT else "-1"
+        v = f"v{i} = " if BA else ""
+        if k < W:
+            o(f"if t == {k}:")
+            o.indent()
+            if BT:
+                o(f"arena.leaf({child}, a.lex)")
+            if BA:
+                o(f"v{i} = a")
+            o("a = ts.advance()")
+            o("t = IDS[a.kind]")
+            o.dedent()
+            o("else:")
+            o.indent()
+            o(f"{v}_term({k}, {child})")
+            o.dedent()
+        elif (A, s) in cyclic:
+            o("depth += 1")
+            o("if depth < MAX_DEPTH:")
+            o.indent()
+            o(f"{v}{_fname(s, k)}({child})")
+            o.dedent()
+            o("else:")
+            o.indent()
+            o(f"{v}deep({k}, {child})")
+            o("a = ts.cur")
+            o("t = IDS[a.kind]")
+            o("if rec.stopped:")
+            o("    raise _Stop")
+            o.dedent()
+            o("depth -= 1")
+        else:
+            o(f"{v}{_fname(s, k)}({child})")
+
+
+def _emit_nonterminal(o, D, A, cyclic, tails, BT, BA):
+    W = D.width
+    X = D.ids[A]
+    prods = [p for p, lhs in enumerate(D.lhs) if lhs == A]
+    tail = [p for p in prods if p in tails]
+    o(f"def {_fname(A, X)}(node):")
+    o.indent()
+    o(f"# {A}")
+    o("nonlocal a, t, depth")
+    if tail and BA:
+        o("pend = []")
+    o("while True:")
+    o.indent()
+    o(f"p = CELLS[{(X - W) * W} + t]")
+    for p in prods:
+        rhs = D.rhs[p]
+        o(f"if p == {p}:  # {A} -> {' '.join(rhs) or 'ε'}")
+        o.indent()
+        if not rhs:
+            if BT:
+                o("arena.epsilon(node)")
+            if tail:
+                o(f"v = acts[{p}]([])" if BA else "pass")
+                o("break")
+            else:
+                o(f"return acts[{p}]([])" if BA else "return")
+        elif p in tails:
+            if BT:
+                o(f"c = arena.expand_ids(node, {tuple(D.ids[s] for s in rhs)!r}).start")
+            _emit_symbols(o, D, A, rhs[:-1], cyclic, BT, BA)
+            if BA:
+                o(f"pend.append((acts[{p}], [{', '.join(f'v{i}' for i in range(len(rhs) - 1))}]))")
+            if BT:
+                o(f"node = c + {len(rhs) - 1}")
+            o("continue")
+        else:
+            if BT:
+                o(f"c = arena.expand_ids(node, {tuple(D.ids[s] for s in rhs)!r}).start")
+            _emit_symbols(o, D, A, rhs, cyclic, BT, BA)
+            value = f"acts[{p}]([{', '.join(f'v{i}' for i in range(len(rhs)))}])"
+            if tail:
+                o(f"v = {value}" if BA else "pass")
+                o("break")
+            else:
+                o(f"return {value}" if BA else "return")
+        o.dedent()
+    # Sin entrada en la tabla: misma recuperación que el intérprete
+    o(f"if _nterr({X}):")
+    o("    continue")
+    if tail:
+        o("v = None")
+        o("break")
+    else:
+        o("return None")
+    o.dedent()
+    if tail:
+        if BA:
+            o("for act, args in reversed(pend):")
+            o("    args.append(v)")
+            o("    v = act(args)")
+            o("return v")
+        else:
+            o("return None")
+    o.dedent()
+    o()
+
+
+def _emit_runner(o, D, fname, cyclic, tails, BT, BA):
+    W = D.width
+    o(f"def {fname}(ts, rec, arena, acts, deep, start, root):")
+    o.indent()
+    o("a = ts.cur")
+    o("t = IDS[a.kind]")
+    o("depth = 0")
+    o()
+    o("def _term(X, node):")
+    o("    nonlocal a, t")
+    o("    while True:")
+    o("        if X == t:")
+    if BT:
+        o("            arena.leaf(node, a.lex)")
+    o("            v = a")
+    o("            a = ts.advance()")
+    o("            t = IDS[a.kind]")
+    o("            return v")
+    o("        if rec.terminal(NAMES[X], a, ts.peek(), ts.pos) == 'delete':")
+    o("            a = ts.advance()")
+    o("            t = IDS[a.kind]")
+    o("            if rec.stopped:")
+    o("                raise _Stop")
+    o("            continue")
+    o("        if rec.stopped:")
+    o("            raise _Stop")
+    o("        return None  # terminal insertado")
+    o()
+    o("def _nterr(X):")
+    o("    # True: reintentar X; False: X abandonado (modo pánico)")
+    o("    nonlocal a, t")
+    o("    name = NAMES[X]")
+    o("    if rec.nonterminal(name, a, ts.peek(), ts.pos) == 'delete':")
+    o("        a = ts.advance()")
+    o("        t = IDS[a.kind]")
+    o("        if rec.stopped:")
+    o("            raise _Stop")
+    o("        return True")
+    o("    action = rec.resume(name, a.kind)")
+    o("    while action is None or action == 'eat':")
+    o("        a = ts.advance()")
+    o("        action = rec.resume(name, a.kind)")
+    o("    t = IDS[a.kind]")
+    o("    if rec.stopped:")
+    o("        raise _Stop")
+    o("    return action == 'retry'")
+    o()
+    for A in dict.fromkeys(D.lhs):
+        _emit_nonterminal(o, D, A, cyclic, tails, BT, BA)
+    entries = ", ".join(f"{A!r}: {_fname(A, D.ids[A])}" for A in dict.fromkeys(D.lhs))
+    o(f"fn = {{{entries}}}[start]")
+    o("try:")
+    o("    v = fn(root)")
+    o(f"    if t != {W - 1}:")
+    o("        rec.report(f\"Sintáctico L{a.line} C{a.col}: tokens extra al final '{a.lex}'\")")
+    o("except _Stop:")
+    o("    v = None")
+    o("return v")
+    o.dedent()
+    o()
+
+
+def generate_source(compiled):
+    """Texto del módulo especializado para la gramática compilada."""
+    D = compiled.dense
+    tails = _tail_prods(D)
+    cyclic = _cyclic_sites(D, tails)
+    o = _Out()
+    o(f"# Generado por ll1gen.py (v{GEN_VERSION}) para la gramática {compiled.fingerprint}; no editar.")
+    o()
+    o(f"NAMES = {list(D.names)!r}")
+    o(f"IDS = {dict(D.ids)!r}")
+    o(f"CELLS = {tuple(D.cells)!r}")
+    o(f"MAX_DEPTH = {MAX_DEPTH}")
+    o()
+    o()
+    o("class _Stop(Exception):")
+    o("    pass  # presupuesto de errores agotado")
+    o()
+    o()
+    runners = {}
+    for BT in (False, True):
+        for BA in (False, True):
+            fname = f"run_{'tree' if BT else 'notree'}_{'ast' if BA else 'noast'}"
+            runners[(BT, BA)] = fname
+            _emit_runner(o, D, fname, cyclic, tails, BT, BA)
+            o()
+    o("RUNNERS = {" + ", ".join(f"{k!r}: {v}" for k, v in runners.items()) + "}")
+    o()
+    o()
+    o("def run(build_tree, build_ast):")
+    o("    return RUNNERS[(build_tree, build_ast)]")
+    return "\n".join(o.lines) + "\n"
+
+
+# ---------------- carga ----------------
+def module_path(fp):
+    return os.path.join(ll1.CACHE_DIR, f"ll1gen-{fp}-v{GEN_VERSION}.py")
+
+
+def load(compiled=None):
+    """
+    Módulo generado para la gramática compilada (lo escribe si falta). Sin
+    disco (cache/ de solo lectura o inexistente) se compila en memoria.
+    """
+    compiled = compiled or ll1.get_compiled()
+    fp = compiled.fingerprint
+    mod = _loaded.get(fp)
+    if mod is not None:
+        return mod
+    path = module_path(fp)
+    if os.path.exists(path) or _store(path, compiled):
+        spec = importlib.util.spec_from_file_location(f"ll1gen_{fp}", path)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+    else:
+        mod = types.ModuleType(f"ll1gen_{fp}")
+        exec(compile(generate_source(compiled), f"<ll1gen-{fp}>", "exec"), mod.__dict__)
+    _loaded[fp] = mod
+    return mod
+
+
+def _store(path, compiled):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(ll1.CACHE_DIR, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(generate_source(compiled))
+        os.replace(tmp, path)  # atómico entre procesos
+        return True
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
+# ---------------- benchmark ----------------
+def bench(n=4000, reps=5):
+    import time
+
+    import lexer
+    import parser_ll1
+    from bench import gen
+
+    toks = lexer.tokenize(gen.members(n))[0]
+    print(f"{len(toks)} tokens, mejor de {reps}")
+    print(f"{'modo':6} {'tabla tok/s':>12} {'gen tok/s':>10} {'speedup':>8}")
+    for mode in parser_ll1.TREE_MODES:
+        best = {}
+        for engine in parser_ll1.ENGINES:
+            best[engine] = float("inf")
+            for _ in range(reps):
+                t0 = time.perf_counter()
+                parser_ll1.run_parser(toks, tree=mode, engine=engine)
+                best[engine] = min(best[engine], time.perf_counter() - t0)
+        print(f"{mode:6} {len(toks) / best['table']:12.0f} {len(toks) / best['gen']:10.0f} "
+              f"{best['table'] / best['gen']:7.2f}x")
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        bench()
+    else:
+        load()
+        print(module_path(ll1.get_compiled().fingerprint))
@@ -0,0 +1,292 @@
+# parallel.py
+# Parseo en paralelo de fuentes con muchas clases (Prog -> ClassDecl ClassList).
+#
+#   res, stats = parallel.parse(fuente, tree="both")
+#
+# Un pre-escaneo (una expresión regular que solo ve comentarios, cadenas,
+# llaves y la palabra class) ubica las clases de nivel superior contando
+# llaves. Las clases se agrupan en trozos de tamaño parecido y cada trozo se
+# lexea y parsea desde Prog en un proceso del pool; el proceso principal
+# empalma los árboles (tree.Arena.absorb + la cadena de ClassList), los AST y
+# los errores en orden de fuente. worth_it decide si conviene (tamaño, clases
+# y qué árbol hay que devolver) y de paso entrega los inicios de clase.
+#
+# Con fuentes correctos el resultado es idéntico al del parseo secuencial.
+# Con errores, cada trozo se recupera por su cuenta (el inicio de una clase
+# sincroniza) y tiene su propio presupuesto de errores; si un trozo lo agota,
+# de los siguientes no se reporta nada más, como en el secuencial.
+# Con un budget.Budget cada trozo recibe una copia (mismos límites y mismo
+# plazo); si un trozo se trunca, lo que sigue se descarta. Tokens y nodos se
+# suman entre trozos (_within_budget): el trozo donde la suma pasa el límite
+# se vuelve a parsear con lo que queda, y se trunca como el secuencial.
+
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+from collections import namedtuple
+
+import lexer
+import ll1
+import parser_ll1
+import srcmap
+from recovery import STOP_PREFIX
+from tree import Node, NONE
+
+MIN_BYTES = 256 * 1024      # por debajo no compensa repartir
+MIN_CLASSES = 8
+TREE_MIN_WORKERS = 4        # procesos para que compense devolver el árbol de derivación
+CHUNKS_PER_WORKER = 4       # trozos por proceso (equilibra clases desparejas)
+
+Stats = namedtuple("Stats", ["count", "lex_count", "chunks"])  # como TokenStream.count/lex_count
+
+# Lo que el lexer no parte: comentarios y cadenas se saltan enteros; 'class'
+# solo como identificador completo ([A-Za-z_0-9] a ningún lado)
+_SCAN_STR = r'//[^\n]*|/\*[\s\S]*?\*/|"(?:\\.|[^"\\])*"|[{}]|(?<![A-Za-z_0-9])class(?![A-Za-z_0-9])'
+_SCAN = re.compile(_SCAN_STR)
+_SCAN_BYTES = re.compile(_SCAN_STR.encode())
+
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+# ---------------- pre-escaneo ----------------
+def class_starts(source):
+    """Offsets de los 'class' a profundidad de llaves 0 (str o srcmap.MappedSource)."""
+    mapped = isinstance(source, srcmap.MappedSource)
+    buf = source.buf if mapped else source
+    lbrace, rbrace, kw = (b"{", b"}", b"class") if mapped else ("{", "}", "class")
+    starts = []
+    depth = 0
+    for m in (_SCAN_BYTES if mapped else _SCAN).finditer(buf):
+        tok = m.group()
+        if tok == lbrace:
+            depth += 1
+        elif tok == rbrace:
+            if depth:
+                depth -= 1
+        elif tok == kw and depth == 0:
+            starts.append(m.start())
+    return starts
+
+
+def split(source, n_chunks, starts=None):
+    """[(inicio, fin)] de hasta n_chunks trozos cortados en inicios de clase; el primero empieza en 0."""
+    size = source.size if isinstance(source, srcmap.MappedSource) else len(source)
+    starts = class_starts(source) if starts is None else starts
+    target = size / max(n_chunks, 1)
+    spans = []
+    lo = 0
+    for s in starts[1:]:  # lo que precede a la primera clase va con ella
+        if s - lo >= target:
+            spans.append((lo, s))
+            lo = s
+    spans.append((lo, size))
+    return spans
+
+
+def worth_it(source, workers=None, tree="none"):
+    """
+    Inicios de clase (class_starts, para pasarlos a parse()) si conviene el
+    parseo en paralelo para el modo tree; si no, None. Devolver los árboles
+    al proceso principal cuesta: el AST (pickle de cada Node) más que lo que
+    ahorra el reparto, así que con "ast"/"both" nunca conviene; la Arena de
+    "parse" (arrays) pide al menos TREE_MIN_WORKERS procesos. Medido con
+    270 KB en un núcleo (solo el costo de repartir y juntar): +0,02 s en
+    none, +0,09 s en parse, +0,41 s en ast y +0,47 s en both, frente a
+    0,14 / 0,28 / 0,29 / 0,45 s del parseo secuencial.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 2 or multiprocessing.current_process().daemon:
+        return None  # un solo núcleo, o ya dentro de un worker (batch.py)
+    if tree in ("ast", "both") or (tree == "parse" and workers < TREE_MIN_WORKERS):
+        return None
+    size = source.size if isinstance(source, srcmap.MappedSource) else len(source)
+    if size < MIN_BYTES:
+        return None
+    starts = class_starts(source)
+    return starts if len(starts) >= MIN_CLASSES else None
+
+
+# ---------------- trabajo por trozo ----------------
+def _init_worker():
+    ll1.get_compiled()
+
+
+def _parse_chunk(job):
+    text, line, col, tree_mode, max_errors, spans, budget = job
+    if isinstance(text, bytes):
+        text = text.decode(srcmap.ENCODING, "replace")
+    errors = []
+    ts = lexer.TokenStream(lexer.iter_ptoks_at(text, line, col), errors, budget)
+    res = parser_ll1.run_parser(ts, tree=tree_mode, max_errors=max_errors, spans=spans)
+    return res, ts.count, ts.lex_count, budget.truncated if budget is not None else None
+
+
+def _jobs(source, chunks, tree_mode, max_errors, spans, budget):
+    copy = (lambda: budget.copy()) if budget is not None else (lambda: None)
+    if isinstance(source, srcmap.MappedSource):
+        for lo, hi in chunks:
+            line, col = source.index.position(lo)
+            yield source.buf[lo:hi], line, col, tree_mode, max_errors, spans, copy()
+        return
+    line, prev = 1, 0
+    for lo, hi in chunks:
+        line += source.count("\n", prev, lo)
+        prev = lo
+        yield source[lo:hi], line, lo - source.rfind("\n", 0, lo), tree_mode, max_errors, spans, copy()
+
+
+def get_pool(workers):
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.terminate()
+            _pool = multiprocessing.Pool(workers, initializer=_init_worker)
+            _pool_size = workers
+            atexit.register(_pool.terminate)
+        return _pool
+
+
+# ---------------- empalme ----------------
+def _spine_end(arena, node):
+    # Prog -> ClassDecl ClassList, ClassList -> ClassDecl ClassList | ε:
+    # el segundo hijo sigue la cadena hasta un nodo sin hijos
+    first, nxt = arena.first, arena.next
+    while first[node] != NONE and nxt[first[node]] != NONE:
+        node = nxt[first[node]]
+    return node
+
+
+def merge(results, budget=None):
+    """
+    [(ParseResult, count, lex_count, truncado)] en orden de fuente ->
+    (ParseResult, Stats). Un trozo truncado se anota en budget y corta el resto.
+    """
+    errors, classes = [], []
+    arena = root = tail = None
+    count = lex_count = 0
+    stopped = cut = False
+    for res, n, n_lex, truncated in results:
+        count += n - 1  # cada trozo termina con su propio '$'
+        lex_count += n_lex
+        if cut:
+            continue
+        if truncated is not None:
+            cut = True
+            if budget is not None:
+                budget.exceed(truncated)
+        if stopped:
+            continue
+        errors.extend(res.errors)
+        stopped = any(e.startswith(STOP_PREFIX) for e in res.errors)
+        if res.tree is not None:
+            if arena is None:
+                arena = type(res.tree.arena)(res.tree.arena.labels)  # Arena o SpanArena
+            prog = arena.absorb(res.tree.arena) + res.tree.i
+            if tail is None:
+                root = prog
+            else:
+                # el ClassList final (ε) del trozo anterior adopta ClassDecl ClassList de este Prog
+                arena.tok[tail] = NONE
+                arena.first[tail] = arena.first[prog]
+            tail = _spine_end(arena, prog)
+        if res.ast is not None:
+            classes.extend(res.ast.children if res.ast.label == "Program" else [res.ast])
+    count += 1
+    if budget is not None and budget.max_errors is not None and len(errors) > budget.max_errors:
+        del errors[budget.max_errors:]
+        budget.exceed("errores")
+    ast = None
+    if not stopped and not cut and classes:
+        ast = classes[0] if len(classes) == 1 else Node("Program", classes)
+    tree = arena.view(root) if arena is not None else None
+    return parser_ll1.ParseResult(tree, ast, errors), Stats(count, lex_count, len(results))
+
+
+def _within_budget(jobs, results, budget):
+    """
+    Aplica max_tokens/max_nodes a la suma de los trozos (cada copia los tiene
+    enteros): el trozo donde la suma pasa el límite se re-parsea aquí con el
+    resto del presupuesto y los siguientes se descartan.
+    """
+    if budget is None or (budget.max_tokens is None and budget.max_nodes is None):
+        return results
+    tokens = nodes = 0
+    for j, (res, n, n_lex, truncated) in enumerate(results):
+        size = len(res.tree.arena) if res.tree is not None else 0
+        over_tokens = budget.max_tokens is not None and tokens + n - 1 > budget.max_tokens
+        over_nodes = budget.max_nodes is not None and nodes + size > budget.max_nodes
+        if over_tokens or over_nodes:
+            if tokens or nodes:
+                b = budget.copy()
+                if b.max_tokens is not None:
+                    b.max_tokens -= tokens
+                if b.max_nodes is not None:
+                    b.max_nodes -= nodes
+                res, n, n_lex, truncated = _parse_chunk(jobs[j][:-1] + (b,))
+            # El reloj de nodos se mira cada CHECK_EVERY tokens: si el trozo
+            # no llegó a cortarse, se corta aquí
+            results[j] = (res, n, n_lex, truncated or ("tokens" if over_tokens else "nodos"))
+            return results[:j + 1]
+        tokens += n - 1
+        nodes += size
+    return results
+
+
+def parse(source, tree="parse", max_errors=None, workers=None, spans=False, budget=None, starts=None):
+    """
+    Parsea source (str o srcmap.MappedSource) repartiendo sus clases entre
+    workers procesos. starts: class_starts(source) si ya se calcularon (p. ej.
+    los que devuelve worth_it). Devuelve (ParseResult, Stats) como
+    run_parser() + TokenStream.
+    """
+    workers = workers or os.cpu_count() or 1
+    if tree not in parser_ll1.TREE_MODES:
+        raise ValueError(f"Modo de árbol desconocido: {tree!r} (opciones: {', '.join(parser_ll1.TREE_MODES)})")
+    chunks = split(source, workers * CHUNKS_PER_WORKER, starts)
+    jobs = list(_jobs(source, chunks, tree, max_errors, spans, budget))
+    if workers < 2 or len(jobs) < 2:
+        return merge(_within_budget(jobs, [_parse_chunk(job) for job in jobs], budget), budget)
+    pool = get_pool(workers)
+    pending = [pool.apply_async(_parse_chunk, (job,)) for job in jobs]
+    results = []
+    for job, p in zip(jobs, pending):
+        try:
+            results.append(p.get())
+        except Exception:
+            # p. ej. un AST demasiado profundo para devolverlo por pickle
+            results.append(_parse_chunk(job))
+    return merge(_within_budget(jobs, results, budget), budget)
+
+
+# ---------------- benchmark ----------------
+def bench(n=400, reps=3):
+    import time
+
+    from bench import gen
+
+    src = gen.classes(n)
+    workers = os.cpu_count() or 1
+    print(f"{n} clases, {len(src)} bytes, {workers} núcleos, mejor de {reps}")
+    for mode in parser_ll1.TREE_MODES:
+        best = {}
+        for name, fn in (("secuencial", lambda: parser_ll1.run_parser(lexer.tokenize(src)[0], tree=mode)),
+                         ("paralelo", lambda: parse(src, mode, workers=max(workers, 2)))):
+            fn()
+            best[name] = min(_timed(fn, time.perf_counter) for _ in range(reps))
+        print(f"{mode:5} secuencial {best['secuencial']:.3f}s  paralelo {best['paralelo']:.3f}s  "
+              f"{best['secuencial'] / best['paralelo']:.2f}x")
+
+
+def _timed(fn, clock):
+    t0 = clock()
+    fn()
+    return clock() - t0
+
+
+if __name__ == "__main__":
+    bench()
@@ -1,70 +1,241 @@
 # parser_ll1.py (reemplazo completo)
-from tree import Node
+from collections import namedtuple
+from tree import Arena, SpanArena
+from ast_actions import action_for
 import ll1
 import grammar
+from recovery import Recovery
+from lexer import TokenStream
+from tokbuf import TERM_NAMES
 
-def parse(tokens, G=None, table=None):
+TREE_MODES = ("none", "parse", "ast", "both")
+ENGINES = ("gen", "table")
+
+ParseResult = namedtuple("ParseResult", ["tree", "ast", "errors"])
+
+ACTION = -1  # marcador de acción semántica en la pila (modo ast/both)
+
+_prep = (None, None)  # (Dense, datos por producción) de la última tabla usada
+
+
+def _prepare(D):
+    """Por producción: ids del lado derecho en orden, tupla de -1 (nodos sin árbol) y acción semántica."""
+    global _prep
+    if _prep[0] is not D:
+        _prep = (D, ([r[::-1] for r in D.prods],
+                     [(-1,) * len(r) for r in D.prods],
+                     [action_for(lhs, rhs) for lhs, rhs in zip(D.lhs, D.rhs)]))
+    return _prep[1]
+
+
+def _drive(ts, D, syms, nodes, arena, vals, rec, build_tree, build_ast, acts=None, cut=None):
     """
-    tokens: lista de PTok(kind, lex, line, col) (ver app.py)
-    G: gramática dict (por defecto grammar.G)
-    table: tabla LL(1) opcional (si no, se calcula aquí)
-    return: (parse_tree_root, syn_errors)
+    Intérprete de tabla: procesa la pila syms/nodes (ids de símbolo / nodos
+    de arena) hasta vaciarla o agotar el presupuesto de errores. Los valores
+    del AST quedan en vals; acts: acciones por producción (por defecto las de
+    _prepare). cut=(X, fn): al llegar X a la cima con fn(ts.pos, len(pila
+    debajo)) verdadero se deja X en la pila y se devuelve True (ver parse_until).
     """
-    G = G or grammar.G
-    # Construir FIRST/FOLLOW y tabla si no la mandan
-    FIRST, FOLLOW = ll1.build_first_follow()
-    M, _conflicts = ll1.build_table(FIRST, FOLLOW)
-
-    stack = [("$", None), (grammar.START, Node(grammar.START))]
-    root = stack[-1][1]
-    i = 0
-    errors = []
-
-    def curr():
-        nonlocal i
-        return tokens[i] if i < len(tokens) else tokens[-1]  # '$' garantizado
-
-    while stack:
-        X, node = stack.pop()
-        a = curr()
-
-        if X == "$":
-            if a.kind == "$":
-                break
+    names, ids, W, cells, prods = D.names, D.ids, D.width, D.cells, D.prods
+    END = W - 1  # '$'; terminales < W <= no-terminales
+    fwd, pads, default_acts = _prepare(D)
+    acts = acts or default_acts
+    cut_sym, cut_at = cut or (-2, None)
+    a = ts.cur
+    t = ids[a.kind]
+
+    while syms and not rec.stopped:
+        X = syms.pop()
+        node = nodes.pop()
+        if X == cut_sym and cut_at(ts.pos, len(syms)):
+            syms.append(X)
+            nodes.append(node)
+            return True
+
+        if X == ACTION:
+            act, n = node
+            if n:
+                args = vals[-n:]
+                del vals[-n:]
             else:
-                errors.append(f"Sintáctico L{a.line} C{a.col}: tokens extra al final '{a.lex}'")
-                i += 1
-                continue
+                args = []
+            vals.append(act(args))
+            continue
+
+        if X == END:
+            if t != END:
+                rec.report(f"Sintáctico L{a.line} C{a.col}: tokens extra al final '{a.lex}'")
+            break
 
         # Terminal
-        if X not in G:
-            if X == a.kind:
-                node.label = X
-                node.children = [Node(f"«{a.lex}»")] if a.lex else [Node(X)]
-                i += 1
-            else:
-                msg = f"Sintáctico L{a.line} C{a.col}: se esperaba '{X}' antes de '{a.lex}'"
-                if X == ";":
-                    msg += " — sugerencia: inserta ';'"
-                errors.append(msg)
+        if X < W:
+            if X == t:
+                if build_tree:
+                    arena.leaf(node, a.lex)
+                if build_ast:
+                    vals.append(a)
+                a = ts.advance()
+                t = ids[a.kind]
+            elif rec.terminal(names[X], a, ts.peek(), ts.pos) == 'delete':
+                a = ts.advance()
+                t = ids[a.kind]
+                syms.append(X)
+                nodes.append(node)
+            elif build_ast:
+                vals.append(None)  # terminal insertado
             continue
 
         # No-terminal
-        entry = M.get(X, {}).get(a.kind)
-        if entry is None:
-            errors.append(f"Sintáctico L{a.line} C{a.col}: no se puede derivar {X} con '{a.lex}'. Saltando hasta sincronizar.")
-            sync = ll1.build_first_follow()[1].get(X, set())  # FOLLOW[X]
-            while a.kind not in sync and a.kind != "$":
-                i += 1
-                a = curr()
+        p = cells[(X - W) * W + t]
+        if p < 0:
+            name = names[X]
+            if rec.nonterminal(name, a, ts.peek(), ts.pos) == 'delete':
+                a = ts.advance()
+                t = ids[a.kind]
+                syms.append(X)
+                nodes.append(node)
+                continue
+            # Modo pánico: saltar hasta SYNC[X] (o hasta algo que inicie X)
+            action = rec.resume(name, a.kind)
+            while action is None or action == 'eat':
+                a = ts.advance()
+                action = rec.resume(name, a.kind)
+            t = ids[a.kind]
+            if action == 'retry':
+                syms.append(X)
+                nodes.append(node)
+            elif build_ast:
+                vals.append(None)  # X abandonado
             continue
 
-        if entry and entry != ["ε"]:
-            children = [Node(sym) for sym in entry]
-            node.children = children
-            for sym, child in reversed(list(zip(entry, children))):
-                stack.append((sym, child))
+        rhs = prods[p]
+        if rhs:
+            if build_ast:
+                syms.append(ACTION)
+                nodes.append((acts[p], len(rhs)))
+            syms.extend(rhs)
+            if build_tree:
+                nodes.extend(reversed(arena.expand_ids(node, fwd[p])))
+            else:
+                nodes.extend(pads[p])
         else:
-            node.children = [Node("ε")]
+            if build_tree:
+                arena.epsilon(node)
+            if build_ast:
+                vals.append(acts[p]([]))
+
+
+def parse(tokens, G=None, table=None, max_errors=None, errors=None, start=None, spans=False):
+    """
+    tokens: lista de PTok(kind, lex, line, col) o un lexer.TokenStream
+            (p. ej. TokenStream(lexer.iter_ptoks(src))) del que se tira token a token
+    G: gramática (grammar.Grammar, por defecto grammar.DEFAULT; se admite
+       también un dict de producciones junto con su table)
+    table: tabla LL(1) opcional (si no, se usa la compilada de ll1.get_compiled(G))
+    max_errors: presupuesto de errores sintácticos (ver recovery.DEFAULT_MAX_ERRORS)
+    errors: lista donde acumular errores (compartida con el flujo de tokens)
+    start: símbolo inicial (por defecto el de la gramática)
+    spans: guardar línea/columna de cada terminal (tree.SpanArena; lo usa explorer.py)
+    return: (parse_tree_root, syn_errors); la raíz es un tree.NodeView sobre una
+            tree.Arena (misma interfaz que Node: label, children, to_dot...)
+    """
+    res = run_parser(tokens, G, table, max_errors, errors, start, tree="parse", spans=spans)
+    return res.tree, res.errors
+
+
+def parse_until(ts, syms, nodes, arena, rec, X, cut):
+    """
+    Sigue un parseo de árbol (intérprete de tabla, gramática por defecto) con
+    la pila ya armada: syms son nombres de símbolo desde el fondo y nodes sus
+    nodos de arena (-1 para '$'). Corta cuando X llega a la cima y
+    cut(pos, profundidad) es verdadero (profundidad: símbolos debajo de X);
+    entonces devuelve True con X en la cima. Sin corte sigue hasta vaciar la
+    pila o agotar rec. syms/nodes quedan con lo que falta (incremental.py).
+    """
+    D = ll1.get_compiled().dense
+    stack = [D.ids[s] for s in syms]
+    done = _drive(ts, D, stack, nodes, arena, [], rec, True, False, cut=(D.ids[X], cut))
+    syms[:] = [D.names[s] for s in stack]
+    return bool(done)
+
+
+def run_parser(tokens, G=None, table=None, max_errors=None, errors=None, start=None, tree="parse",
+               engine="gen", spans=False, budget=None, actions=None):
+    """
+    Igual que parse(), eligiendo qué árboles construir:
+      tree="none"  solo diagnósticos
+      tree="parse" árbol de derivación (Arena)
+      tree="ast"   AST vía las acciones semánticas de ast_actions.ACTIONS
+      tree="both"  ambos
+    engine="gen" usa el parser especializado de ll1gen (mismo árbol y mismos
+    errores; solo con la tabla compilada), "table" el intérprete de tabla.
+    spans=True guarda la posición de cada terminal del árbol (tree.SpanArena).
+    budget: budget.Budget (o el del TokenStream recibido); al agotarse el
+            análisis termina con lo construido y budget.truncated dice por qué.
+    actions: {(lhs, rhs): fn} que reemplaza acciones de ast_actions.ACTIONS
+             en este parseo (p. ej. semantic.ClassStream).
+    return: ParseResult(tree, ast, errors) (None en lo que no se pidió; ast
+            también es None si el presupuesto de errores cortó el análisis)
+    """
+    if tree not in TREE_MODES:
+        raise ValueError(f"Modo de árbol desconocido: {tree!r} (opciones: {', '.join(TREE_MODES)})")
+    build_tree = tree in ("parse", "both")
+    build_ast = tree in ("ast", "both")
+
+    G = G or grammar.DEFAULT
+    compiled = ll1.get_compiled(G if isinstance(G, grammar.Grammar) else None)
+    # Tabla densa con símbolos enteros (ll1.Dense): la compilada, o la que nos
+    # pasen convertida al vuelo; la recuperación usa FOLLOW/SYNC de la
+    # gramática de esa tabla
+    own = table is None or table is compiled.table
+    if not own:
+        compiled = ll1.compile_table(table, G, start)
+    D = compiled.dense
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de parser desconocido: {engine!r} (opciones: {', '.join(ENGINES)})")
+
+    ts = tokens if isinstance(tokens, TokenStream) else TokenStream(tokens, errors, budget)
+    if D.names[:D.width] != TERM_NAMES:
+        # Otra gramática: los tipos de token que no son terminales suyos
+        # quedan como errores léxicos 'no mapeado' (ver lexer.token_map)
+        ts.restrict(frozenset(D.names[:D.width]))
+    errors = ts.errors
+    budget = ts.budget
+    start = start or (G.start if isinstance(G, grammar.Grammar) else grammar.START)
+    arena = (SpanArena(D.names, ts) if spans else Arena(D.names)) if build_tree else None
+    root = arena.add(start) if build_tree else -1
+    if budget is not None:
+        budget.arena = arena
+    vals = []  # pila de valores semánticos (modo ast)
+    rec = Recovery(compiled, errors, max_errors, budget)
+    acts = _prepare(D)[2]
+    if actions:
+        acts = [actions.get((lhs, tuple(rhs)), act) for lhs, rhs, act in zip(D.lhs, D.rhs, acts)]
+
+    gen = None
+    if engine == "gen" and own:
+        import ll1gen  # parser especializado generado desde la gramática
+        gen = ll1gen.load(compiled)
+    if gen is not None:
+        # Descenso recursivo generado; los subárboles muy anidados vuelven al
+        # intérprete de tabla (deep) para no agotar la pila de Python
+        def deep(X, node):
+            _drive(ts, D, [X], [node], arena, vals, rec, build_tree, build_ast, acts)
+            return vals.pop() if build_ast and not rec.stopped else None
+        value = gen.run(build_tree, build_ast)(ts, rec, arena, acts, deep, start, root)
+        if build_ast and not rec.stopped:
+            vals.append(value)
+    else:
+        _drive(ts, D, [D.width - 1, D.ids[start]], [-1, root], arena, vals, rec, build_tree, build_ast, acts)
 
-    return root, errors
+    # Volcar los errores léxicos que queden tras el último token analizado
+    # (salvo si se agotó el presupuesto de errores: el informe acaba ahí)
+    if not rec.stopped:
+        ts.drain()
+    if spans and build_tree:
+        arena.tokens = None  # ya no hace falta (y así la Arena se puede enviar entre procesos)
+    if budget is not None:
+        budget.arena = None
+    root = arena.view(0) if build_tree else None
+    ast = vals[-1] if build_ast and not rec.stopped and vals else None
+    return ParseResult(root, ast, errors)
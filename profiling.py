@@ -0,0 +1,149 @@
+# profiling.py
+# Perfilado opcional de un análisis: llamadas (cProfile) y memoria
+# (tracemalloc) por fase, para adjuntar a un reporte de lentitud.
+#
+#   prof = profiling.Profile()
+#   res = analyzer.analyze(fuente, "ast", profile=prof)
+#   res["perfil"]                    # JSON: por fase, tiempo, módulos, funciones, memoria
+#   prof.dump("perfil.pstats")       # para pstats / snakeviz
+#
+# Cada fase (grammar: ll1; parse: lexer + parser_ll1, que van intercalados
+# en flujo; semantic; dot: serialización de tree) tiene su propio
+# cProfile.Profile, así que el desglose por módulo (lexer.py, parser_ll1.py...)
+# separa lo que en el tiempo de pared va junto. De memoria se mide el pico
+# durante la fase (tracemalloc.reset_peak) y los sitios que más asignaron y
+# siguen vivos al terminarla (diferencia de snapshots).
+#
+# tracemalloc es global al proceso: los análisis perfilados se serializan con
+# un lock. El parseo por trozos en workers (parallel.py) no queda perfilado.
+
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+TOP_FUNCTIONS = 15
+TOP_MODULES = 8
+TOP_ALLOCS = 10
+
+_LOCK = threading.Lock()
+# Las trazas del propio perfilador no cuentan como sitios de asignación
+_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib.*>"))
+
+
+def _where(filename, line, func):
+    return func if filename == "~" else f"{os.path.basename(filename)}:{line}({func})"
+
+
+class Profile:
+    """Perfil de un análisis: una entrada por fase, en orden de ejecución."""
+
+    def __init__(self, top=TOP_FUNCTIONS, top_allocs=TOP_ALLOCS):
+        self.top = top
+        self.top_allocs = top_allocs
+        self.phases = []       # (nombre, segundos, cProfile.Profile, pico, neto, sitios)
+        self._own_tracing = False
+        self._t0 = None
+        self.seconds = 0.0
+
+    def start(self):
+        _LOCK.acquire()
+        self._own_tracing = not tracemalloc.is_tracing()
+        if self._own_tracing:
+            tracemalloc.start()
+        self._t0 = time.perf_counter()
+        return self
+
+    def stop(self):
+        self.seconds = time.perf_counter() - self._t0
+        if self._own_tracing:
+            tracemalloc.stop()
+        _LOCK.release()
+
+    @contextmanager
+    def phase(self, name):
+        """Perfila el bloque como la fase name (una fase repetida se agrega)."""
+        before = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        prof = cProfile.Profile()
+        t0 = time.perf_counter()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            dt = time.perf_counter() - t0
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+            sites = [(f"{os.path.basename(d.traceback[0].filename)}:{d.traceback[0].lineno}", d.size_diff, d.count_diff)
+                     for d in after.compare_to(before, "lineno")[:self.top_allocs] if d.size_diff > 0]
+            self.phases.append((name, dt, prof, peak - base, current - base, sites))
+
+    def stats(self):
+        """pstats.Stats con todas las fases juntas (None si no se perfiló nada)."""
+        out = None
+        for _name, _dt, prof, *_ in self.phases:
+            if out is None:
+                out = pstats.Stats(prof)
+            else:
+                out.add(prof)
+        return out
+
+    def dump(self, path):
+        """Escribe el perfil en formato .pstats (marshal de pstats)."""
+        st = self.stats()
+        if st is None:
+            st = pstats.Stats()     # vacío (Stats de un Profile sin datos falla)
+        st.dump_stats(path)
+
+    def report(self):
+        """Resumen serializable a JSON: total y, por fase, módulos, funciones y memoria."""
+        phases = []
+        for name, dt, prof, peak, net, sites in self.phases:
+            st = pstats.Stats(prof).stats   # (archivo, línea, función) -> (cc, nc, tt, ct, callers)
+            modules = {}
+            calls = 0
+            for (filename, _line, _func), (_cc, nc, tt, _ct, _callers) in st.items():
+                mod = "(builtins)" if filename == "~" else os.path.basename(filename)
+                modules[mod] = modules.get(mod, 0.0) + tt
+                calls += nc
+            funcs = sorted(st.items(), key=lambda kv: kv[1][2], reverse=True)[:self.top]
+            phases.append({
+                "phase": name,
+                "seconds": round(dt, 6),
+                "calls": calls,
+                "modules": [{"module": m, "tottime": round(t, 6)}
+                            for m, t in sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:TOP_MODULES]],
+                "functions": [{"function": _where(*k), "ncalls": nc, "tottime": round(tt, 6), "cumtime": round(ct, 6)}
+                              for k, (_cc, nc, tt, ct, _callers) in funcs],
+                "mem_peak": peak,
+                "mem_net": net,
+                "allocs": [{"site": s, "bytes": b, "count": c} for s, b, c in sites],
+            })
+        return {"seconds": round(self.seconds, 6), "phases": phases}
+
+    def summary_lines(self):
+        """Líneas para la consola: por fase, tiempo, pico de memoria y lo más caro."""
+        lines = [f"Perfil ({self.seconds * 1000:.1f} ms con cProfile + tracemalloc):"]
+        for ph in self.report()["phases"]:
+            mods = ", ".join(f"{m['module']} {m['tottime'] * 1000:.1f} ms" for m in ph["modules"][:3])
+            lines.append(f"  {ph['phase']}: {ph['seconds'] * 1000:.1f} ms, {ph['calls']} llamadas, "
+                         f"pico {ph['mem_peak'] / 1024:.0f} KiB · {mods}")
+            if ph["functions"]:
+                f = ph["functions"][0]
+                lines.append(f"    más costosa: {f['function']} ({f['tottime'] * 1000:.1f} ms en {f['ncalls']} llamadas)")
+            if ph["allocs"]:
+                a = ph["allocs"][0]
+                lines.append(f"    más memoria: {a['site']} (+{a['bytes'] / 1024:.0f} KiB en {a['count']} bloques)")
+        return lines
+
+
+def phase(profile, name):
+    """profile.phase(name), o nada si no se perfila (profile None)."""
+    return profile.phase(name) if profile is not None else nullcontext()
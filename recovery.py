@@ -0,0 +1,125 @@
+# recovery.py
+# Recuperación de errores para parser_ll1 con coste acotado.
+#  - Conjuntos de sincronización precalculados: FOLLOW[X] + anclas (';', '}', '$').
+#  - Reparaciones a nivel de frase: insertar el terminal esperado o borrar el
+#    token actual, eligiendo la de menor coste.
+#  - Errores en cascada: tras un error, los siguientes a menos de QUIET_TOKENS
+#    tokens se reparan en silencio (como la regla de 3 tokens de yacc).
+#  - Presupuesto de errores: al agotarse el análisis se detiene limpiamente.
+#    Con un budget.Budget también se detiene (sin más mensajes) cuando el
+#    presupuesto corta el flujo de tokens o se llega a su max_errors.
+
+END = '$'
+
+# Anclas de sentencia y de bloque: siempre sincronizan
+ANCHORS = frozenset({';', '}'})
+
+# Coste de insertar un terminal que falta (por defecto INSERT_COST)
+INSERT_COST = 2
+INSERT_COSTS = {';': 1, ')': 1, '}': 1, ',': 2, 'id': 3, 'number': 3}
+# Coste de borrar el token actual
+DELETE_COST = 2
+
+DEFAULT_MAX_ERRORS = 50
+QUIET_TOKENS = 3
+# Inicio del mensaje con que se corta el análisis al agotar el presupuesto
+STOP_PREFIX = "Sintáctico: demasiados errores"
+
+
+def build_sync_sets(FOLLOW):
+    """SYNC[X] = FOLLOW[X] ∪ anclas ∪ {'$'} para cada no-terminal."""
+    return {A: frozenset(f | ANCHORS | {END}) for A, f in FOLLOW.items()}
+
+
+def insert_cost(term):
+    return INSERT_COSTS.get(term, INSERT_COST)
+
+
+class Recovery:
+    """
+    Estado de recuperación de una corrida de parse().
+    errors: lista compartida con el parser (los mensajes salen en orden).
+    stopped: True cuando se agotó el presupuesto de errores.
+    budget: budget.Budget opcional (compartido con el TokenStream).
+    """
+
+    def __init__(self, compiled, errors, max_errors=None, budget=None):
+        self.table = compiled.table
+        self.FOLLOW = compiled.FOLLOW
+        self.sync = compiled.sync
+        self.errors = errors
+        self.max_errors = DEFAULT_MAX_ERRORS if max_errors is None else max_errors
+        self.count = 0
+        self.cost = 0
+        self.quiet_until = -1
+        self.stopped = False
+        self.budget = budget
+
+    def report(self, msg, cost=1, pos=None):
+        """
+        Registra un error en la posición de token pos (None: siempre se reporta).
+        Devuelve False si ya no queda presupuesto.
+        """
+        self.cost += cost
+        b = self.budget
+        if b is not None and (b.truncated not in (None, "errores") or not b.room(len(self.errors))):
+            # El '$' puede ser el corte del presupuesto: nada que reportar
+            self.stopped = True
+            return False
+        if pos is not None:
+            quiet = pos < self.quiet_until
+            self.quiet_until = pos + QUIET_TOKENS
+            if quiet:
+                return True
+        self.count += 1
+        self.errors.append(msg)
+        if self.max_errors and self.count >= self.max_errors:
+            self.errors.append(f"{STOP_PREFIX} ({self.count}); análisis detenido.")
+            self.stopped = True
+        return not self.stopped
+
+    # ---- terminal esperado X, llega a ----
+    def terminal(self, X, a, nxt, pos=None):
+        """
+        Reparación de frase ante un terminal que no coincide.
+        Devuelve 'delete' (descartar a) o 'insert' (suponer X presente).
+        """
+        if nxt is not None and nxt.kind == X and a.kind != '$' and DELETE_COST <= insert_cost(X):
+            self.report(f"Sintáctico L{a.line} C{a.col}: token inesperado '{a.lex}' antes de '{X}' — se descarta",
+                        DELETE_COST, pos)
+            return 'delete'
+        msg = f"Sintáctico L{a.line} C{a.col}: se esperaba '{X}' antes de '{a.lex}'"
+        if X == ";":
+            msg += " — sugerencia: inserta ';'"
+        self.report(msg, insert_cost(X), pos)
+        return 'insert'
+
+    # ---- no-terminal X sin entrada para a ----
+    def nonterminal(self, X, a, nxt, pos=None):
+        """
+        Devuelve 'delete' si borrar a deja una entrada válida para el siguiente
+        token; si no, 'panic' (el parser salta hasta SYNC[X] o FIRST(X)).
+        """
+        row = self.table.get(X, {})
+        if nxt is not None and a.kind != '$' and nxt.kind in row:
+            self.report(f"Sintáctico L{a.line} C{a.col}: token inesperado '{a.lex}' en {X} — se descarta",
+                        DELETE_COST, pos)
+            return 'delete'
+        self.report(f"Sintáctico L{a.line} C{a.col}: no se puede derivar {X} con '{a.lex}'. Saltando hasta sincronizar.",
+                    1, pos)
+        return 'panic'
+
+    def resume(self, X, kind):
+        """
+        Tras saltar tokens en modo pánico: 'retry' si kind puede iniciar X,
+        'eat' si kind es ';' (fin de sentencia) que no pertenece a FOLLOW[X]:
+        se consume y se sigue buscando; 'pop' si kind sincroniza; None si hay
+        que seguir saltando.
+        """
+        if kind in self.table.get(X, ()):
+            return 'retry'
+        if kind in self.sync.get(X, ()):
+            if kind == ';' and ';' not in self.FOLLOW.get(X, ()):
+                return 'eat'
+            return 'pop'
+        return None
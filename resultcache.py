@@ -0,0 +1,178 @@
+# resultcache.py
+# Caché LRU de resultados de analyzer.analyze(), acotada por bytes.
+#
+# Clave: hash de (huella de la gramática, formato, modo de árbol, fuente). Se guardan
+# solo las partes serializables del resultado (sin parse_tree/ast), con su
+# tamaño estimado; al superar max_bytes se expulsa lo menos usado. Con
+# disk_dir hay un segundo nivel en disco (un pickle por clave, como
+# ll1._store) que sobrevive a reinicios y se poda por bytes igual que la
+# memoria.
+
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import ll1
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_MAX_BYTES = 512 * 1024 * 1024
+DISK_PRUNE_EVERY = 64           # escrituras a disco entre podas
+UNCACHED_KEYS = ("parse_tree", "ast")  # objetos de árbol: no se cachean
+RESULT_FORMAT = 2   # subirlo cuando cambia lo que analyze() devuelve (invalida el disco)
+
+
+def result_key(source, tree_mode="both"):
+    """source: str o srcmap.MappedSource (se hashean sus bytes sin copiarlos)."""
+    h = hashlib.sha256(f"{ll1.grammar_fingerprint()}\0{RESULT_FORMAT}\0{tree_mode}\0".encode())
+    h.update(source.encode("utf-8", "surrogatepass") if isinstance(source, str) else source.buf)
+    return h.hexdigest()
+
+
+def estimate_size(value):
+    """Bytes aproximados de un resultado (strings, listas, tuplas, dicts)."""
+    size = 0
+    stack = [value]
+    while stack:
+        v = stack.pop()
+        size += sys.getsizeof(v)
+        if isinstance(v, dict):
+            stack.extend(v.keys())
+            stack.extend(v.values())
+        elif isinstance(v, (list, tuple)):
+            stack.extend(v)
+    return size
+
+
+class ResultCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None, disk_max_bytes=DEFAULT_DISK_MAX_BYTES,
+                 sizeof=estimate_size):
+        # sizeof(valor) -> bytes; p. ej. explorer.TreeIndex.nbytes para valores que no son dicts
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._items = OrderedDict()   # clave -> (valor, bytes)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._disk_writes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        """Valor cacheado (memoria y luego disco) o None."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[0]
+        value = self._disk_load(key) if self.disk_dir else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._insert(key, value)
+        return value
+
+    def put(self, key, value):
+        """Guarda value (dict de resultado); las claves de UNCACHED_KEYS se descartan."""
+        if isinstance(value, dict):
+            value = {k: v for k, v in value.items() if k not in UNCACHED_KEYS}
+        with self._lock:
+            self._insert(key, value)
+        if self.disk_dir:
+            self._disk_store(key, value)
+        return value
+
+    def _insert(self, key, value):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return  # no cabe nunca: solo disco
+        self._items[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _k, (_v, s) = self._items.popitem(last=False)
+            self.bytes -= s
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._items),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # ---------------- nivel en disco ----------------
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pickle")
+
+    def _disk_load(self, key):
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)  # último uso, para la poda
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return None
+        return value
+
+    def _disk_store(self, key, value):
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            path = self._disk_path(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:
+            return  # sin disco: seguimos solo en memoria
+        self._disk_writes += 1
+        if self._disk_writes % DISK_PRUNE_EVERY == 0:
+            self.prune_disk()
+
+    def prune_disk(self):
+        """Borra los pickles menos usados hasta caber en disk_max_bytes."""
+        try:
+            entries = [(e.stat().st_mtime, e.stat().st_size, e.path)
+                       for e in os.scandir(self.disk_dir) if e.name.endswith(".pickle")]
+        except OSError:
+            return 0
+        total = sum(size for _t, size, _p in entries)
+        removed = 0
+        for _t, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,170 @@
+# scanner.py
+# Motor de lexer dirigido por tabla (Lexer(..., engine="dfa")).
+# Una tabla precalculada clase-de-carácter -> acción decide el tipo de token
+# por el primer carácter; las corridas (identificadores, números, espacios,
+# comentarios) se consumen con patrones anclados simples. Emite directamente
+# ids de terminal de la gramática (tokbuf.TERM_ID), sin pasar por los nombres
+# intermedios del motor regex.
+#
+# Reproduce exactamente los tokens, posiciones y errores de lexer.MASTER.
+
+import re
+
+from grammar import TOK_TO_TERM
+from lexer import RESERVED, SYMBOL_NAMES, OP_NAMES, error_text
+from tokbuf import TERM_ID, END_ID
+
+# ---- códigos emitidos ----
+# >= 0: id de terminal de la gramática
+# <  0: tipo reconocido pero fuera de la gramática (-(1+i) en OTHER_KINDS)
+OTHER_KINDS = sorted({k for k in RESERVED.values() if k not in TOK_TO_TERM} | {"STRING", "OP", "SYMBOL", "ERROR"})
+OTHER_CODE = {k: -(1 + i) for i, k in enumerate(OTHER_KINDS)}
+ERROR = OTHER_CODE["ERROR"]
+
+# Nombre de tipo (como en lexer.Token.typ.name) para cada código
+CODE_NAME = {TERM_ID[t]: k for k, t in TOK_TO_TERM.items()}
+CODE_NAME.update({c: k for k, c in OTHER_CODE.items()})
+CODE_NAME[END_ID] = "EOF"
+
+
+def _code(kind):
+    term = TOK_TO_TERM.get(kind)
+    return TERM_ID[term] if term is not None else OTHER_CODE[kind]
+
+
+# lexema -> código para palabras, operadores y símbolos
+WORD_CODE = {w: _code(k) for w, k in RESERVED.items()}
+_ID = _code("ID")
+_NUM = _code("NUM")
+_STRING = _code("STRING")
+OPS2 = ("==", "!=", "<=", ">=", "++", "--", "&&", "||")
+OP_CODE = {op: _code(OP_NAMES.get(op, "OP")) for op in tuple("+-*/=<>&|!")}
+OP2_CODE = {op: _code(OP_NAMES.get(op, "OP")) for op in OPS2}
+SYM_CODE = {ch: _code(SYMBOL_NAMES.get(ch, "SYMBOL")) for ch in "(){};,."}
+
+# ---- tabla de acciones por clase de carácter (ASCII) ----
+A_ERR, A_WS, A_NL, A_ID, A_NUM, A_SLASH, A_STR, A_OP, A_OP2, A_SYM = range(10)
+
+ACTION = [A_ERR] * 128
+for _c in " \t":
+    ACTION[ord(_c)] = A_WS
+ACTION[ord("\n")] = A_NL
+for _c in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz_":
+    ACTION[ord(_c)] = A_ID
+for _c in "0123456789":
+    ACTION[ord(_c)] = A_NUM
+ACTION[ord("/")] = A_SLASH
+ACTION[ord('"')] = A_STR
+for _c in "*":
+    ACTION[ord(_c)] = A_OP
+for _c in "+-=<>&|!":
+    ACTION[ord(_c)] = A_OP2       # pueden formar operador de 2 caracteres
+for _c in SYM_CODE:
+    ACTION[ord(_c)] = A_SYM
+
+_ws = re.compile(r"[ \t]+")
+_id = re.compile(r"[A-Za-z_][A-Za-z_0-9]*")
+_num = re.compile(r"[0-9]+")
+_comment1 = re.compile(r"//[^\n]*")
+_comment2 = re.compile(r"/\*[\s\S]*?\*/")
+_string = re.compile(r"\"(\\.|[^\"\\])*\"", re.DOTALL)
+
+
+def error_message(code, lex, line, col):
+    """Mensaje de error léxico para un código negativo (igual que el motor regex)."""
+    if code == ERROR:
+        return error_text(lex, line, col)
+    return f"Token '{CODE_NAME[code]}' no mapeado en la gramática (L{line}, C{col})"
+
+
+def scan(src, pos=0, line=1, col=1):
+    """
+    Genera (código, inicio, fin, línea, columna) por token, terminando con
+    (END_ID, len, len, línea, columna). Espacios y comentarios no se emiten.
+    pos/line/col permiten reanudar desde el inicio de un token ya conocido.
+    """
+    action = ACTION
+    word_code, op_code, op2_code, sym_code = WORD_CODE, OP_CODE, OP2_CODE, SYM_CODE
+    ws_match, id_match, num_match = _ws.match, _id.match, _num.match
+    n = len(src)
+    while pos < n:
+        ch = src[pos]
+        o = ord(ch)
+        act = action[o] if o < 128 else A_ERR
+
+        if act == A_ID:
+            end = id_match(src, pos).end()
+            code = word_code.get(src[pos:end], _ID)
+        elif act == A_WS:
+            end = ws_match(src, pos).end()
+            col += end - pos
+            pos = end
+            continue
+        elif act == A_NL:
+            pos += 1
+            line += 1
+            col = 1
+            continue
+        elif act == A_SYM:
+            end = pos + 1
+            code = sym_code[ch]
+        elif act == A_NUM:
+            end = num_match(src, pos).end()
+            code = _NUM
+        elif act == A_OP2:
+            two = src[pos:pos + 2]
+            if two in op2_code:
+                end = pos + 2
+                code = op2_code[two]
+            else:
+                end = pos + 1
+                code = op_code[ch]
+        elif act == A_OP:
+            end = pos + 1
+            code = op_code[ch]
+        elif act == A_SLASH:
+            nxt = src[pos + 1:pos + 2]
+            m = _comment1.match(src, pos) if nxt == "/" else (_comment2.match(src, pos) if nxt == "*" else None)
+            if m is not None:
+                end = m.end()
+                nl = src.count("\n", pos, end)
+                if nl:
+                    line += nl
+                    col = end - src.rfind("\n", pos, end)
+                else:
+                    col += end - pos
+                pos = end
+                continue
+            end = pos + 1
+            code = op_code["/"]
+        elif act == A_STR:
+            m = _string.match(src, pos)
+            if m is None:
+                end = pos + 1
+                code = ERROR
+            else:
+                end = m.end()
+                code = _STRING
+                nl = src.count("\n", pos, end)
+                if nl:  # cadena de varias líneas
+                    yield code, pos, end, line, col
+                    line += nl
+                    col = end - src.rfind("\n", pos, end)
+                    pos = end
+                    continue
+        else:
+            # Corrida de caracteres sin acción: un solo error (como lexer.MASTER)
+            end = pos + 1
+            while end < n:
+                c = src[end]
+                oc = ord(c)
+                if oc < 128 and action[oc] != A_ERR:
+                    break
+                end += 1
+            code = ERROR
+
+        yield code, pos, end, line, col
+        col += end - pos
+        pos = end
+
+    yield END_ID, n, n, line, col
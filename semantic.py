@@ -0,0 +1,307 @@
+# semantic.py
+# Análisis semántico sobre el AST (parser_ll1.run_parser(..., tree="ast");
+# los nodos con nombre guardan su token, ver ast_actions).
+#
+#   errores = semantic.check(res.ast)  # ["Semántico L5 C9: variable 'z' no declarada", ...]
+#
+# Si el AST no hace falta después, ClassStream revisa cada clase al
+# reducirse durante el parseo y la descarta.
+#
+# Por clase: un recorrido de los miembros arma la firma (campos y métodos con
+# su aridad) y luego cada método se recorre una vez, en orden de fuente
+# (preorden del AST), resolviendo nombres contra una tabla plana: los
+# identificadores se internan a enteros y cada id tiene a lo sumo un enlace
+# visible con su nivel (clase, método, bloque); al salir de un nivel se
+# deshacen sus declaraciones con un registro de deshacer. Los métodos tienen
+# su propio espacio de nombres (como en Java, un campo y un método pueden
+# llamarse igual).
+#
+# Los errores de cada método se cachean por (firma de la clase, forma del
+# subárbol del método: etiquetas y aridad en preorden) con la posición como
+# índice del nodo en ese preorden: tras editar un fuente solo se vuelven a
+# revisar los métodos que cambiaron (o todos los de una clase cuya firma
+# cambió).
+
+import hashlib
+from collections import namedtuple
+
+import metrics
+from ast_actions import ACTIONS
+from resultcache import ResultCache
+
+DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+
+CLASS, METHOD, BLOCK = 0, 1, 2  # niveles de la tabla de símbolos
+
+Symbol = namedtuple("Symbol", ["kind", "type", "arity", "tok"])  # tok: token que lo declara
+
+METHOD_CACHE = ResultCache(DEFAULT_CACHE_BYTES)
+
+_CLASS_DECL = ("ClassDecl", ("class", "id", "{", "MemberList", "}"))
+
+
+class Interner:
+    """Nombre -> id entero (el mismo id para el mismo nombre en todo el árbol)."""
+    __slots__ = ("ids", "names")
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def __call__(self, name):
+        i = self.ids.get(name)
+        if i is None:
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+
+class Scopes:
+    """
+    Tabla de símbolos plana: un enlace por id (nivel, Symbol) y, por nivel
+    abierto, la lista de (id, enlace anterior) para restaurarlo al salir.
+    """
+    __slots__ = ("binding", "undo")
+
+    def __init__(self):
+        self.binding = {}
+        self.undo = []
+
+    @property
+    def level(self):
+        return len(self.undo) - 1
+
+    def enter(self):
+        self.undo.append([])
+
+    def exit(self):
+        binding = self.binding
+        for ident, prev in reversed(self.undo.pop()):
+            if prev is None:
+                del binding[ident]
+            else:
+                binding[ident] = prev
+
+    def declare(self, ident, sym):
+        self.undo[-1].append((ident, self.binding.get(ident)))
+        self.binding[ident] = (self.level, sym)
+
+    def lookup(self, ident):
+        """(nivel, Symbol) visible para ident, o None."""
+        return self.binding.get(ident)
+
+
+def _split(label):
+    """'Method int f' -> ('Method', ['int', 'f']); '?' (recuperación) cuenta como None."""
+    kind, *rest = label.split(" ")
+    return kind, [None if r == "?" else r for r in rest]
+
+
+def _preorder(root):
+    """[(nodo, índice del padre)] en orden de fuente (preorden del AST)."""
+    out = []
+    stack = [(root, -1)]
+    while stack:
+        n, parent = stack.pop()
+        i = len(out)
+        out.append((n, parent))
+        stack.extend((c, i) for c in reversed(n.children))
+    return out
+
+
+class _Checker:
+    def __init__(self, cache):
+        self.cache = cache
+        self.intern = Interner()
+        self.checked = self.reused = 0
+
+    # ---------------- clases ----------------
+    def check(self, root):
+        """[(token, mensaje)] de un Program o una Class (sin ordenar)."""
+        errors = []
+        classes = root.children if root.label == "Program" else [root]
+        seen = set()
+        for c in classes:
+            self.check_class_node(c, seen, errors)
+        return errors
+
+    def check_class_node(self, c, seen, errors):
+        # seen: ids de las clases ya vistas (para 'ya declarada')
+        kind, rest = _split(c.label)
+        if kind != "Class":
+            return
+        name = rest[0] if rest else None
+        if name is not None:
+            ident = self.intern(name)
+            if ident in seen:
+                errors.append((c.tok, f"clase '{name}' ya declarada"))
+            seen.add(ident)
+        self.check_class(name or "?", c.children, errors)
+
+    def messages(self, errors):
+        """Mensajes 'Semántico L<línea> C<col>: ...' en orden de fuente."""
+        metrics.count("semantic", "methods_checked", self.checked)
+        metrics.count("semantic", "methods_cached", self.reused)
+        errors = sorted(errors, key=lambda e: (e[0].line, e[0].col) if e[0] is not None else (0, 0))
+        return [f"Semántico L{tok.line} C{tok.col}: {msg}" if tok is not None else f"Semántico: {msg}"
+                for tok, msg in errors]
+
+    def check_class(self, cname, members, errors):
+        scopes = Scopes()
+        scopes.enter()  # CLASS
+        methods = {}
+        bodies = []
+        sig = []
+        for m in members:
+            kind, rest = _split(m.label)
+            if kind not in ("Method", "Field") or len(rest) != 2 or rest[1] is None:
+                continue
+            typ, name = rest
+            ident = self.intern(name)
+            if kind == "Method":
+                params = m.children[0].children if m.children else []
+                if ident in methods:
+                    errors.append((m.tok, f"método '{name}' ya declarado en la clase '{cname}'"))
+                else:
+                    methods[ident] = Symbol("method", typ, len(params), m.tok)
+                if len(m.children) == 2:  # Params Block
+                    bodies.append((m, typ, name))
+                sig.append(f"m {typ} {name} {len(params)}")
+            else:
+                if scopes.lookup(ident) is not None:
+                    errors.append((m.tok, f"campo '{name}' ya declarado en la clase '{cname}'"))
+                else:
+                    scopes.declare(ident, Symbol("field", typ, 0, m.tok))
+                if typ == "void":
+                    errors.append((m.tok, f"el campo '{name}' no puede ser de tipo void"))
+                sig.append(f"f {typ} {name}")
+        sig = hashlib.sha256("\n".join(sig).encode("utf-8", "surrogatepass")).hexdigest()
+
+        for m, typ, name in bodies:
+            nodes = _preorder(m)
+            h = hashlib.sha256(sig.encode())
+            h.update("\0".join(f"{n.label}\1{len(n.children)}" for n, _p in nodes).encode("utf-8", "surrogatepass"))
+            key = h.hexdigest()
+            found = self.cache.get(key) if self.cache is not None else None
+            if found is not None:
+                self.reused += 1
+            else:
+                self.checked += 1
+                found = self.check_method(scopes, methods, typ, name, nodes)
+                if self.cache is not None:
+                    self.cache.put(key, found)
+            errors.extend((nodes[i][0].tok, msg) for i, msg in found)
+        scopes.exit()
+
+    # ---------------- métodos ----------------
+    def check_method(self, scopes, methods, rtype, mname, nodes):
+        """[(índice en nodes, mensaje)]: nodes es el preorden del método (ver _preorder)."""
+        errors = []
+        block = -1  # índice del Block: sus hijos directos son sentencias
+        scopes.enter()  # METHOD
+
+        def use(i, name):
+            if name is None:
+                return
+            ident = self.intern(name)
+            if scopes.lookup(ident) is None:
+                msg = f"'{name}' es un método, no una variable" if ident in methods \
+                    else f"variable '{name}' no declarada"
+                errors.append((i, msg))
+
+        for i, (n, parent) in enumerate(nodes):
+            kind, rest = _split(n.label)
+            if kind == "Param":
+                typ, name = rest
+                if name is None:
+                    continue
+                ident = self.intern(name)
+                b = scopes.lookup(ident)
+                if b is not None and b[0] == METHOD:
+                    errors.append((i, f"parámetro '{name}' repetido en '{mname}'"))
+                else:
+                    scopes.declare(ident, Symbol("param", typ, 0, n.tok))
+                if typ == "void":
+                    errors.append((i, f"el parámetro '{name}' no puede ser de tipo void"))
+            elif kind == "Block":
+                block = i
+                scopes.enter()  # BLOCK
+            elif kind == "VarDecl":
+                typ, name = rest
+                if name is None:
+                    continue
+                ident = self.intern(name)
+                b = scopes.lookup(ident)
+                if b is not None and b[0] >= METHOD:
+                    what = "parámetro" if b[1].kind == "param" else "variable"
+                    errors.append((i, f"'{name}' ya declarado como {what} en '{mname}'"))
+                else:
+                    scopes.declare(ident, Symbol("local", typ, 0, n.tok))
+                if typ == "void":
+                    errors.append((i, f"la variable '{name}' no puede ser de tipo void"))
+            elif kind in ("Assign", "Id"):
+                use(i, rest[0])
+            elif kind == "Call":
+                name = rest[0]
+                if name is None:
+                    continue
+                sym = methods.get(self.intern(name))
+                if sym is None:
+                    errors.append((i, f"método '{name}' no declarado en la clase"))
+                    continue
+                if sym.arity != len(n.children):
+                    errors.append((i, f"'{name}' espera {sym.arity} argumento(s) y recibe {len(n.children)}"))
+                if parent != block and sym.type == "void":  # usada como valor, no como sentencia
+                    errors.append((i, f"el método void '{name}' no devuelve valor"))
+            elif kind == "Return":
+                has_value = bool(n.children)
+                if has_value and rtype == "void":
+                    errors.append((i, f"'return' con valor en el método void '{mname}'"))
+                elif not has_value and rtype not in ("void", None):
+                    errors.append((i, f"'return' sin valor en el método {rtype} '{mname}'"))
+        if block >= 0:
+            scopes.exit()
+        scopes.exit()
+        return errors
+
+
+def check(root, cache=METHOD_CACHE):
+    """
+    Errores semánticos de un AST (ast_actions: Program o Class), en orden de
+    fuente y con 'L<línea> C<col>' del token de cada nodo. cache=None revisa
+    todo sin caché. Con tokens de srcmap el fuente debe seguir abierto.
+    """
+    c = _Checker(cache)
+    return c.messages(c.check(root))
+
+
+class ClassStream:
+    """
+    Revisión clase por clase durante el parseo, sin conservar el AST:
+
+      cs = semantic.ClassStream()
+      res = parser_ll1.run_parser(ts, tree="ast", actions=cs.actions())
+      cs.errors()          # como check(res.ast) con el AST completo; res.ast queda en None
+
+    Cada clase se revisa al reducirse y se descarta, así que la memoria es la
+    de la clase más grande (solo se retienen los tokens de los errores).
+    """
+
+    def __init__(self, cache=METHOD_CACHE):
+        self._checker = _Checker(cache)
+        self._seen = set()
+        self._found = []
+
+    def actions(self):
+        """Reemplazo de la acción de ClassDecl para parser_ll1.run_parser(actions=...)."""
+        build = ACTIONS[_CLASS_DECL]
+
+        def reduce_class(v):
+            node = build(v)
+            if node is not None:
+                self._checker.check_class_node(node, self._seen, self._found)
+            return None
+        return {_CLASS_DECL: reduce_class}
+
+    def errors(self):
+        return self._checker.messages(self._found)
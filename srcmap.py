@@ -0,0 +1,168 @@
+# srcmap.py
+# Entrada de archivos grandes sin copiarlos a un str de Python.
+#
+#   with srcmap.open_mapped("grande.txt") as src:
+#       res = analyzer.analyze(src)
+#
+# El archivo se mapea en memoria (mmap, solo lectura) y se lexea con la
+# versión en bytes de la expresión maestra (lexer.MASTER_BYTES). Los tokens
+# guardan solo offsets de byte; el lexema se decodifica al pedirlo y la
+# línea/columna se calculan por bisección sobre el índice de inicios de línea
+# (LineIndex), que se arma una vez al abrir. Las columnas cuentan caracteres,
+# como el lexer sobre str.
+
+import mmap
+from array import array
+from bisect import bisect_right
+
+import lexer
+
+LARGE_FILE_BYTES = 1024 * 1024   # desde aquí app.py/batch.py usan mmap
+ENCODING = "utf-8"
+
+# Lexemas (bytes) -> nombre de tipo del lexer (como lexer.Lexer.map_token_name)
+_RESERVED = {w.encode(): k for w, k in lexer.RESERVED.items()}
+_SYMBOLS = {s.encode(): k for s, k in lexer.SYMBOL_NAMES.items()}
+_OPS = {s.encode(): k for s, k in lexer.OP_NAMES.items()}
+_SKIP = frozenset(("WS", "NEWLINE", "COMMENT1", "COMMENT2"))
+
+
+class LineIndex:
+    """Offsets de byte donde empieza cada línea; offset -> (línea, columna) por bisección."""
+    __slots__ = ("buf", "starts")
+
+    def __init__(self, buf):
+        self.buf = buf
+        starts = array('q', [0])
+        find = buf.find
+        pos = find(b"\n")
+        while pos >= 0:
+            starts.append(pos + 1)
+            pos = find(b"\n", pos + 1)
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    def position(self, offset):
+        i = bisect_right(self.starts, offset) - 1
+        ls = self.starts[i]
+        seg = self.buf[ls:offset]
+        col = offset - ls if seg.isascii() else len(seg.decode(ENCODING, "replace"))
+        return i + 1, col + 1
+
+
+class MappedSource:
+    """Fuente respaldado por mmap (o bytes): buf, index (LineIndex), size."""
+
+    def __init__(self, buf, f=None, path=None):
+        self.buf = buf
+        self.path = path
+        self.size = len(buf)
+        self.index = LineIndex(buf)
+        self._f = f
+
+    @property
+    def n_lines(self):
+        return len(self.index)
+
+    def text(self, start=0, end=None):
+        """Decodifica [start, end) (solo lo pedido)."""
+        return self.buf[start:self.size if end is None else end].decode(ENCODING, "replace")
+
+    def close(self):
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"MappedSource({self.path or '<bytes>'!r}, {self.size} bytes, {self.n_lines} líneas)"
+
+
+def open_mapped(path):
+    f = open(path, "rb")
+    try:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # archivo vacío: no se puede mapear
+        f.close()
+        return MappedSource(b"", path=path)
+    return MappedSource(buf, f, path)
+
+
+class MTok:
+    """Token con offsets de byte e interfaz de lexer.PTok (kind, lex, line, col) perezosa."""
+    __slots__ = ("kind", "start", "end", "src")
+
+    def __init__(self, kind, start, end, src):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.src = src
+
+    @property
+    def lex(self):
+        return self.src.text(self.start, self.end)
+
+    @property
+    def line(self):
+        return self.src.index.position(self.start)[0]
+
+    @property
+    def col(self):
+        return self.src.index.position(self.start)[1]
+
+    def __repr__(self):
+        return f"MTok({self.kind!r}, {self.start}:{self.end})"
+
+
+def detach(root):
+    """
+    Cambia los MTok de un árbol (Node.tok, p. ej. el AST) por lexer.PTok con
+    lexema y posición ya leídos, para seguir usándolo tras cerrar el mapa.
+    """
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        t = node.tok
+        if isinstance(t, MTok):
+            line, col = t.src.index.position(t.start)
+            node.tok = lexer.PTok(t.kind, t.lex, line, col)
+        stack.extend(node.children)
+    return root
+
+
+def iter_ptoks(src, tok_to_term=None):
+    """Como lexer.iter_ptoks() pero sobre un MappedSource: MTok y LexError en orden."""
+    from grammar import TOK_TO_TERM
+    if tok_to_term is not None:
+        TOK_TO_TERM = tok_to_term
+    where = src.index.position
+    for m in lexer.MASTER_BYTES.finditer(src.buf):
+        kind = m.lastgroup
+        if kind in _SKIP:
+            continue
+        if kind == "ID":
+            kind = _RESERVED.get(m.group(), "ID")
+        elif kind == "SYMBOL":
+            kind = _SYMBOLS.get(m.group(), "SYMBOL")
+        elif kind == "OP":
+            kind = _OPS.get(m.group(), "OP")
+        term = TOK_TO_TERM.get(kind)
+        if term is not None:
+            yield MTok(term, m.start(), m.end(), src)
+            continue
+        line, col = where(m.start())
+        if kind == "ERROR":
+            msg = lexer.error_text(m.group().decode(ENCODING, "replace"), line, col)
+        else:
+            msg = f"Token '{kind}' no mapeado en la gramática (L{line}, C{col})"
+        yield lexer.LexError(msg, line, col)
+    yield MTok("$", src.size, src.size, src)
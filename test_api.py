@@ -0,0 +1,41 @@
+# API JSON /api/analyze (app.py, analyzer.analyze_parts): partes y errores 400.
+import analyzer
+import app
+
+
+def post(payload=None, **kw):
+    return app.app.test_client().post("/api/analyze", json=payload, **kw)
+
+
+def test_partes_pedidas():
+    res = post({"source": analyzer.DEMO, "parts": ["errors", "tokens", "ast"]})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert sorted(body) == ["ast", "errors", "ok", "tokens", "truncated"]
+    assert body["ok"] and body["errors"] == [] and body["truncated"] is None
+    assert body["tokens"][0] == {"kind": "class", "lex": "class", "line": 1, "col": 1}
+    assert body["ast"].startswith("digraph G")
+
+
+def test_formulario_y_query_string():
+    client = app.app.test_client()
+    res = client.post("/api/analyze?parts=errors,tree", data={"code": "class A { int x }"})
+    body = res.get_json()
+    assert res.status_code == 200 and not body["ok"] and "tree" in body
+    assert body["errors"] == analyzer.analyze("class A { int x }")["errores"]
+
+
+def test_400():
+    cases = [
+        (post(["no", "es", "objeto"]), "El cuerpo JSON debe ser un objeto."),
+        (post("texto"), "El cuerpo JSON debe ser un objeto."),
+        (post({"parts": ["errors"]}), "Falta el fuente (campo 'source')."),
+        (post(data="{roto", content_type="application/json"), "Falta el fuente (campo 'source')."),
+        (post({"source": 42}), "Falta el fuente (campo 'source')."),
+        (post({"source": "", "parts": {"errors": 1}}), "El campo 'parts' debe ser un texto o una lista de textos."),
+        (post({"source": "", "parts": ["errors", 3]}), "El campo 'parts' debe ser un texto o una lista de textos."),
+    ]
+    for res, msg in cases:
+        assert res.status_code == 400 and res.get_json() == {"error": msg}
+    res = post({"source": "", "parts": "errors,nada"})
+    assert res.status_code == 400 and res.get_json()["error"].startswith("Partes desconocidas: nada")
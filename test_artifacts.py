@@ -0,0 +1,66 @@
+# Almacén de artefactos (artifacts.py): contenido, escritura perezosa del
+# fuente, límite de bytes y 404 de /download.
+import os
+import zipfile
+
+import pytest
+
+import analyzer
+import app
+import artifacts
+from artifacts import ArtifactStore, ARTIFACTS, SOURCE_NAME
+
+
+def test_put_no_escribe_hasta_que_hace_falta(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    key = store.put(analyzer.DEMO)
+    assert not os.path.exists(tmp_path / key / SOURCE_NAME)
+    assert store.source(key) == analyzer.DEMO
+    with open(store.source_path(key), encoding="utf-8") as f:
+        assert f.read() == analyzer.DEMO
+
+
+def test_contenido_de_los_artefactos(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    src = analyzer.DEMO.replace("int y;", "int y")
+    key = store.put(src)
+    with open(store.path(key, "errores"), encoding="utf-8") as f:
+        assert f.read().splitlines() == analyzer.analyze(src)["errores"]
+    for name in ("arbol", "ast"):
+        with open(store.path(key, name), encoding="utf-8") as f:
+            assert f.read().startswith("digraph G")
+    with zipfile.ZipFile(store.bundle(key)) as z:
+        assert sorted(z.namelist()) == sorted(ARTIFACTS.values())
+
+
+def test_claves_y_nombres_desconocidos(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    key = store.put("class A { }")
+    for bad in ("0" * 32, "../etc", ""):
+        with pytest.raises(KeyError):
+            store.path(bad, "errores")
+        with pytest.raises(KeyError):
+            store.source(bad)
+    with pytest.raises(KeyError):
+        store.path(key, "nada")
+
+
+def test_limite_de_bytes_tras_cada_escritura(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "EVICT_EVERY", 10 ** 6)  # sin barridos periódicos
+    store = ArtifactStore(str(tmp_path), max_bytes=30000)
+    keys = [store.put(analyzer.DEMO + f"\n/* {i} */") for i in range(8)]
+    for key in keys:
+        store.bundle(key)
+        assert store.size() <= 30000 or len(store._entries()) == 1
+    assert os.path.exists(tmp_path / keys[-1] / SOURCE_NAME)
+    assert not os.path.exists(tmp_path / keys[0])
+
+
+def test_descarga_inexistente_da_404(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "STORE", ArtifactStore(str(tmp_path)))
+    client = app.app.test_client()
+    key = app.STORE.put("class A { }")
+    assert client.get(f"/download/{key}/errores").status_code == 200
+    assert client.get(f"/download/{'0' * 32}/errores").status_code == 404
+    assert client.get(f"/download/{key}/nada").status_code == 404
+    assert client.get("/download/no-es-clave/errores").status_code == 404
@@ -0,0 +1,48 @@
+# AST construido durante el parseo (ast_actions.py, run_parser(tree=...)).
+import pytest
+
+import lexer
+import parser_ll1
+from bench import gen
+
+
+def run(src, mode, engine="gen"):
+    return parser_ll1.run_parser(lexer.TokenStream(lexer.iter_ptoks(src)), tree=mode, engine=engine)
+
+
+def labels(node):
+    return [node.label] + [lab for c in node.children for lab in labels(c)]
+
+
+def test_expresiones_asocian_a_izquierda():
+    ast = run("class A { int f(int a) { return a + 2 * b - 1; } int x; }", "ast").ast
+    assert labels(ast) == ["Class A", "Method int f", "Params", "Param int a", "Block", "Return",
+                           "BinOp -", "BinOp +", "Id a", "BinOp *", "Num 2", "Id b", "Num 1",
+                           "Field int x"]
+
+
+def test_modos_construyen_solo_lo_pedido():
+    src = gen.members(3)
+    got = {mode: run(src, mode) for mode in parser_ll1.TREE_MODES}
+    assert [(r.tree is not None, r.ast is not None) for r in got.values()] == \
+        [(False, False), (True, False), (False, True), (True, True)]
+    assert got["both"].tree.to_dot() == got["parse"].tree.to_dot()
+    assert got["both"].ast.to_dot() == got["ast"].ast.to_dot()
+
+
+def test_mismos_errores_en_todos_los_modos_y_motores():
+    for seed in range(5):
+        src = gen.error_dense(8, 0.4, seed=seed)
+        results = [run(src, mode, engine) for mode in parser_ll1.TREE_MODES for engine in parser_ll1.ENGINES]
+        assert all(r.errors == results[0].errors for r in results)
+        assert all(r.ast is None or r.ast.to_dot() == results[-1].ast.to_dot() for r in results)
+
+
+def test_con_errores_el_ast_conserva_lo_reconocido():
+    res = run("class A { int f( { return ; }", "ast")
+    assert res.errors and labels(res.ast) == ["Class A", "Method int f", "Params"]
+
+
+def test_modo_desconocido():
+    with pytest.raises(ValueError, match="Modo de árbol desconocido"):
+        run("class A { }", "arbol")
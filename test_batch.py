@@ -0,0 +1,55 @@
+# CLI por lotes (batch.py): entradas, una línea JSON por archivo y resumen.
+import json
+
+import analyzer
+import batch
+
+
+def corpus(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "bien.txt").write_text(analyzer.DEMO, encoding="utf-8")
+    (tmp_path / "sub" / "mal.txt").write_text("class A { int x @ }", encoding="utf-8")
+    (tmp_path / "otro.md").write_text("no se analiza", encoding="utf-8")
+    return tmp_path
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_expand_inputs_sin_repetidos(tmp_path):
+    d = corpus(tmp_path)
+    paths = list(batch.expand_inputs([str(d), str(d / "*.txt"), str(d / "otro.md")]))
+    assert paths == [str(d / "bien.txt"), str(d / "sub" / "mal.txt"), str(d / "otro.md")]
+
+
+def test_una_linea_json_por_archivo(tmp_path, capsys):
+    d = corpus(tmp_path)
+    out = tmp_path / "res.jsonl"
+    code = batch.main([str(d), str(d / "falta.txt"), "-j", "1", "-o", str(out), "--dot", "--tree", "both"])
+    assert code == 1                                # hay archivos con errores
+    lines = {r["file"]: r for r in read_lines(out)}
+    ok, bad, missing = lines[str(d / "bien.txt")], lines[str(d / "sub" / "mal.txt")], lines[str(d / "falta.txt")]
+    assert ok["ok"] and ok["errores"] == [] and ok["tokens"] > 0 and ok["arbol_dot"].startswith("digraph")
+    assert not bad["ok"] and bad["errores"] == analyzer.analyze("class A { int x @ }")["errores"]
+    assert not missing["ok"] and missing["errores"][0].startswith("No se pudo leer")
+    report = capsys.readouterr().err
+    assert "Archivos: 3 (2 con errores)" in report and "Más lentos:" in report
+
+
+def test_pool_da_lo_mismo_que_secuencial(tmp_path):
+    d = corpus(tmp_path)
+    paths = list(batch.expand_inputs([str(d)]))
+    seq, par = tmp_path / "seq.jsonl", tmp_path / "par.jsonl"
+    for workers, path in ((1, seq), (2, par)):
+        with open(path, "w", encoding="utf-8") as out:
+            summary = batch.run(paths, out, workers, top=1)
+        assert summary["files"] == 2 and summary["with_errors"] == 1 and len(summary["slowest"]) == 1
+    strip = lambda rs: sorted((r["file"], r["errores"], r["tokens"]) for r in rs)
+    assert strip(read_lines(seq)) == strip(read_lines(par))
+
+
+def test_sin_archivos(tmp_path, capsys):
+    assert batch.main([str(tmp_path / "nada" / "*.txt")]) == 2
+    assert "No se encontraron archivos." in capsys.readouterr().err
@@ -0,0 +1,22 @@
+# Generador de cargas (bench/gen.py) y comparación de la suite (bench/suite.py).
+import json
+import random
+
+from bench import gen, suite
+
+G = {"S": [["S", ";"], ["Type", "id"]], "Type": [["int"], ["void"]]}
+
+
+def test_derive_con_otra_gramatica_termina_en_lo_mas_corto():
+    for seed in range(20):
+        out = gen.derive(random.Random(seed), "S", max_depth=3, G=G)
+        assert out[0] in ("int", "void") and out[1].startswith("v")
+        assert set(out[2:]) <= {";"}
+
+
+def test_comparar_con_pico_base_cero(tmp_path, capsys):
+    base = tmp_path / "base.json"
+    base.write_text(json.dumps({"members/5/lexer": {"seconds": 1e9, "peak": 0, "tokens": 1, "tok_per_sec": 0}}))
+    code = suite.main(["--workloads", "members", "--sizes", "5", "--cases", "lexer", "--reps", "1",
+                       "--compare", str(base)])
+    assert code == 1 and "(antes 0)" in capsys.readouterr().out
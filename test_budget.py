@@ -0,0 +1,68 @@
+# Truncado por presupuesto (budget.py): cada límite corta y se reporta.
+import analyzer
+import lexer
+import parallel
+import parser_ll1
+from bench import gen
+from budget import Budget
+
+
+def truncated(src, budget, mode="parse"):
+    errores = analyzer.analyze(src, mode, budget=budget)["errores"]
+    return budget.truncated, errores
+
+
+def test_tokens():
+    why, errores = truncated(gen.members(20), Budget(max_tokens=50))
+    assert why == "tokens"
+    assert errores[-1] == "Análisis truncado: se alcanzó el límite de tokens (50)."
+
+
+def test_nodos():
+    why, errores = truncated(gen.members(300), Budget(max_nodes=1000))
+    assert why == "nodos"
+    assert errores[-1] == "Análisis truncado: se alcanzó el límite de nodos del árbol (1000)."
+
+
+def test_errores():
+    why, errores = truncated(gen.error_dense(30, 0.5, seed=1), Budget(max_errors=2))
+    assert why == "errores"
+    assert len(errores) == 3
+    assert errores[-1] == "Análisis truncado: se alcanzó el límite de errores reportados (2)."
+
+
+def test_errores_lexicos_cuentan():
+    why, errores = truncated("class A { " + "@ " * 5000 + "}", Budget(max_errors=10))
+    assert why == "errores" and len(errores) == 11
+
+
+def test_tiempo():
+    why, errores = truncated(gen.members(300), Budget(max_seconds=0))
+    assert why == "tiempo"
+    assert errores[-1] == "Análisis truncado: se alcanzó el límite de tiempo (0 s)."
+
+
+def test_tiempo_en_racha_de_errores_lexicos():
+    why, _ = truncated("@ " * 5000, Budget(max_seconds=0, max_errors=None))
+    assert why == "tiempo"
+
+
+def test_sin_limites_no_trunca():
+    b = Budget(None, None, None, None).start()
+    ts = lexer.TokenStream(lexer.iter_ptoks(gen.members(50)), [], b)
+    res = parser_ll1.run_parser(ts)
+    assert b.truncated is None and res.errors == []
+
+
+def test_paralelo_suma_tokens_y_nodos_de_los_trozos():
+    src = gen.classes(40)
+    assert len(parallel.split(src, 4)) == 4
+    for mode, lim, why in (("none", dict(max_tokens=1000), "tokens"), ("ast", dict(max_tokens=1000), "tokens"),
+                           ("parse", dict(max_tokens=1000), "tokens"), ("both", dict(max_nodes=3000), "nodos")):
+        seq, par = Budget(**lim).start(), Budget(**lim).start()
+        errors = []
+        a = parser_ll1.run_parser(lexer.TokenStream(lexer.iter_ptoks(src), errors, seq), tree=mode)
+        b, _ = parallel.parse(src, mode, workers=1, budget=par)
+        assert seq.truncated == par.truncated == why
+        assert a.errors == b.errors
+        assert (a.tree and a.tree.to_dot()) == (b.tree and b.tree.to_dot())
@@ -0,0 +1,36 @@
+# Explorador del árbol (explorer.py, GET /api/tree/<clave>).
+import analyzer
+import app
+import explorer
+from artifacts import ArtifactStore
+from bench import gen
+from budget import Budget
+
+
+def test_nodos_y_spans():
+    t = explorer.build(analyzer.DEMO)
+    root = t.node(t.root, depth=2)
+    assert root["label"] == "Prog" and root["size"] == len(t) and t.truncated is None
+    assert root["span"][:2] == [1, 1]
+    assert [c["label"] for c in root["children"]] == ["ClassDecl", "ClassList"]
+
+
+def test_arbol_truncado_lo_dice():
+    t = explorer.build(gen.members(50), Budget(max_tokens=50))
+    assert t.truncated == "tokens" and t.message.startswith("Análisis truncado")
+
+
+def test_api_trae_truncated(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "STORE", ArtifactStore(str(tmp_path)))
+    client = app.app.test_client()
+    key = app.STORE.put(analyzer.DEMO + "\n// explorer")
+    data = client.get(f"/api/tree/{key}?depth=1").get_json()
+    assert data["truncated"] is None and data["truncated_message"] is None
+    assert data["node"]["id"] == data["root"]
+
+    monkeypatch.setattr(explorer, "Budget", lambda: Budget(max_tokens=50))
+    key = app.STORE.put(gen.members(50))
+    data = client.get(f"/api/tree/{key}").get_json()
+    assert data["truncated"] == "tokens" and "tokens" in data["truncated_message"]
+    assert client.get(f"/api/tree/{'0' * 32}").status_code == 404
+    assert client.get(f"/api/tree/{key}?node=x").status_code == 400
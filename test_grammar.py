@@ -0,0 +1,107 @@
+# Gramáticas como objetos (grammar.py): BNF, FIRST/FOLLOW por componentes
+# fuertemente conexas (ll1.build_first_follow) y gramáticas propias en el parser.
+import random
+
+import analyzer
+import grammar
+import ll1
+import lexer
+import parser_ll1
+
+LOOP = grammar.parse_bnf("""%start P
+%terms class id { } ; loop ( )
+%token WHILE loop
+P -> class id { S }
+S -> Stmt S | ε
+Stmt -> id ; | loop ( id ) ;
+""")
+
+
+def classic_first_follow(g):
+    """FIRST/FOLLOW por punto fijo (barrer producciones hasta que nada cambie)."""
+    EPS = ll1.EPS
+    FIRST = {t: {t} for t in g.terms}
+    FIRST.update({A: set() for A in g.nonterms})
+    changed = True
+    while changed:
+        changed = False
+        for A, alts in g.items():
+            for alpha in alts:
+                f = ll1.first_of_seq([s for s in alpha if s != EPS], FIRST)
+                if not f <= FIRST[A]:
+                    FIRST[A] |= f
+                    changed = True
+    FOLLOW = {A: set() for A in g.nonterms}
+    FOLLOW[g.start].add(ll1.END)
+    changed = True
+    while changed:
+        changed = False
+        for A, alts in g.items():
+            for alpha in alts:
+                alpha = [s for s in alpha if s != EPS]
+                for i, B in enumerate(alpha):
+                    if B not in g.prods:
+                        continue
+                    f = ll1.first_of_seq(alpha[i + 1:], FIRST)
+                    add = (f - {EPS}) | (FOLLOW[A] if EPS in f else set())
+                    if not add <= FOLLOW[B]:
+                        FOLLOW[B] |= add
+                        changed = True
+    return FIRST, FOLLOW
+
+
+def random_grammar(rng):
+    nts = [f"N{i}" for i in range(rng.randint(2, 8))]
+    terms = list("abcde")
+    prods = {}
+    for A in nts:
+        prods[A] = [[rng.choice(nts + terms) for _ in range(rng.randint(0, 4))] for _ in range(rng.randint(1, 3))]
+    return grammar.Grammar(prods, nts[0], terms, nts)
+
+
+def test_first_follow_igual_que_punto_fijo():
+    rng = random.Random(5)
+    for g in [grammar.DEFAULT, LOOP] + [random_grammar(rng) for _ in range(300)]:
+        FIRST, FOLLOW = ll1.build_first_follow(g)
+        F2, FL2 = classic_first_follow(g)
+        assert all(FIRST[A] == F2[A] for A in g.nonterms), g.to_bnf()
+        assert FOLLOW == FL2, g.to_bnf()
+
+
+def test_bnf_ida_y_vuelta():
+    for g in (grammar.DEFAULT, LOOP):
+        g2 = grammar.parse_bnf(g.to_bnf())
+        assert g2.fingerprint() == g.fingerprint() and g2.tok_to_term == g.tok_to_term
+
+
+def test_gramatica_propia_mapea_tokens():
+    src = "class A { x; while (y); int z; a < b; }"
+    for engine in ("regex", "dfa"):
+        errors = []
+        parser_ll1.run_parser(lexer.iter_ptoks(src, engine, lexer.token_map(LOOP)), LOOP, errors=errors)
+        assert errors == ["Token 'INT' no mapeado en la gramática (L1, C25)",
+                          "Token 'LT' no mapeado en la gramática (L1, C34)",
+                          "Sintáctico L1 C36: se esperaba ';' antes de 'b' — sugerencia: inserta ';'"]
+
+
+def test_gramatica_propia_sin_mapa_no_revienta():
+    errors = []
+    parser_ll1.run_parser(lexer.iter_ptoks("class A { x; a < b; }"), LOOP, errors=errors)
+    assert errors[0] == "Token '<' no mapeado en la gramática (L1, C16)"
+
+
+def test_llamadas_en_expresiones_y_return_sin_valor():
+    assert ll1.get_compiled().conflicts == []
+    res = parser_ll1.run_parser(lexer.tokenize("class A { int f(int a) { a = f(f(a)) + 1; return; } }")[0], tree="ast")
+    assert res.errors == []
+    block = res.ast.children[0].children[1]
+    assign, ret = block.children
+    assert [c.label for c in assign.children[0].children] == ["Call f", "Num 1"]
+    assert assign.children[0].children[0].children[0].label == "Call f"
+    assert ret.label == "Return" and ret.children == []
+
+
+def test_demo_sin_errores_sintacticos():
+    errors = []
+    parser_ll1.parse(lexer.tokenize(analyzer.DEMO)[0], errors=errors)
+    assert errors == []
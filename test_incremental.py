@@ -0,0 +1,73 @@
+# Sesión incremental (incremental.py) contra un parseo completo del mismo
+# fuente: tras cada edición árbol y errores deben ser idénticos.
+import random
+
+import lexer
+import parser_ll1
+from bench import gen
+from incremental import Session
+from recovery import STOP_PREFIX
+
+PIECES = ["", "(", ")", ";", "{", "}", "x", "1", "+", "int", "@", "return", ",", "f(", "\n", " ",
+          "/*", "*/", '"', "class", "void"]
+
+
+def full_parse(src):
+    errors = []
+    root, _ = parser_ll1.parse(lexer.TokenStream(lexer.iter_ptoks(src, "dfa"), errors))
+    return root, errors
+
+
+def assert_same(s):
+    root, errors = full_parse(s.source)
+    assert s.errors == errors, s.source
+    assert s.tree.to_dot() == root.to_dot(), s.source
+
+
+def test_sin_ediciones():
+    for src in (gen.members(4), gen.random_members(6, seed=3), "class A { int x; }", "class A { int f( { ; }", ""):
+        assert_same(Session(src))
+
+
+def test_edicion_en_un_miembro_reutiliza_el_resto():
+    s = Session(gen.members(6))
+    off = s.source.index("return a;")
+    stats = s.apply_edit(off + len("return "), 1, "b")
+    assert not stats["full"] and stats["reparsed"] == 1 and stats["reused"] == len(s.spans) - 1
+    assert_same(s)
+
+
+def test_con_un_miembro_roto_sigue_siendo_local():
+    s = Session(gen.members(6))
+    s.apply_edit(s.source.index("int m1(") + 4, 0, "( @")
+    assert s.errors
+    off = s.source.index("return a;", s.source.index("int m5")) + len("return ")
+    stats = s.apply_edit(off, 1, "b")
+    assert not stats["full"] and stats["reparsed"] == 1 and stats["reused"] == len(s.spans) - 1
+    assert_same(s)
+
+
+def test_presupuesto_de_errores_reparsea_todo():
+    s = Session("class A {\n" + "int f() { ) ; return 1; }\n" * 60 + "}")
+    stats = s.apply_edit(s.source.index("return", 500), 0, " ")
+    assert stats["full"] and stats["reused"] == 0 and stats["reparsed"] == len(s.spans)
+    assert s.errors[-1].startswith(STOP_PREFIX)
+    assert_same(s)
+
+
+def test_errores_en_orden_de_fuente_y_como_el_parseo_completo():
+    s = Session(gen.members(4))
+    s.apply_edit(s.source.index("int m1") + 2, 0, "@")      # léxico en un miembro
+    s.apply_edit(s.source.index("int f2"), 0, "int (")      # sintáctico en el siguiente
+    assert s.errors and any("MemberList" in e for e in s.errors)
+    assert_same(s)
+
+
+def test_ediciones_aleatorias():
+    rng = random.Random(1)
+    for i in range(300):
+        s = Session([gen.members(4, seed=i), gen.random_members(6, seed=i), gen.error_dense(4, 0.3, seed=i)][i % 3])
+        for _ in range(rng.randrange(1, 6)):
+            off = rng.randrange(len(s.source) + 1)
+            s.apply_edit(off, rng.randrange(min(3, len(s.source) - off) + 1), rng.choice(PIECES))
+            assert_same(s)
@@ -0,0 +1,100 @@
+# Cola de análisis en segundo plano (jobs.py) y /api/jobs: 202, 429 con
+# Retry-After, sondeo del resultado y 404.
+import time
+
+import pytest
+
+import analyzer
+import app
+import metrics
+from artifacts import ArtifactStore
+from jobs import JobQueue, QueueFull
+
+
+class HeldPool:
+    """Pool que guarda los trabajos sin correrlos; run() los termina a mano."""
+
+    def __init__(self):
+        self.calls = []
+
+    def apply_async(self, fn, args, callback, error_callback):
+        self.calls.append((fn, args, callback, error_callback))
+
+    def run(self, i=0, exc=None):
+        fn, args, callback, error_callback = self.calls[i]
+        if exc is not None:
+            error_callback(exc)
+        else:
+            callback(fn(*args))
+
+
+@pytest.fixture
+def held(monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics.REGISTRY, "collectors", list(metrics.REGISTRY.collectors))
+    queue, pool = JobQueue(workers=1, max_pending=1), HeldPool()
+    queue._pool = pool
+    monkeypatch.setattr(app, "JOBS", queue)
+    monkeypatch.setattr(app, "STORE", ArtifactStore(str(tmp_path)))
+    return queue, pool
+
+
+def test_cola_llena_rechaza_hasta_que_termina_uno(held, tmp_path):
+    queue, pool = held
+    job = queue.submit(str(tmp_path / "a.txt"), "k", "none")
+    with pytest.raises(QueueFull):
+        queue.submit(str(tmp_path / "b.txt"), "k", "none")
+    assert (queue.pending, queue.rejected, job.status) == (1, 1, "pending")
+    pool.run(exc=OSError("no existe"))
+    assert job.status == "failed" and job.error == "OSError: no existe" and queue.pending == 0
+    queue.submit(str(tmp_path / "b.txt"), "k", "none")
+
+
+def test_api_202_429_y_resultado(held):
+    queue, pool = held
+    client = app.app.test_client()
+    res = client.post("/api/jobs", json={"source": analyzer.DEMO, "tree_mode": "none"})
+    assert res.status_code == 202
+    job_id = res.get_json()["id"]
+    assert res.headers["Location"] == f"/api/jobs/{job_id}"
+    full = client.post("/api/jobs", json={"source": "class A { }"})
+    assert full.status_code == 429 and full.headers["Retry-After"] == "5"
+    assert client.get(f"/api/jobs/{job_id}").get_json()["status"] == "pending"
+    assert client.get(f"/api/jobs/{job_id}/result").status_code == 202
+    pool.run()
+    res = client.get(f"/api/jobs/{job_id}/result")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["id"] == job_id and body["errores"] == analyzer.analyze(analyzer.DEMO, "none")["errores"]
+
+
+def test_api_404_y_400(held):
+    client = app.app.test_client()
+    for url in ("/api/jobs/nada", "/api/jobs/nada/result", "/?job=nada"):
+        assert client.get(url).status_code == 404
+    assert client.post("/api/jobs", json={"source": "", "tree_mode": "arbol"}).status_code == 400
+    assert client.post("/api/jobs", json=[1]).status_code == 400
+    assert client.post("/api/jobs", json={}).status_code == 400
+
+
+def test_formulario_grande_con_cola_llena_da_429(held, monkeypatch):
+    monkeypatch.setattr(app, "JOB_MIN_CHARS", 10)
+    client = app.app.test_client()
+    assert client.post("/", data={"code": analyzer.DEMO}).status_code == 200
+    res = client.post("/", data={"code": analyzer.DEMO})
+    assert res.status_code == 429 and "Reintenta en unos segundos" in res.get_data(as_text=True)
+
+
+def test_pool_real(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics.REGISTRY, "collectors", list(metrics.REGISTRY.collectors))
+    path = tmp_path / "p.txt"
+    path.write_text(analyzer.DEMO, encoding="utf-8")
+    queue = JobQueue(workers=1)
+    try:
+        job = queue.submit(str(path), "k", "none")
+        deadline = time.time() + 60
+        while job.status == "pending" and time.time() < deadline:
+            time.sleep(0.05)
+        assert job.status == "done" and job.result["errores"] == []
+        assert queue.get(job.id) is job
+    finally:
+        queue.close()
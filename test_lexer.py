@@ -0,0 +1,69 @@
+# Motores del lexer (lexer.py: regex y scanner.py: dfa) contra el mismo fuente.
+import random
+
+import lexer
+import parser_ll1
+from bench import gen
+from budget import Budget
+
+ALPHABET = list("ab_1 9\n\t;{}()=+-*<>!&|,.\"/\\") + ["//", "/*", "*/", "class", "int", "while", "٣", "é", "@#"]
+
+
+def items(src, engine):
+    return [("E", t.msg) if isinstance(t, lexer.LexError) else (t.kind, t.lex, t.line, t.col)
+            for t in lexer.iter_ptoks(src, engine)]
+
+
+def test_motores_coinciden():
+    rng = random.Random(7)
+    srcs = [gen.members(5), gen.error_dense(30, 0.5, seed=1)]
+    srcs += ["".join(rng.choice(ALPHABET) for _ in range(rng.randrange(1, 60))) for _ in range(3000)]
+    for src in srcs:
+        assert items(src, "regex") == items(src, "dfa"), src
+        a, b = lexer.Lexer(src, "regex"), lexer.Lexer(src, "dfa")
+        assert [(t.typ.name, t.lexeme, t.line, t.col) for t in a.tokenize_all()] == \
+            [(t.typ.name, t.lexeme, t.line, t.col) for t in b.tokenize_all()], src
+        assert a.errors == b.errors
+
+
+def test_buffer_compacto_coincide():
+    src = gen.error_dense(30, 0.5, seed=3)
+    for engine in lexer.ENGINES:
+        buf = lexer.Lexer(src, engine).tokenize_compact()
+        toks = [t for t in lexer.iter_ptoks(src, engine) if not isinstance(t, lexer.LexError)]
+        assert [(t.kind, t.lex, t.line, t.col) for t in buf] == [(t.kind, t.lex, t.line, t.col) for t in toks]
+
+
+def test_motor_por_defecto():
+    assert lexer.DEFAULT_ENGINE == "dfa"
+    assert lexer.Lexer("x").engine == "dfa"
+
+
+def test_errores_lexicos_y_sintacticos_intercalados():
+    src = "class A {\n int x @;\n int y = ;\n int z #;\n}"
+    errors = []
+    streamed, _ = parser_ll1.parse(lexer.TokenStream(lexer.iter_ptoks(src), errors))
+    assert [e.split()[0] for e in errors] == ["Símbolo", "Sintáctico", "Símbolo"]
+    assert ["(L2," in errors[0], "L3 " in errors[1], "(L4," in errors[2]] == [True] * 3
+    toks, lex_errors = lexer.tokenize(src)
+    assert lex_errors == [errors[0], errors[2]]
+    root, syn = parser_ll1.parse(toks)     # la lista completa da lo mismo
+    assert syn == [errors[1]] and root.to_dot() == streamed.to_dot()
+
+
+def test_el_parser_tira_de_los_tokens_de_a_uno():
+    pulled = []
+
+    def counted(src):
+        for item in lexer.iter_ptoks(src):
+            pulled.append(item)
+            yield item
+
+    ts = lexer.TokenStream(counted(gen.members(50)))
+    assert len(pulled) == 1
+    for _ in range(10):
+        ts.advance()
+    assert len(pulled) == 11
+    ts = lexer.TokenStream(counted(gen.members(500)), budget=Budget(max_tokens=100).start())
+    parser_ll1.parse(ts)
+    assert ts.count == 101 and len(pulled) < 120
@@ -0,0 +1,44 @@
+# Tabla LL(1) compilada y densa (ll1.py) con el intérprete de parser_ll1.
+import copy
+import random
+
+import grammar
+import ll1
+import lexer
+import parser_ll1
+from bench import gen
+
+
+def test_densa_coincide_con_la_de_dicts():
+    c = ll1.get_compiled()
+    D = c.dense
+    for A, row in c.table.items():
+        for a, alpha in row.items():
+            p = D.cells[(D.ids[A] - D.width) * D.width + D.ids[a]]
+            assert D.lhs[p] == A and D.rhs[p] == [s for s in alpha if s != ll1.EPS]
+
+
+def test_tabla_de_dicts_densificada_al_vuelo():
+    compiled = ll1.get_compiled()
+    for src in (gen.members(5), gen.error_dense(30, 0.5, seed=2), gen.random_members(20, seed=3)):
+        toks = lexer.tokenize(src)[0]
+        a = parser_ll1.run_parser(toks, table=compiled.table)
+        b = parser_ll1.run_parser(toks)
+        assert a.errors == b.errors and a.tree.to_dot() == b.tree.to_dot()
+
+
+def test_tabla_ajena_recupera_con_los_conjuntos_de_su_gramatica():
+    # Sentencia vacía y menos unario: filas y FOLLOW distintos de la gramática por defecto
+    prods = copy.deepcopy(grammar.G)
+    prods["Stmt"] = prods["Stmt"] + [[";"]]
+    prods["Factor"] = prods["Factor"] + [["-", "Factor"]]
+    g = grammar.Grammar(prods, grammar.START, grammar.TERMS)
+    table = ll1.compile_grammar(g).table
+    rng = random.Random(2)
+    for i in range(300):
+        s = list(gen.members(3, seed=i))
+        for _ in range(rng.randrange(1, 6)):
+            j = rng.randrange(len(s))
+            s[j:j + rng.randrange(3)] = rng.choice(["", "(", ")", ";", "{", "}", "x", "int", ","])
+        toks = lexer.tokenize("".join(s))[0]
+        assert parser_ll1.run_parser(toks, prods, table=table).errors == parser_ll1.run_parser(toks, g).errors
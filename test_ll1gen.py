@@ -0,0 +1,59 @@
+# Parser generado (ll1gen) contra el intérprete de tabla.
+import random
+
+import ll1
+import ll1gen
+import lexer
+import parser_ll1
+import tree
+from bench import gen
+
+PIECES = ["", "(", ")", ";", "{", "}", "x", "1", "+", "int", "@", "return", ",", "((((", "f(", "$"]
+
+
+def sources():
+    rng = random.Random(1)
+    srcs = [gen.members(5), gen.error_dense(30, 0.5, seed=2), gen.random_members(20, seed=3),
+            gen.nested(50), gen.nested(250), gen.long_args(200)]
+    for i in range(60):
+        s = list(gen.members(3, seed=i))
+        for _ in range(rng.randrange(1, 8)):
+            j = rng.randrange(len(s))
+            s[j:j + rng.randrange(3)] = rng.choice(PIECES)
+        srcs.append("".join(s))
+    return srcs
+
+
+def test_generado_igual_que_tabla():
+    for src in sources():
+        toks = lexer.tokenize(src)[0]
+        for mode in parser_ll1.TREE_MODES:
+            for max_errors in (None, 2):
+                a = parser_ll1.run_parser(toks, tree=mode, engine="table", max_errors=max_errors)
+                b = parser_ll1.run_parser(toks, tree=mode, engine="gen", max_errors=max_errors)
+                assert a.errors == b.errors, (src, mode)
+                assert (a.tree is None) == (b.tree is None) and (a.ast is None) == (b.ast is None)
+                if a.tree is not None:
+                    assert a.tree.to_dot() == b.tree.to_dot(), (src, mode)
+                if a.ast is not None:
+                    assert tree.to_dot(a.ast) == tree.to_dot(b.ast), (src, mode)
+
+
+def test_start_member():
+    for src in ("int x;", "int f(int a) { x = 1; }", "int f( { ;"):
+        toks = lexer.tokenize(src)[0]
+        a = parser_ll1.run_parser(toks, engine="table", start="Member")
+        b = parser_ll1.run_parser(toks, engine="gen", start="Member")
+        assert a.errors == b.errors and a.tree.to_dot() == b.tree.to_dot()
+
+
+def test_generado_sin_cache_escribible(monkeypatch, tmp_path):
+    blocker = tmp_path / "archivo"
+    blocker.write_text("")
+    monkeypatch.setattr(ll1, "CACHE_DIR", str(blocker / "cache"))
+    monkeypatch.setattr(ll1gen, "_loaded", {})
+    assert ll1gen.load() is not None
+    assert not (blocker / "cache").exists()
+    toks = lexer.tokenize(gen.members(3))[0]
+    assert parser_ll1.run_parser(toks, engine="gen").tree.to_dot() == \
+        parser_ll1.run_parser(toks, engine="table").tree.to_dot()
@@ -0,0 +1,55 @@
+# Métricas por fase (metrics.py) y su exposición en /metrics.
+import re
+
+import analyzer
+import app
+import metrics
+from metrics import Registry
+
+
+def test_histograma_acumula_por_bucket():
+    reg = Registry()
+    for v in (0.0001, 0.003, 0.003, 20.0):
+        reg.observe("parse", v)
+    reg.count("parse", "nodes", 7)
+    reg.count("parse", "nodes", 3)
+    reg.add_collector(lambda: [("cola", "gauge", "Trabajos en cola.", 2)])
+    text = reg.render()
+    assert 'll1_phase_seconds_bucket{phase="parse",le="0.0005"} 1' in text
+    assert 'll1_phase_seconds_bucket{phase="parse",le="0.005"} 3' in text
+    assert 'll1_phase_seconds_bucket{phase="parse",le="10.0"} 3' in text
+    assert 'll1_phase_seconds_bucket{phase="parse",le="+Inf"} 4' in text
+    assert 'll1_phase_seconds_count{phase="parse"} 4' in text
+    assert 'll1_phase_items_total{phase="parse",kind="nodes"} 10' in text
+    assert "# TYPE ll1_cola gauge\nll1_cola 2\n" in text
+    assert reg.snapshot()["parse"][0] == 4
+
+
+def test_phase_y_timed_iter_suman_en_timings():
+    timings = {}
+    with metrics.phase("prueba_fase", timings):
+        pass
+    assert list(metrics.timed_iter(range(3), "prueba_iter", timings)) == [0, 1, 2]
+    assert sorted(timings) == ["prueba_fase", "prueba_iter"]
+    snap = metrics.REGISTRY.snapshot()
+    assert snap["prueba_fase"][0] >= 1 and snap["prueba_iter"][0] >= 1
+
+
+def value(text, line):
+    m = re.search("^" + re.escape(line) + r" (\S+)$", text, re.M)
+    return float(m.group(1)) if m else 0.0
+
+
+def test_endpoint_refleja_un_analisis():
+    client = app.app.test_client()
+    before = client.get("/metrics").get_data(as_text=True)
+    res = analyzer.analyze(analyzer.DEMO, "both")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200 and resp.mimetype == "text/plain"
+    after = resp.get_data(as_text=True)
+    for phase in ("lex", "parse", "semantic", "dot"):
+        line = f'll1_phase_seconds_count{{phase="{phase}"}}'
+        assert value(after, line) == value(before, line) + 1, phase
+    tokens = 'll1_phase_items_total{phase="lex",kind="tokens"}'
+    assert value(after, tokens) - value(before, tokens) == res["n_tokens"]
+    assert "ll1_result_cache_hits_total" in after
@@ -0,0 +1,67 @@
+# Parseo por trozos (parallel.py) contra el secuencial.
+import random
+
+import lexer
+import parallel
+import parser_ll1
+import tree
+from bench import gen
+
+
+def sequential(src, mode, max_errors=None):
+    errors = []
+    ts = lexer.TokenStream(lexer.iter_ptoks(src), errors)
+    return parser_ll1.run_parser(ts, tree=mode, max_errors=max_errors), ts
+
+
+def dots(res):
+    return (res.tree.to_dot() if res.tree is not None else None,
+            tree.to_dot(res.ast) if res.ast is not None else None)
+
+
+def test_fuentes_validos_igual_que_secuencial():
+    for seed in range(6):
+        rng = random.Random(seed)
+        src = gen.classes(rng.randint(2, 20), rng.randint(0, 4), seed)
+        if seed % 2:
+            src = "// class X {\n/* class Y { */\n" + src
+        for mode in parser_ll1.TREE_MODES:
+            a, ts = sequential(src, mode)
+            b, stats = parallel.parse(src, mode, workers=2)
+            assert dots(a) == dots(b) and a.errors == b.errors, (seed, mode)
+            assert (stats.count, stats.lex_count) == (ts.count, ts.lex_count)
+
+
+def test_errores_lexicos_en_orden():
+    src = gen.classes(10, 3, 1).replace("int", "int @", 5)
+    a, ts = sequential(src, "parse")
+    b, stats = parallel.parse(src, "parse", workers=2)
+    assert a.errors == b.errors and stats.lex_count == ts.lex_count == 5
+
+
+def test_un_trozo_por_clase_sin_pool():
+    src = gen.classes(4)
+    a, _ = sequential(src, "both")
+    b, stats = parallel.parse(src, "both", workers=1)
+    assert dots(a) == dots(b) and stats.chunks >= 1
+
+
+def test_worth_it_segun_el_arbol_a_devolver():
+    src = gen.classes(800)
+    assert len(src) >= parallel.MIN_BYTES
+    assert parallel.worth_it(src, 4, "none") == parallel.class_starts(src)
+    assert parallel.worth_it(src, parallel.TREE_MIN_WORKERS, "parse")
+    assert parallel.worth_it(src, 2, "parse") is None
+    for mode in ("ast", "both"):
+        assert parallel.worth_it(src, 16, mode) is None
+    assert parallel.worth_it(gen.classes(4), 4, "none") is None
+
+
+def test_inicios_de_clase_se_escanean_una_vez(monkeypatch):
+    src = gen.classes(10)
+    starts = parallel.class_starts(src)
+    calls = []
+    monkeypatch.setattr(parallel, "class_starts", lambda s: calls.append(1) or starts)
+    a, _ = sequential(src, "parse")
+    b, _ = parallel.parse(src, "parse", workers=1, starts=starts)
+    assert dots(a) == dots(b) and calls == []
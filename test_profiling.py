@@ -0,0 +1,55 @@
+# Perfilado por fase (profiling.py), profile=1 en la app y la descarga de
+# perfil.pstats.
+import marshal
+import pstats
+
+import analyzer
+import app
+import profiling
+from artifacts import ArtifactStore, PROFILE_NAME
+
+
+def test_reporte_por_fase():
+    prof = profiling.Profile()
+    res = analyzer.analyze(analyzer.DEMO, "both", profile=prof)
+    report = res["perfil"]
+    assert [ph["phase"] for ph in report["phases"]] == ["grammar", "parse", "semantic", "dot"]
+    parse = report["phases"][1]
+    assert parse["calls"] > 0 and parse["mem_peak"] >= 0 and parse["functions"]
+    assert {m["module"] for m in parse["modules"]} & {"lexer.py", "scanner.py", "parser_ll1.py", "ll1gen.py"}
+    assert res["errores"] == analyzer.analyze(analyzer.DEMO, "both")["errores"]
+
+
+def test_sin_perfil_no_hay_costo():
+    assert analyzer.analyze(analyzer.DEMO, "ast")["perfil"] is None
+    with profiling.phase(None, "parse"):
+        pass
+
+
+def test_dump_se_lee_con_pstats(tmp_path):
+    prof = profiling.Profile().start()
+    with prof.phase("uno"):
+        sum(range(1000))
+    prof.stop()
+    path = str(tmp_path / PROFILE_NAME)
+    prof.dump(path)
+    assert pstats.Stats(path).total_calls > 0
+    profiling.Profile().dump(path)          # sin fases: perfil vacío
+    with open(path, "rb") as f:
+        assert marshal.load(f) == {}
+
+
+def test_api_y_formulario_con_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "STORE", ArtifactStore(str(tmp_path)))
+    client = app.app.test_client()
+    res = client.post("/api/analyze?profile=1", json={"source": analyzer.DEMO})
+    body = res.get_json()
+    assert res.status_code == 200 and body["profile"]["phases"] and body["profile_url"].endswith(PROFILE_NAME)
+    dl = client.get(body["profile_url"])
+    assert dl.status_code == 200 and f"filename={PROFILE_NAME}" in dl.headers["Content-Disposition"]
+    assert "profile" not in client.post("/api/analyze", json={"source": analyzer.DEMO}).get_json()
+
+    page = client.post("/", data={"code": analyzer.DEMO, "profile": "1"}).get_data(as_text=True)
+    assert f"/{PROFILE_NAME}" in page
+    key = app.STORE.put("class Otro { }")
+    assert client.get(f"/download/{key}/{PROFILE_NAME}").status_code == 404     # nunca se perfiló
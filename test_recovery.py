@@ -0,0 +1,31 @@
+# Recuperación de errores con presupuesto (recovery.py).
+import lexer
+import parallel
+import parser_ll1
+from recovery import DEFAULT_MAX_ERRORS, STOP_PREFIX
+
+
+def errors_of(src, **kw):
+    errors = []
+    parser_ll1.run_parser(lexer.TokenStream(lexer.iter_ptoks(src), errors), **kw)
+    return errors
+
+
+def test_reparacion_de_frase():
+    assert errors_of("class A { int f() { return 1 ; ; } }") == [
+        "Sintáctico L1 C32: token inesperado ';' en StmtList — se descarta"]
+
+
+def test_presupuesto_detiene_el_informe():
+    src = "class A { " + "int x y z w; " * 80 + "@ " * 30 + "}"
+    for engine in ("gen", "table"):
+        errors = errors_of(src, engine=engine)
+        assert len(errors) == DEFAULT_MAX_ERRORS + 1
+        assert errors[-1].startswith(STOP_PREFIX)   # sin errores léxicos después
+    assert len(errors_of(src, max_errors=3)) == 4
+
+
+def test_presupuesto_en_paralelo_igual_que_secuencial():
+    src = "class A { " + "int x y z w; " * 80 + "}" + "".join(f"class B{i} {{ int x; @ }}" for i in range(20))
+    res, _ = parallel.parse(src, "parse", workers=2)
+    assert res.errors == errors_of(src)
@@ -0,0 +1,67 @@
+# Caché de resultados (resultcache.py): límite de bytes, nivel en disco y
+# analyzer.analyze_cached detrás de la página.
+import os
+
+import analyzer
+import app
+import resultcache
+from artifacts import ArtifactStore
+from resultcache import ResultCache, result_key
+
+
+def test_lru_acotada_por_bytes():
+    cache = ResultCache(max_bytes=30, sizeof=len)
+    for k in "abc":
+        cache.put(k, k * 10)
+    cache.get("a")                       # "b" queda como el menos usado
+    cache.put("d", "d" * 10)
+    assert "b" not in cache and [k in cache for k in "acd"] == [True] * 3
+    assert cache.bytes == 30 and cache.stats()["evictions"] == 1
+    cache.put("enorme", "x" * 100)       # no cabe nunca en memoria
+    assert "enorme" not in cache and cache.bytes == 30
+
+
+def test_no_guarda_los_arboles():
+    cache = ResultCache()
+    stored = cache.put("k", {"errores": [], "parse_tree": object(), "ast": object()})
+    assert stored == {"errores": []} and cache.get("k") == {"errores": []}
+
+
+def test_nivel_en_disco_sobrevive_y_se_poda(tmp_path):
+    first = ResultCache(max_bytes=0, disk_dir=str(tmp_path))
+    first.put("k", {"errores": ["x"]})
+    assert len(first) == 0 and first.get("k") == {"errores": ["x"]} and first.disk_hits == 1
+    second = ResultCache(disk_dir=str(tmp_path))
+    assert second.get("k") == {"errores": ["x"]} and "k" in second
+    (tmp_path / "roto.pickle").write_bytes(b"no es pickle")
+    assert second.get("roto") is None and second.misses == 1
+    for i in range(5):
+        second.put(f"p{i}", {"errores": ["e" * 1000]})
+    second.disk_max_bytes = 2500
+    assert second.prune_disk() > 0
+    assert sum(os.path.getsize(tmp_path / n) for n in os.listdir(tmp_path)) <= 2500
+
+
+def test_clave_por_modo_y_fuente():
+    assert result_key("a", "ast") != result_key("a", "both") != result_key("b", "both")
+
+
+def test_analyze_cached_reusa_y_no_cachea_truncados_por_tiempo(monkeypatch):
+    cache = ResultCache()
+    res = analyzer.analyze_cached(analyzer.DEMO, "ast", cache)
+    assert analyzer.analyze_cached(analyzer.DEMO, "ast", cache) is res and cache.hits == 1
+    assert "parse_tree" not in res and res["errores"] == analyzer.analyze(analyzer.DEMO, "ast")["errores"]
+    monkeypatch.setattr(analyzer, "analyze", lambda src, mode: dict(res, truncado="tiempo"))
+    analyzer.analyze_cached("class B { }", "ast", cache)
+    assert len(cache) == 1
+
+
+def test_get_de_la_pagina_usa_la_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "STORE", ArtifactStore(str(tmp_path / "store")))
+    monkeypatch.setattr(app, "PROGRAMA", str(tmp_path / "programa.txt"))    # no existe: DEMO
+    monkeypatch.setattr(analyzer, "RESULT_CACHE", ResultCache())
+    client = app.app.test_client()
+    assert client.get("/").status_code == 200 and client.get("/").status_code == 200
+    stats = analyzer.RESULT_CACHE.stats()
+    assert (stats["misses"], stats["hits"], stats["entries"]) == (1, 1, 1)
+    assert resultcache.DEFAULT_MAX_BYTES >= stats["bytes"] > 0
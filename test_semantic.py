@@ -0,0 +1,52 @@
+# Diagnósticos semánticos (semantic.py) a través de analyzer.
+import re
+
+import analyzer
+import semantic
+
+SRC = """class A {
+  int x;
+  int x;
+  void v;
+  int f(int a, int a) { int b; b = a + y; return; }
+  void g() { x = f(1); z = 3; return 1; }
+}
+"""
+
+EXPECTED = [
+    "Semántico L3 C7: campo 'x' ya declarado en la clase 'A'",
+    "Semántico L4 C8: el campo 'v' no puede ser de tipo void",
+    "Semántico L5 C20: parámetro 'a' repetido en 'f'",
+    "Semántico L5 C40: variable 'y' no declarada",
+    "Semántico L5 C43: 'return' sin valor en el método int 'f'",
+    "Semántico L6 C18: 'f' espera 2 argumento(s) y recibe 1",
+    "Semántico L6 C24: variable 'z' no declarada",
+    "Semántico L6 C31: 'return' con valor en el método void 'g'",
+]
+
+
+def test_mensajes_con_posicion():
+    assert analyzer.analyze(SRC)["errores"] == EXPECTED
+
+
+def test_mismos_errores_en_todos_los_modos():
+    for mode in ("none", "parse", "ast", "both"):
+        assert analyzer.analyze(SRC, mode)["errores"] == EXPECTED, mode
+    assert analyzer.analyze_parts(SRC, ["errors"])["errors"] == EXPECTED
+
+
+def test_sin_semantica_si_hay_errores_sintacticos():
+    errores = analyzer.analyze(SRC.replace("int b;", "int b"))["errores"]
+    assert errores and not any(e.startswith("Semántico") for e in errores)
+
+
+def test_cache_de_metodos_mueve_posiciones():
+    analyzer.analyze(SRC)
+    hits = semantic.METHOD_CACHE.stats()["hits"]
+    shifted = analyzer.analyze("\n\n" + SRC)["errores"]
+    assert semantic.METHOD_CACHE.stats()["hits"] > hits
+    assert shifted == [re.sub(r"L(\d+)", lambda m: f"L{int(m.group(1)) + 2}", e, count=1) for e in EXPECTED]
+
+
+def test_programa_correcto():
+    assert analyzer.analyze(analyzer.DEMO)["errores"] == []
@@ -0,0 +1,35 @@
+# Análisis de archivos mapeados (srcmap.py / analyzer.analyze_path) contra el
+# análisis del mismo fuente como str.
+import analyzer
+from bench import gen
+
+SOURCES = [analyzer.DEMO, gen.error_dense(20, 0.4, seed=3), "class Ñandú { int año; int f() { return año @ 1; } }\n"]
+
+
+def _walk(node):
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        yield n
+        stack.extend(n.children)
+
+
+def test_mismos_errores_que_con_str(tmp_path):
+    for i, src in enumerate(SOURCES):
+        path = tmp_path / f"p{i}.txt"
+        path.write_text(src, encoding="utf-8")
+        for mode in ("none", "ast"):
+            expected = analyzer.analyze(src, mode)["errores"]
+            assert analyzer.analyze_path(str(path), mode, cached=False)["errores"] == expected
+            assert analyzer.analyze_path(str(path), mode)["errores"] == expected
+
+
+def test_ast_usable_tras_cerrar_el_mapa(tmp_path):
+    path = tmp_path / "p.txt"
+    path.write_text(analyzer.DEMO, encoding="utf-8")
+    res = analyzer.analyze_path(str(path), "both", cached=False)
+    toks = [(n.tok.lex, n.tok.line, n.tok.col) for n in _walk(res["ast"]) if n.tok is not None]
+    expected = [(n.tok.lex, n.tok.line, n.tok.col) for n in _walk(analyzer.analyze(analyzer.DEMO, "both")["ast"])
+                if n.tok is not None]
+    assert toks and toks == expected
+    assert res["ast"].to_dot() == analyzer.analyze(analyzer.DEMO, "both")["ast"].to_dot()
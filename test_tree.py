@@ -0,0 +1,97 @@
+# Árbol de derivación en arena (tree.Arena/NodeView) y sus serializadores.
+import lexer
+import parser_ll1
+import tree
+from bench import gen
+from budget import Budget, CHECK_EVERY
+from tree import Arena, Node, NodeView, EPS, NONE
+
+
+def as_node(view):
+    """Copia de un NodeView como árbol clásico de Node."""
+    return Node(view.label, [as_node(c) if isinstance(c, NodeView) else c for c in view.children])
+
+
+def small():
+    # Decl -> int x ;   Rest -> ε
+    a = Arena()
+    root = a.add("Decl")
+    kw, name, semi, rest = a.expand(root, ["int", "ID", ";", "Rest"])
+    a.leaf(kw, "int"); a.leaf(name, "x"); a.leaf(semi, ";")
+    a.epsilon(rest)
+    return a
+
+
+def test_vista_sintetiza_lexemas_y_epsilon():
+    a = small()
+    assert len(a) == 5 and a.tok[4] == EPS and a.first[1] == NONE
+    root = a.view()
+    assert root.label == "Decl" and [c.label for c in root.children] == ["int", "ID", ";", "Rest"]
+    assert [c.children[0].label for c in root.children] == ["«int»", "«x»", "«;»", "ε"]
+    expected = Node("Decl", [Node("int", [Node("«int»")]), Node("ID", [Node("«x»")]),
+                             Node(";", [Node("«;»")]), Node("Rest", [Node("ε")])])
+    assert root.to_dot() == expected.to_dot() and root.to_mermaid() == expected.to_mermaid()
+
+
+def test_expand_ids_igual_que_expand():
+    a, b = Arena(["Decl", "int", "ID"]), Arena(["Decl", "int", "ID"])
+    a.expand(a.add("Decl"), ["int", "ID"] * 10)
+    b.expand_ids(b.add("Decl"), [1, 2] * 10)
+    assert (a.label, a.tok, a.first, a.next) == (b.label, b.tok, b.first, b.next)
+
+
+def test_absorb_reubica_indices_y_etiquetas():
+    a = Arena(["Otra"])
+    a.add("Otra")
+    off = a.absorb(small())
+    assert off == 1 and len(a) == 6
+    assert a.view(off).to_dot() == small().view().to_dot()
+
+
+def test_arbol_del_parser_igual_que_con_nodos():
+    for src in (gen.members(3), gen.error_dense(6, 0.4, seed=2), ""):
+        root, _ = parser_ll1.parse(lexer.TokenStream(lexer.iter_ptoks(src)))
+        assert isinstance(root, NodeView)
+        assert as_node(root).to_dot() == root.to_dot()
+        assert tree.count_nodes(root) == tree.count_nodes(as_node(root))
+
+
+def sample():
+    return Node("R", [Node("A", [Node("a1"), Node("a2", [Node("x")])]), Node("B"), Node("C")])
+
+
+def labels(dot):
+    return [line.split('"')[1] for line in dot.splitlines() if "label=" in line and "shape" not in line]
+
+
+def test_max_nodes_resume_los_hijos_que_sobran():
+    dot = tree.to_dot(sample(), max_nodes=3)
+    assert labels(dot) == ["R", "A", "a1", "… (+1 hijos)", "… (+2 hijos)"]
+    assert dot.count("->") == 4 and dot.endswith("}")
+
+
+def test_max_depth_colapsa_subarboles():
+    assert labels(tree.to_dot(sample(), max_depth=2)) == ["R", "A", "a1", "a2 … (1 nodos)", "B", "C"]
+    mermaid = tree.to_mermaid(sample(), max_depth=1)
+    assert mermaid.splitlines() == ["graph TD", 'n0["R"]', "n0-->n1", 'n1["A … (3 nodos)"]',
+                                    "n0-->n2", 'n2["B"]', "n0-->n3", 'n3["C"]']
+
+
+def test_arbol_profundo_sin_recursion_y_en_trozos():
+    deep = leaf = Node("n")
+    for _ in range(20000):
+        leaf.children.append(Node("n"))
+        leaf = leaf.children[0]
+    dot = tree.to_dot(deep)
+    assert dot.count("->") == 20000
+    chunks = list(tree.iter_dot(deep))
+    assert len(chunks) > 1 and "".join(chunks) == dot + "\n"
+    assert "".join(tree.iter_mermaid(deep)) == tree.to_mermaid(deep) + "\n"
+
+
+def test_presupuesto_cierra_el_grafo():
+    b = Budget(max_seconds=0).start()
+    dot = tree.to_dot(Node("R", [Node("k") for _ in range(3 * CHECK_EVERY)]), budget=b)
+    assert b.truncated == "tiempo"
+    assert labels(dot)[-1] == "… (truncado)" and dot.endswith("}")
+    assert dot.count("label=") == dot.count("->") + 1       # sigue siendo un árbol
@@ -0,0 +1,126 @@
+# tokbuf.py
+# Buffer compacto de tokens: columnas paralelas array('i') en lugar de un
+# objeto Token/PTok por token. Los lexemas se recortan del fuente solo
+# cuando se piden. Sirve a quien guarda todos los tokens y los relee por
+# índice (incremental.Session); el análisis de una pasada
+# (analyzer.parse_source) sigue en flujo, que no retiene ningún token.
+
+from array import array
+from bisect import bisect_right
+from grammar import TERMS
+
+# Ids de terminal: posición en grammar.TERMS; '$' va al final
+TERM_NAMES = list(TERMS) + ['$']
+TERM_ID = {t: i for i, t in enumerate(TERM_NAMES)}
+END_ID = TERM_ID['$']
+
+
+class TokenBuffer:
+    """
+    Tokens de un fuente como columnas: kind (id de terminal), start, length,
+    line, col. errors: [(índice_del_token_siguiente, mensaje)] en orden.
+    """
+    __slots__ = ("source", "kind", "start", "length", "line", "col", "errors")
+
+    def __init__(self, source):
+        self.source = source
+        self.kind = array('i')
+        self.start = array('i')
+        self.length = array('i')
+        self.line = array('i')
+        self.col = array('i')
+        self.errors = []
+
+    def append(self, kind, start, length, line, col):
+        self.kind.append(kind)
+        self.start.append(start)
+        self.length.append(length)
+        self.line.append(line)
+        self.col.append(col)
+
+    def error(self, msg):
+        self.errors.append((len(self.kind), msg))
+
+    def __len__(self):
+        return len(self.kind)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.kind)
+        if not 0 <= i < len(self.kind):
+            raise IndexError(i)
+        return TokView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.kind)):
+            yield TokView(self, i)
+
+    def lexeme(self, i):
+        s = self.start[i]
+        return self.source[s:s + self.length[i]]
+
+    def term(self, i):
+        return TERM_NAMES[self.kind[i]]
+
+    def stream(self, lo=0):
+        """
+        Tokens y lexer.LexError intercalados en orden (para lexer.TokenStream).
+        Desde el token lo: los errores que lo preceden quedan fuera.
+        """
+        from lexer import LexError
+        errs = self.errors
+        e = 0
+        if lo:
+            e = bisect_right(errs, lo, key=lambda err: err[0])
+        for i in range(lo, len(self.kind)):
+            while e < len(errs) and errs[e][0] <= i:
+                yield LexError(errs[e][1], self.line[i], self.col[i])
+                e += 1
+            yield TokView(self, i)
+
+    def nbytes(self):
+        """Memoria de las columnas (sin contar el fuente)."""
+        return sum(a.itemsize * len(a) for a in (self.kind, self.start, self.length, self.line, self.col))
+
+
+class TokView:
+    """
+    Vista ligera de un token del buffer con la misma interfaz que lexer.PTok
+    (kind, lex, line, col), para parser_ll1 y los mensajes de error.
+    """
+    __slots__ = ("buf", "i")
+
+    def __init__(self, buf, i):
+        self.buf = buf
+        self.i = i
+
+    @property
+    def kind(self):
+        return TERM_NAMES[self.buf.kind[self.i]]
+
+    @property
+    def kind_id(self):
+        return self.buf.kind[self.i]
+
+    @property
+    def lex(self):
+        return self.buf.lexeme(self.i)
+
+    @property
+    def line(self):
+        return self.buf.line[self.i]
+
+    @property
+    def col(self):
+        return self.buf.col[self.i]
+
+    @property
+    def start(self):
+        return self.buf.start[self.i]
+
+    @property
+    def end(self):
+        return self.buf.start[self.i] + self.buf.length[self.i]
+
+    def __repr__(self):
+        return f"TokView({self.kind!r}, {self.lex!r}, L{self.line}, C{self.col})"
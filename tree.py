@@ -1,39 +1,339 @@
+from array import array
 from dataclasses import dataclass, field
 from typing import List
 
+from budget import CHECK_EVERY
+
 @dataclass
 class Node:
     label: str
     children: List['Node'] = field(default_factory=list)
+    # Token del nombre (o de 'return') en el AST, para ubicar errores (semantic.py)
+    tok: object = field(default=None, compare=False, repr=False)
 
-    def add(self, *kids): 
-        self.children.extend(kids); 
+    def add(self, *kids):
+        self.children.extend(kids);
         return self
 
-    def to_mermaid(self):
-        lines = ["graph TD"]
-        def walk(n, name_iter=['A']):
-            my = name_iter[0]
-            lines.append(f'{my}["{n.label}"]')
-            for i, c in enumerate(n.children):
-                nxt = my + chr(ord('A')+i)
-                lines.append(f"{my}-->{nxt}")
-                name_iter[0] = nxt
-                walk(c, name_iter)
-        walk(self, ['A'])
-        return "\n".join(lines)
-
-    def to_dot(self):
-        out = ["digraph G { node [shape=box];"]
-        counter = [0]
-        def visit(n):
-            i = counter[0]; counter[0]+=1
-            out.append(f'n{i} [label="{n.label}"];')
-            my = i
-            for c in n.children:
-                j = visit(c)
-                out.append(f'n{my} -> n{j};')
-            return my
-        visit(self)
-        out.append("}")
-        return "\n".join(out)
+    def to_mermaid(self, max_nodes=None, max_depth=None):
+        return to_mermaid(self, max_nodes, max_depth)
+
+    def to_dot(self, max_nodes=None, max_depth=None):
+        return to_dot(self, max_nodes, max_depth)
+
+
+# --------------------------------------------
+# Serializadores (sirven para Node y NodeView: solo usan .label/.children)
+# Iterativos (sin límite de recursión), con ids enteros compactos y en flujo:
+# iter_dot()/iter_mermaid() generan trozos de texto, write_*() los escriben
+# en un archivo/respuesta. max_nodes/max_depth colapsan lo que sobra en
+# nodos resumen. Con un budget.Budget el recorrido consulta su reloj cada
+# budget.CHECK_EVERY nodos y, si se acabó, cierra el grafo con un nodo
+# «truncado».
+# --------------------------------------------
+CHUNK_LINES = 1024
+COUNT_CAP = 100000  # tope al contar nodos de un subárbol colapsado
+
+
+def count_nodes(root, cap=COUNT_CAP):
+    """Tamaño del subárbol (iterativo); se detiene al llegar a cap."""
+    n = 0
+    stack = [root]
+    while stack and n < cap:
+        node = stack.pop()
+        n += 1
+        stack.extend(node.children)
+    return n
+
+
+def _collapsed(node):
+    n = count_nodes(node) - 1
+    return f"… ({n}+ nodos)" if n >= COUNT_CAP - 1 else f"… ({n} nodos)"
+
+
+def _walk(root, max_nodes, max_depth, node_line, edge_line, budget=None):
+    """
+    Recorrido en preorden sin recursión. Genera las líneas de nodo (al entrar)
+    y de arista; el orden de aristas lo decide cada formato:
+      edge_line(padre, hijo, antes) -> línea o None
+    donde antes=True se pide al entrar al hijo y antes=False al terminarlo.
+    """
+    count = 1
+    yield node_line(0, root.label)
+    stack = [(0, iter(root.children), 0)]
+    while stack:
+        pid, it, depth = stack[-1]
+        if budget is not None and count % CHECK_EVERY == 0 and not budget.check():
+            cid = count; count += 1
+            for line in (edge_line(pid, cid, True), node_line(cid, "… (truncado)"), edge_line(pid, cid, False)):
+                if line is not None:
+                    yield line
+            # Cerrar las aristas pendientes (DOT las escribe al terminar cada hijo)
+            while stack:
+                pid = stack.pop()[0]
+                if stack:
+                    line = edge_line(stack[-1][0], pid, False)
+                    if line is not None:
+                        yield line
+            return
+        if max_nodes is not None and count >= max_nodes:
+            rest = sum(1 for _ in it)
+            stack.pop()
+            if rest:
+                cid = count; count += 1
+                for line in (edge_line(pid, cid, True), node_line(cid, f"… (+{rest} hijos)"), edge_line(pid, cid, False)):
+                    if line is not None:
+                        yield line
+            if stack:
+                line = edge_line(stack[-1][0], pid, False)
+                if line is not None:
+                    yield line
+            continue
+        child = next(it, None)
+        if child is None:
+            stack.pop()
+            if stack:
+                line = edge_line(stack[-1][0], pid, False)
+                if line is not None:
+                    yield line
+            continue
+        cid = count; count += 1
+        line = edge_line(pid, cid, True)
+        if line is not None:
+            yield line
+        if max_depth is not None and depth + 1 >= max_depth and child.children:
+            # Colapsar: el hijo queda como hoja-resumen de su subárbol
+            yield node_line(cid, f"{child.label} {_collapsed(child)}")
+            line = edge_line(pid, cid, False)
+            if line is not None:
+                yield line
+            continue
+        yield node_line(cid, child.label)
+        stack.append((cid, iter(child.children), depth + 1))
+
+
+def _chunks(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= CHUNK_LINES:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def _dot_lines(root, max_nodes=None, max_depth=None, budget=None):
+    yield "digraph G { node [shape=box];"
+    yield from _walk(root, max_nodes, max_depth,
+                     lambda i, label: f'n{i} [label="{label}"];',
+                     lambda p, c, before: None if before else f'n{p} -> n{c};', budget)
+    yield "}"
+
+
+def _mermaid_lines(root, max_nodes=None, max_depth=None, budget=None):
+    yield "graph TD"
+    yield from _walk(root, max_nodes, max_depth,
+                     lambda i, label: f'n{i}["{label}"]',
+                     lambda p, c, before: f"n{p}-->n{c}" if before else None, budget)
+
+
+def iter_dot(root, max_nodes=None, max_depth=None, budget=None):
+    return _chunks(_dot_lines(root, max_nodes, max_depth, budget))
+
+def iter_mermaid(root, max_nodes=None, max_depth=None, budget=None):
+    return _chunks(_mermaid_lines(root, max_nodes, max_depth, budget))
+
+def write_dot(root, out, max_nodes=None, max_depth=None, budget=None):
+    for chunk in iter_dot(root, max_nodes, max_depth, budget):
+        out.write(chunk)
+
+def write_mermaid(root, out, max_nodes=None, max_depth=None, budget=None):
+    for chunk in iter_mermaid(root, max_nodes, max_depth, budget):
+        out.write(chunk)
+
+def to_dot(root, max_nodes=None, max_depth=None, budget=None):
+    return "\n".join(_dot_lines(root, max_nodes, max_depth, budget))
+
+def to_mermaid(root, max_nodes=None, max_depth=None, budget=None):
+    return "\n".join(_mermaid_lines(root, max_nodes, max_depth, budget))
+
+
+# --------------------------------------------
+# Árbol compacto en arena
+# --------------------------------------------
+NONE = -1   # sin hijo / sin hermano / sin token
+EPS = -2    # tok de un no-terminal derivado a ε (hijo «ε» virtual)
+_PADS = [array('i', [NONE]) * n for n in range(16)]  # relleno para expand_ids
+
+
+class Arena:
+    """
+    Árbol de derivación como arrays paralelos (un nodo por símbolo gramatical):
+      label[i]  id de etiqueta (labels[label[i]] es el texto)
+      tok[i]    índice en lexemes si es terminal emparejado, EPS si derivó a ε
+      first[i]  primer hijo, next[i] siguiente hermano (NONE si no hay)
+    Los hijos «lexema» y «ε» del árbol clásico no se guardan: NodeView los
+    sintetiza al pedirlos.
+    """
+    __slots__ = ("labels", "label_ids", "label", "tok", "first", "next", "lexemes")
+
+    def __init__(self, labels=None):
+        # labels: etiquetas preinternadas (p. ej. ll1.Dense.names, para que el
+        # id de etiqueta sea el id del símbolo y expand_ids no busque strings)
+        self.labels = list(labels) if labels else []
+        self.label_ids = {lab: i for i, lab in enumerate(self.labels)}
+        self.label = array('i')
+        self.tok = array('i')
+        self.first = array('i')
+        self.next = array('i')
+        self.lexemes = []
+
+    def __len__(self):
+        return len(self.label)
+
+    def add(self, label):
+        lid = self.label_ids.get(label)
+        if lid is None:
+            lid = self.label_ids[label] = len(self.labels)
+            self.labels.append(label)
+        self.label.append(lid)
+        self.tok.append(NONE)
+        self.first.append(NONE)
+        self.next.append(NONE)
+        return len(self.label) - 1
+
+    def expand(self, parent, labels):
+        """Agrega los hijos de parent (contiguos) y devuelve sus índices."""
+        lo = len(self.label)
+        for lab in labels:
+            self.add(lab)
+        hi = len(self.label)
+        if hi > lo:
+            self.first[parent] = lo
+            nxt = self.next
+            for j in range(lo, hi - 1):
+                nxt[j] = j + 1
+        return range(lo, hi)
+
+    def expand_ids(self, parent, lids):
+        """Como expand() con ids de etiqueta ya internados (ver __init__)."""
+        label = self.label
+        lo = len(label)
+        n = len(lids)
+        if n:
+            label.extend(lids)
+            pad = _PADS[n] if n < 16 else array('i', [NONE]) * n
+            self.tok.extend(pad)
+            first = self.first
+            first.extend(pad)
+            first[parent] = lo
+            nxt = self.next
+            nxt.extend(range(lo + 1, lo + n))
+            nxt.append(NONE)
+        return range(lo, lo + n)
+
+    def leaf(self, i, lex):
+        """Marca el terminal i como emparejado con el lexema lex."""
+        self.tok[i] = len(self.lexemes)
+        self.lexemes.append(lex)
+
+    def epsilon(self, i):
+        self.tok[i] = EPS
+
+    def children_of(self, i):
+        j = self.first[i]
+        nxt = self.next
+        while j != NONE:
+            yield j
+            j = nxt[j]
+
+    def absorb(self, other):
+        """
+        Copia al final todos los nodos de otra Arena (p. ej. la de un parseo
+        hecho en otro proceso) y devuelve el desplazamiento de sus índices.
+        """
+        off = len(self.label)
+        remap = [self.label_ids.get(lab) for lab in other.labels]
+        for k, lab in enumerate(other.labels):
+            if remap[k] is None:
+                remap[k] = self.label_ids[lab] = len(self.labels)
+                self.labels.append(lab)
+        if remap == list(range(len(remap))):
+            self.label.extend(other.label)
+        else:
+            self.label.extend(array('i', [remap[x] for x in other.label]))
+        base = len(self.lexemes)
+        self.tok.extend(array('i', [t + base if t >= 0 else t for t in other.tok]))
+        self.first.extend(array('i', [x + off if x != NONE else NONE for x in other.first]))
+        self.next.extend(array('i', [x + off if x != NONE else NONE for x in other.next]))
+        self.lexemes.extend(other.lexemes)
+        return off
+
+    def view(self, i=0):
+        return NodeView(self, i)
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.label, self.tok, self.first, self.next))
+
+
+class SpanArena(Arena):
+    """
+    Arena que además guarda línea/columna de cada terminal emparejado:
+    tokens es el flujo del parser (lexer.TokenStream) y al llamar a leaf()
+    su token actual es el que se empareja. lex_line/lex_col van en paralelo
+    a lexemes (ver explorer.py).
+    """
+    __slots__ = ("tokens", "lex_line", "lex_col")
+
+    def __init__(self, labels=None, tokens=None):
+        Arena.__init__(self, labels)
+        self.tokens = tokens
+        self.lex_line = array('i')
+        self.lex_col = array('i')
+
+    def leaf(self, i, lex):
+        Arena.leaf(self, i, lex)
+        cur = self.tokens.cur
+        self.lex_line.append(cur.line)
+        self.lex_col.append(cur.col)
+
+    def absorb(self, other):
+        off = Arena.absorb(self, other)
+        self.lex_line.extend(other.lex_line)
+        self.lex_col.extend(other.lex_col)
+        return off
+
+
+class NodeView:
+    """Vista perezosa de un nodo de Arena con la interfaz de Node (label, children)."""
+    __slots__ = ("arena", "i")
+
+    def __init__(self, arena, i):
+        self.arena = arena
+        self.i = i
+
+    @property
+    def label(self):
+        a = self.arena
+        return a.labels[a.label[self.i]]
+
+    @property
+    def children(self):
+        a, i = self.arena, self.i
+        t = a.tok[i]
+        if t == EPS:
+            return [Node("ε")]
+        if t >= 0:
+            lex = a.lexemes[t]
+            return [Node(f"«{lex}»")] if lex else [Node(self.label)]
+        return [NodeView(a, j) for j in a.children_of(i)]
+
+    def to_mermaid(self, max_nodes=None, max_depth=None):
+        return to_mermaid(self, max_nodes, max_depth)
+
+    def to_dot(self, max_nodes=None, max_depth=None):
+        return to_dot(self, max_nodes, max_depth)
+
+    def __repr__(self):
+        return f"NodeView({self.label!r}, #{self.i})"